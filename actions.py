@@ -0,0 +1,250 @@
+"""
+Legal-move generation for Pokémon TCG
+Typed actions for the current player of a Game, with in-place apply and undo
+"""
+from collections import namedtuple
+from trainers import can_play_trainer
+
+# Action kinds
+PLAY_ACTIVE = 0  # Play a Pokémon from hand as the active Pokémon
+PLAY_BENCH = 1  # Play a Pokémon from hand to the bench
+ATTACH_ENERGY = 2  # Attach an energy from hand to the active (target ACTIVE) or a bench slot
+PLAY_TRAINER = 3  # Play a trainer card from hand
+ATTACK = 4  # Attack with the active Pokémon
+END_TURN = 5  # End the turn
+
+ACTIVE = -1  # Energy target meaning the active Pokémon
+
+KIND_NAMES = ("play active", "play bench", "attach energy", "play trainer", "attack", "end turn")
+
+# Cards in hand are named by card_id: copies of a card are interchangeable,
+# so playing any of them leads to the same position.
+Action = namedtuple("Action", "kind card_id target")
+
+ATTACK_ACTION = Action(ATTACK, None, None)
+END_TURN_ACTION = Action(END_TURN, None, None)
+
+# Interned actions so move generation never builds a new tuple per candidate
+_ACTIONS = {}
+
+
+def get_action(kind, card_id=None, target=None):
+    """Return the shared Action for the given fields"""
+    key = (kind, card_id, target)
+    action = _ACTIONS.get(key)
+    if action is None:
+        action = _ACTIONS[key] = Action(kind, card_id, target)
+    return action
+
+
+_ACTIONS[(ATTACK, None, None)] = ATTACK_ACTION
+_ACTIONS[(END_TURN, None, None)] = END_TURN_ACTION
+
+# One row per kind, indexed by card_id (and energy target), filled on first use
+_PLAY_ACTIVE = {}
+_PLAY_BENCH = {}
+_PLAY_TRAINER = {}
+_ATTACH_ENERGY = {}
+
+
+def _card_action(table, kind, card_id):
+    action = table.get(card_id)
+    if action is None:
+        action = table[card_id] = get_action(kind, card_id)
+    return action
+
+
+def _energy_actions(card_id):
+    row = _ATTACH_ENERGY.get(card_id)
+    if row is None:
+        # Index 0 is the active Pokémon, 1-5 are bench slots 0-4
+        row = _ATTACH_ENERGY[card_id] = tuple(
+            get_action(ATTACH_ENERGY, card_id, target) for target in range(ACTIVE, 5)
+        )
+    return row
+
+
+def legal_actions(game):
+    """Yield every legal action for the current player of game
+
+    Each distinct card in hand yields its actions once. END_TURN is
+    always yielded last.
+    """
+    if game.winner is not None:
+        return
+    player = game.players[game.current]
+    opponent = game.players[1 - game.current]
+    active = player.active_pokemon
+    bench_open = len(player.bench) < 5
+    seen = set()
+
+    for card in player.hand:
+        card_id = card.template.card_id
+        if card_id in seen:
+            continue
+        seen.add(card_id)
+
+        card_type = card.card_type
+        if card_type == "pokemon":
+            if active is None:
+                yield _card_action(_PLAY_ACTIVE, PLAY_ACTIVE, card_id)
+            elif bench_open:
+                yield _card_action(_PLAY_BENCH, PLAY_BENCH, card_id)
+        elif card_type == "energy":
+            row = _energy_actions(card_id)
+            if active is not None:
+                yield row[0]
+            for i in range(len(player.bench)):
+                yield row[i + 1]
+        elif card_type == "trainer":
+            if can_play_trainer(player, card):
+                yield _card_action(_PLAY_TRAINER, PLAY_TRAINER, card_id)
+
+    if (active is not None and opponent.active_pokemon is not None and player.can_attack
+            and active.attached_energy >= active.energy_cost):
+        yield ATTACK_ACTION
+
+    yield END_TURN_ACTION
+
+
+def _hand_index(player, card_id):
+    for i, card in enumerate(player.hand):
+        if card.template.card_id == card_id:
+            return i
+    raise ValueError(f"No card with id {card_id} in {player.name}'s hand")
+
+
+def _snapshot(game):
+    """Everything a trainer, attack or end of turn can change in game, for _restore"""
+    players = []
+    for player in game.players:
+        in_play = [player.active_pokemon] if player.active_pokemon is not None else []
+        in_play += player.bench
+        zones = [(zone, list(zone)) for zone in (player.bench, player.hand, player.discard)]
+        players.append((player, player.active_pokemon, zones,
+                        player.deck, list(player.deck), player.prizes, list(player.prizes),
+                        player.can_attack, player.knockouts,
+                        [(card, card.damage_taken, card.attached_energy) for card in in_play]))
+    return game.current, game.turns, game.winner, game.final_blow, players
+
+
+def _restore(game, saved):
+    """Put game back into the position _snapshot saved
+
+    Fields are put back into the same Player, list, Deck and Card objects,
+    so references held to any of them (and anything attached to a player,
+    such as a game log or profiler) stay good.
+    """
+    game.current, game.turns, game.winner, game.final_blow, players = saved
+    for player, active, zones, deck, deck_cards, prizes, prize_cards, can_attack, knockouts, in_play in players:
+        for card, damage_taken, attached_energy in in_play:
+            card.damage_taken = damage_taken
+            card.attached_energy = attached_energy
+        player.active_pokemon = active
+        (bench, bench_cards), (hand, hand_cards), (discard, discard_cards) = zones
+        bench[:] = bench_cards
+        hand[:] = hand_cards
+        discard[:] = discard_cards
+        player.bench, player.hand, player.discard = bench, hand, discard
+        deck.replace(deck_cards)
+        prizes.replace(prize_cards)
+        player.deck, player.prizes = deck, prizes
+        player.can_attack = can_attack
+        player.knockouts = knockouts
+
+
+def _resolve(game, player, action):
+    """Carry out a trainer, attack or end-turn action and return its message"""
+    kind = action.kind
+    if kind == PLAY_TRAINER:
+        _, message = player.play_trainer(_hand_index(player, action.card_id))
+    elif kind == ATTACK:
+        _, message = player.attack(game.players[1 - game.current])
+        promoted = game.resolve_knockouts()
+        if promoted:
+            message += f"\n{game.players[1 - game.current].name}: {promoted}"
+    elif kind == END_TURN:
+        game.end_turn()
+        message = "Ended the turn"
+    else:
+        raise ValueError(f"Unknown action kind {kind}")
+    return message
+
+
+def _apply(game, action, undoable):
+    """Apply action to game, returning (undo token, message)"""
+    player = game.players[game.current]
+    kind = action.kind
+
+    if kind == PLAY_ACTIVE or kind == PLAY_BENCH:
+        index = _hand_index(player, action.card_id)
+        _, message = player.play_pokemon(index, as_active=kind == PLAY_ACTIVE)
+        return (action, index, None), message
+
+    if kind == ATTACH_ENERGY:
+        index = _hand_index(player, action.card_id)
+        card = player.hand[index]
+        _, message = player.play_energy(index, None if action.target == ACTIVE else action.target)
+        return (action, index, card), message
+
+    # The rest can draw cards or knock Pokémon out, so undo restores a snapshot
+    snapshot = _snapshot(game) if undoable else None
+    return (action, None, snapshot), _resolve(game, player, action)
+
+
+def apply(game, action):
+    """Apply a legal action to game in place and return a token for undo()"""
+    token, _ = _apply(game, action, True)
+    return token
+
+
+def perform(game, action):
+    """Apply a legal action to game for good and return its result message"""
+    _, message = _apply(game, action, False)
+    return message
+
+
+def undo(game, token):
+    """Undo the action that returned token; actions must be undone in reverse order"""
+    action, index, saved = token
+    player = game.players[game.current]
+    kind = action.kind
+
+    if kind == PLAY_ACTIVE:
+        player.hand.insert(index, player.active_pokemon)
+        player.active_pokemon = None
+    elif kind == PLAY_BENCH:
+        player.hand.insert(index, player.bench.pop())
+    elif kind == ATTACH_ENERGY:
+        target = player.active_pokemon if action.target == ACTIVE else player.bench[action.target]
+        target.attached_energy -= 1
+        player.hand.insert(index, saved)
+    else:
+        _restore(game, saved)
+
+
+def play(game, policy):
+    """Play game to the end, asking policy(game) for every action"""
+    game.setup()
+    game.begin_turn()
+    while game.winner is None:
+        perform(game, policy(game))
+    return game.winner
+
+
+def random_policy(rng):
+    """Return a policy that picks uniformly among the legal actions"""
+    def policy(game):
+        return rng.choice(list(legal_actions(game)))
+    return policy
+
+
+def describe(action):
+    """Return a short human-readable description of an action"""
+    from pokemon_cards import CARD_TEMPLATES
+    text = KIND_NAMES[action.kind]
+    if action.card_id is not None:
+        text += f" {CARD_TEMPLATES[action.card_id].name}"
+    if action.kind == ATTACH_ENERGY:
+        text += " to active" if action.target == ACTIVE else f" to bench {action.target + 1}"
+    return text
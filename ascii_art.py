@@ -1,6 +1,8 @@
 """
 ASCII Art Utilities for Pokémon TCG Game
 """
+import sys
+from functools import lru_cache
 
 # ASCII art for each Pokémon
 POKEMON_ASCII = {
@@ -100,9 +102,9 @@ POKEMON_ASCII = {
     """
 }
 
-def print_title():
-    """Print the game title in ASCII art"""
-    print("""
+def render_title():
+    """Build the game title in ASCII art"""
+    return """
  _____      _                              _______ _____ _____  
 |  __ \\    | |                            |__   __/ ____|  __ \\ 
 | |__) |__ | | _____ _ __ ___   ___  _ __    | | | |    | |  | |
@@ -110,158 +112,254 @@ def print_title():
 | |  | (_) |   <  __/ | | | | | (_) | | | |  | | | |____| |_| | 
 |_|   \\___/|_|\\_\\___|_| |_| |_|\\___/|_| |_|  |_|  \\_____|____/ 
                                                                
-    """)
+    """
+
+def print_title():
+    """Print the game title in ASCII art"""
+    sys.stdout.write(render_title() + "\n")
+
+CARD_WIDTH = 30
+
+@lru_cache(maxsize=None)
+def sprite_lines(name):
+    """Return a Pokémon's ASCII art as a tuple of lines (empty if it has none)"""
+    if name not in POKEMON_ASCII:
+        return ()
+    return tuple(POKEMON_ASCII[name].strip('\n').split('\n'))
+
+@lru_cache(maxsize=None)
+def _sprite_block(name, width, edge):
+    """Return a Pokémon's ASCII art centered and framed for one card width and style"""
+    return tuple(f"{edge} {line.center(width)} {edge}" for line in sprite_lines(name))
+
+@lru_cache(maxsize=None)
+def _card_frame(template, active, width):
+    """Precompute a card's box for one width and style (active '*' or benched '|')
+
+    Returns (lines, hp_row, hp_format, energy_row, energy_format). Only HP
+    and attached energy change during a game, so every other line is
+    built here once; for Pokémon the two changing rows hold precompiled
+    format strings. Energy and trainer cards are static, with rows None.
+    """
+    edge = "*" if active else "|"
+    border = ("*" if active else "-") * (width + 4)
+    blank = f"{edge} {' ' * width} {edge}"
+    lines = [border, blank, f"{edge} {template.name.center(width)} {edge}"]
+    
+    if template.card_type != "pokemon":
+        label = "ENERGY CARD" if template.card_type == "energy" else "TRAINER CARD"
+        lines.append(f"{edge} {label.center(width)} {edge}")
+        lines.append(f"{edge} {template.description.center(width)} {edge}")
+        lines.append(blank)
+        lines.append(border)
+        return tuple(lines), None, None, None, None
+    
+    if active:
+        lines.extend(_sprite_block(template.name, width, edge))
+    hp_row = len(lines)
+    lines.append(None)
+    lines.append(f"{edge} {'Attack: ' + template.description:<{width}} {edge}")
+    lines.append(f"{edge} {'Damage: ' + str(template.damage):<{width}} {edge}")
+    energy_row = len(lines)
+    lines.append(None)
+    lines.append(blank)
+    lines.append(border)
+    hp_format = f"{edge} HP: {{:<{width - 4}}} {edge}"
+    energy_format = f"{edge} Energy: {{:<{width - 8}}} {edge}"
+    return tuple(lines), hp_row, hp_format, energy_row, energy_format
+
+@lru_cache(maxsize=1024)
+def _card_lines(template, hp, attached_energy, active, width):
+    """Fill a card frame's HP and energy rows for one display state"""
+    lines, hp_row, hp_format, energy_row, energy_format = _card_frame(template, active, width)
+    if hp_row is None:
+        return lines
+    lines = list(lines)
+    lines[hp_row] = hp_format.format(hp)
+    lines[energy_row] = energy_format.format(f"{attached_energy}/{template.energy_cost}")
+    return tuple(lines)
+
+def card_lines(card, active=False, width=CARD_WIDTH):
+    """Return the lines of a card's ASCII art box, cached on its display state"""
+    return _card_lines(card.template, card.hp, card.attached_energy, active, width)
 
 def print_card(card, active=False):
     """Print a card in ASCII art"""
-    width = 30
-    if active:
-        print("*" * (width + 4))
-        print("* " + " " * width + " *")
-    else:
-        print("-" * (width + 4))
-        print("| " + " " * width + " |")
-    
-    if card.card_type == "pokemon":
-        if active:
-            print(f"* {card.name.center(width)} *")
-            
-            # Add ASCII art for active Pokémon
-            if card.name in POKEMON_ASCII:
-                art_lines = POKEMON_ASCII[card.name].strip('\n').split('\n')
-                for line in art_lines:
-                    padded_line = line.center(width)
-                    print(f"* {padded_line} *")
-            
-            print(f"* {'HP: ' + str(card.hp):<{width}} *")
-            print(f"* {'Attack: ' + card.description:<{width}} *")
-            print(f"* {'Damage: ' + str(card.damage):<{width}} *")
-            print(f"* {'Energy: ' + str(card.attached_energy) + '/' + str(card.energy_cost):<{width}} *")
-            print("* " + " " * width + " *")
-            print("*" * (width + 4))
-        else:
-            print(f"| {card.name.center(width)} |")
-            print(f"| {'HP: ' + str(card.hp):<{width}} |")
-            print(f"| {'Attack: ' + card.description:<{width}} |")
-            print(f"| {'Damage: ' + str(card.damage):<{width}} |")
-            print(f"| {'Energy: ' + str(card.attached_energy) + '/' + str(card.energy_cost):<{width}} |")
-            print("| " + " " * width + " |")
-            print("-" * (width + 4))
-    elif card.card_type == "energy":
-        if active:
-            print(f"* {card.name.center(width)} *")
-            print(f"* {'ENERGY CARD'.center(width)} *")
-            print(f"* {card.description.center(width)} *")
-            print("* " + " " * width + " *")
-            print("*" * (width + 4))
-        else:
-            print(f"| {card.name.center(width)} |")
-            print(f"| {'ENERGY CARD'.center(width)} |")
-            print(f"| {card.description.center(width)} |")
-            print("| " + " " * width + " |")
-            print("-" * (width + 4))
-    else:  # Trainer
-        if active:
-            print(f"* {card.name.center(width)} *")
-            print(f"* {'TRAINER CARD'.center(width)} *")
-            print(f"* {card.description.center(width)} *")
-            print("* " + " " * width + " *")
-            print("*" * (width + 4))
-        else:
-            print(f"| {card.name.center(width)} |")
-            print(f"| {'TRAINER CARD'.center(width)} |")
-            print(f"| {card.description.center(width)} |")
-            print("| " + " " * width + " |")
-            print("-" * (width + 4))
+    sys.stdout.write("\n".join(card_lines(card, active)) + "\n")
 
-def print_hand(hand):
-    """Print the player's hand in a more detailed way"""
-    print("\nYOUR HAND:")
-    print("=" * 80)
+def render_hand(hand):
+    """Build the player's hand in a more detailed way"""
+    out = ["\nYOUR HAND:", "=" * 80]
     
     for i, card in enumerate(hand):
-        print(f"{i+1}. {card}")
-        if card.card_type == "pokemon" and card.name in POKEMON_ASCII:
-            art_lines = POKEMON_ASCII[card.name].strip('\n').split('\n')
-            for line in art_lines:
-                print(f"   {line}")
-        print("-" * 40)
+        out.append(f"{i+1}. {card}")
+        if card.card_type == "pokemon":
+            for line in sprite_lines(card.name):
+                out.append(f"   {line}")
+        out.append("-" * 40)
     
-    print("=" * 80)
+    out.append("=" * 80)
+    return "\n".join(out)
 
-def print_board(player, computer, show_computer_hand=False):
-    """Print the current game board"""
-    print("\n" + "=" * 80)
-    print("COMPUTER".center(80))
-    print(f"Deck: {len(computer.deck)} cards | Discard: {len(computer.discard)} cards")
+def print_hand(hand):
+    """Print the player's hand in a more detailed way"""
+    sys.stdout.write(render_hand(hand) + "\n")
+
+def render_board(player, computer, show_computer_hand=False):
+    """Build the whole game board as one string"""
+    out = []
+    out.append("\n" + "=" * 80)
+    out.append("COMPUTER".center(80))
+    out.append(f"Deck: {len(computer.deck)} cards | Discard: {len(computer.discard)} cards")
     
-    print("\nCOMPUTER'S ACTIVE POKEMON:")
+    out.append("\nCOMPUTER'S ACTIVE POKEMON:")
     if computer.active_pokemon:
-        print_card(computer.active_pokemon, active=True)
+        out.extend(card_lines(computer.active_pokemon, active=True))
     else:
-        print("No active Pokémon")
+        out.append("No active Pokémon")
     
-    print("\nCOMPUTER'S BENCH:")
+    out.append("\nCOMPUTER'S BENCH:")
     if computer.bench:
         for pokemon in computer.bench:
-            print_card(pokemon)
+            out.extend(card_lines(pokemon))
     else:
-        print("No Pokémon on bench")
+        out.append("No Pokémon on bench")
     
     if show_computer_hand:
-        print("\nCOMPUTER'S HAND:")
+        out.append("\nCOMPUTER'S HAND:")
         for card in computer.hand:
-            print(f"- {card}")
+            out.append(f"- {card}")
     else:
-        print(f"\nCOMPUTER'S HAND: {len(computer.hand)} cards")
+        out.append(f"\nCOMPUTER'S HAND: {len(computer.hand)} cards")
     
-    print("\n" + "-" * 80 + "\n")
+    out.append("\n" + "-" * 80 + "\n")
     
-    print("PLAYER".center(80))
-    print(f"Deck: {len(player.deck)} cards | Discard: {len(player.discard)} cards")
+    out.append("PLAYER".center(80))
+    out.append(f"Deck: {len(player.deck)} cards | Discard: {len(player.discard)} cards")
     
-    print("\nYOUR ACTIVE POKEMON:")
+    out.append("\nYOUR ACTIVE POKEMON:")
     if player.active_pokemon:
-        print_card(player.active_pokemon, active=True)
+        out.extend(card_lines(player.active_pokemon, active=True))
     else:
-        print("No active Pokémon")
+        out.append("No active Pokémon")
     
-    print("\nYOUR BENCH:")
+    out.append("\nYOUR BENCH:")
     if player.bench:
         for pokemon in player.bench:
-            print_card(pokemon)
+            out.extend(card_lines(pokemon))
     else:
-        print("No Pokémon on bench")
+        out.append("No Pokémon on bench")
     
-    print("\nYOUR HAND:")
+    out.append("\nYOUR HAND:")
     for i, card in enumerate(player.hand):
-        print(f"{i+1}. {card}")
+        out.append(f"{i+1}. {card}")
+    
+    out.append("=" * 80 + "\n")
+    return "\n".join(out)
+
+def _hand_name(template):
+    """A hand card's name, as the compact board lists it"""
+    return f"{template.name} Energy" if template.card_type == "energy" else template.name
+
+@lru_cache(maxsize=4096)
+def _compact_pokemon(label, template, hp, attached_energy):
+    """One line describing a Pokémon in play, for the compact board"""
+    attack = f"{template.description} {template.damage}"
+    return (f"  {label:<9}{template.name:<13}HP {hp:>3}/{template.hp:<5}{attack:<20}"
+            f"Energy {attached_energy}/{template.energy_cost}")[:80]
+
+@lru_cache(maxsize=1024)
+def _compact_hand(label, templates, numbered):
+    """A hand's cards flowed into rows after a label, as many to a row as fit in 80 columns"""
+    indent = f"  {label:<9}"
+    lines = []
+    row = []
+    for i, template in enumerate(templates):
+        item = f"{i+1}. {_hand_name(template)}" if numbered else _hand_name(template)
+        if row and len(indent) + len("   ".join(row + [item])) > 80:
+            lines.append(indent + "   ".join(row))
+            indent = " " * len(indent)
+            row = []
+        row.append(item)
+    lines.append(indent + ("   ".join(row) if row else "(empty)"))
+    return tuple(line[:80] for line in lines)
+
+def _compact_side(out, title, player, show_hand, numbered):
+    """Add one player's half of the compact board to out"""
+    header = f"{title:<11}Deck: {len(player.deck)} cards | Discard: {len(player.discard)} cards"
+    if not show_hand:
+        header += f" | Hand: {len(player.hand)} cards"
+    out.append(header)
+    active = player.active_pokemon
+    if active is None:
+        out.append("  Active   (none)")
+    else:
+        out.append(_compact_pokemon("Active", active.template, active.hp, active.attached_energy))
+    for i, pokemon in enumerate(player.bench):
+        out.append(_compact_pokemon(f"Bench {i+1}", pokemon.template, pokemon.hp, pokemon.attached_energy))
+    if not player.bench:
+        out.append("  Bench    (empty)")
+    if show_hand:
+        out.extend(_compact_hand("Hand", tuple(card.template for card in player.hand), numbered))
+
+def render_compact_board(player, computer, show_computer_hand=False):
+    """Build the game board with one line per Pokémon, short enough to stay on screen
     
-    print("=" * 80 + "\n")
+    It holds what render_board does, without the card art, in about an
+    eighth of the lines.
+    """
+    out = ["=" * 80]
+    _compact_side(out, "COMPUTER", computer, show_computer_hand, False)
+    out.append("-" * 80)
+    _compact_side(out, "PLAYER", player, True, True)
+    out.append("=" * 80)
+    return "\n".join(out)
+
+def print_board(player, computer, show_computer_hand=False):
+    """Print the current game board"""
+    sys.stdout.write(render_board(player, computer, show_computer_hand) + "\n")
+
+def render_turn_banner(player_name):
+    """Build a banner for whose turn it is"""
+    banner = f"===== {player_name}'S TURN ====="
+    return "\n" + "=" * len(banner) + "\n" + banner + "\n" + "=" * len(banner) + "\n"
 
 def print_turn_banner(player_name):
     """Print a banner for whose turn it is"""
-    banner = f"===== {player_name}'S TURN ====="
-    print("\n" + "=" * len(banner))
-    print(banner)
-    print("=" * len(banner) + "\n")
+    sys.stdout.write(render_turn_banner(player_name) + "\n")
+
+def render_action(action_text):
+    """Build an action line with formatting"""
+    return f">> {action_text}"
 
 def print_action(action_text):
     """Print an action with formatting"""
-    print(f">> {action_text}")
+    sys.stdout.write(render_action(action_text) + "\n")
+
+def render_winner(winner):
+    """Build the winner announcement"""
+    return "\n".join([
+        "\n" + "*" * 60,
+        f"***** {winner} WINS THE GAME! *****".center(60),
+        "*" * 60 + "\n",
+    ])
 
 def print_winner(winner):
     """Print the winner announcement"""
-    print("\n" + "*" * 60)
-    print(f"***** {winner} WINS THE GAME! *****".center(60))
-    print("*" * 60 + "\n")
+    sys.stdout.write(render_winner(winner) + "\n")
+
+def render_help():
+    """Build the help information"""
+    return "\n".join([
+        "\n=== COMMANDS ===",
+        "1-N       - Play card from hand (number corresponds to card position)",
+        "attack    - Attack with your active Pokémon",
+        "end       - End your turn",
+        "help      - Show this help information",
+        "quit      - Quit the game",
+        "==============\n",
+    ])
 
 def print_help():
     """Print help information"""
-    print("\n=== COMMANDS ===")
-    print("1-N       - Play card from hand (number corresponds to card position)")
-    print("attack    - Attack with your active Pokémon")
-    print("end       - End your turn")
-    print("help      - Show this help information")
-    print("quit      - Quit the game")
-    print("==============\n") 
\ No newline at end of file
+    sys.stdout.write(render_help() + "\n")
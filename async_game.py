@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Asyncio game loop for Pokémon TCG
+Drives the game flow from pokemon_tcg without blocking, so one process can host many tables
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter
+from pokemon_tcg import ART, BOARD, CALL, INPUT, PAUSE, SLOW, WRITE, play_game
+from renderer import BoardRenderer
+
+
+class EventStream:
+    """File-like output adapter that queues one game's output for a reader
+
+    Writes never block; the text is read back with `async for`, which
+    ends once close() is called.
+    """
+
+    def __init__(self):
+        self._queue = asyncio.Queue()
+        self.bytes_written = 0
+
+    def write(self, text):
+        self._queue.put_nowait(text)
+        self.bytes_written += len(text)
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+    def close(self):
+        """Mark the end of the stream"""
+        self._queue.put_nowait(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        text = await self._queue.get()
+        if text is None:
+            raise StopAsyncIteration
+        return text
+
+
+class StreamInput:
+    """Input adapter reading lines from an asyncio StreamReader (e.g. a socket)"""
+
+    def __init__(self, reader, encoding="utf-8"):
+        self.reader = reader
+        self.encoding = encoding
+
+    async def __call__(self, prompt):
+        line = await self.reader.readline()
+        if not line:
+            raise EOFError("Input stream closed")
+        return line.decode(self.encoding, errors="replace").rstrip("\r\n")
+
+
+class QueueInput:
+    """Input adapter fed lines by other code through put()"""
+
+    def __init__(self):
+        self._queue = asyncio.Queue()
+
+    def put(self, line):
+        """Queue a line of input; None ends the input"""
+        self._queue.put_nowait(line)
+
+    async def __call__(self, prompt):
+        line = await self._queue.get()
+        if line is None:
+            raise EOFError("Input closed")
+        return line
+
+
+class BotInput:
+    """Input adapter that answers every prompt like a careless human player"""
+
+    COMMANDS = ("1", "2", "3", "4", "attack", "end")
+
+    def __init__(self, rng=None):
+        self.rng = rng if rng is not None else random.Random()
+
+    async def __call__(self, prompt):
+        if "0 to stop" in prompt:
+            return "0"
+        if "card number" in prompt:
+            return str(self.rng.randint(1, 7))
+        if "choice number" in prompt:
+            return "1"
+        if "Enter command" in prompt:
+            return self.rng.choice(self.COMMANDS)
+        return "n"
+
+
+async def run_async(flow, ask, out, pace=1.0, renderer=None, art=True):
+    """Drive a game flow without blocking the event loop
+
+    ask is an async callable taking the prompt and returning a line of
+    input; prompts are also written to out. pace scales every delay; 0
+    skips them, though the game still yields to other tasks at each one.
+    Slow calls (an AI search) run in the loop's default executor. With
+    art false, terminal art (screen clears, the title, card art) is left
+    out, for clients that draw the game from the renderer's data.
+    """
+    if renderer is None:
+        renderer = BoardRenderer(out=out)
+    reply = None
+    while True:
+        try:
+            kind, value = flow.send(reply)
+        except StopIteration as stop:
+            return stop.value
+        reply = None
+
+        if kind == WRITE:
+            out.write(value)
+        elif kind == ART:
+            if art:
+                out.write(value)
+        elif kind == SLOW:
+            text, delay = value
+            if pace > 0:
+                for char in text:
+                    out.write(char)
+                    await asyncio.sleep(delay * pace)
+                out.write("\n")
+            else:
+                out.write(text + "\n")
+                await asyncio.sleep(0)
+        elif kind == PAUSE:
+            await asyncio.sleep(value * pace if pace > 0 else 0)
+        elif kind == INPUT:
+            out.write(value)
+            reply = await ask(value)
+        elif kind == BOARD:
+            if value is None:
+                renderer.close()
+            else:
+                renderer.draw(*value)
+        elif kind == CALL:
+            reply = await asyncio.get_running_loop().run_in_executor(None, value)
+
+
+async def play(ask, out, pace=1.0, ai=None, rng=None):
+    """Play one game against the computer and close out when it ends; returns the result"""
+    try:
+        return await run_async(play_game(ai, rng), ask, out, pace)
+    finally:
+        if hasattr(out, "close"):
+            out.close()
+
+
+async def _drain(stream):
+    async for _ in stream:
+        pass
+
+
+async def _play_many(games, seed, pace):
+    streams = [EventStream() for _ in range(games)]
+    tasks = [
+        play(BotInput(random.Random(seed * 1000003 + i)), stream, pace,
+             rng=random.Random(seed * 1000003 + i + games))
+        for i, stream in enumerate(streams)
+    ]
+    readers = [_drain(stream) for stream in streams]
+    results = await asyncio.gather(*tasks, *readers)
+    return results[:games], sum(stream.bytes_written for stream in streams)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many bot-driven games concurrently on one event loop")
+    parser.add_argument("games", type=int, nargs="?", default=200, help="number of concurrent games")
+    parser.add_argument("--pace", type=float, default=0.0,
+                        help="animation delay multiplier (1 is the terminal game's pace, 0 skips delays)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for reproducible runs")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results, streamed = asyncio.run(_play_many(args.games, args.seed, args.pace))
+    elapsed = time.perf_counter() - start
+
+    counts = Counter(results)
+    print(f"Played {args.games} concurrent games in {elapsed:.2f}s "
+          f"({args.games / elapsed:,.1f} games/sec)")
+    print(f"Results: {counts['player']} player wins, {counts['computer']} computer wins")
+    print(f"Streamed {streamed:,} characters of output")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+Batch playout engine for Pokémon TCG
+Plays thousands of computer-vs-computer games in lockstep with NumPy, using the greedy policy of
+Player.make_computer_move, for large-scale simulation
+
+Requires NumPy, which the rest of the game does not.
+"""
+
+import argparse
+import random
+import time
+import numpy as np
+import simulator
+import trainers
+from engine import Game
+from player import PRIZE_COUNT
+from pokemon_cards import CARD_TEMPLATES, ROCK_DECK_LIST
+
+HAND_SIZE = 7
+BENCH_SIZE = 5
+NONE = -1  # No card
+
+# Card types
+POKEMON = 1
+ENERGY = 2
+TRAINER = 3
+CARD_TYPES = {"pokemon": POKEMON, "energy": ENERGY, "trainer": TRAINER}
+
+# Trainer effects this engine carries out, by the effect function registered in trainers.py
+POTION = 1
+ENERGY_RETRIEVAL = 2
+PROFESSORS_RESEARCH = 3
+SWITCH = 4
+POKEMON_CENTER = 5
+EFFECT_CODES = {
+    trainers.potion: POTION,
+    trainers.energy_retrieval: ENERGY_RETRIEVAL,
+    trainers.professors_research: PROFESSORS_RESEARCH,
+    trainers.switch: SWITCH,
+    trainers.pokemon_center: POKEMON_CENTER,
+}
+
+
+def _effect_code(template):
+    """The code of the trainer effect registered for a card in trainers.py, or 0 if it has none"""
+    entry = trainers.TRAINER_EFFECTS.get(template.card_id)
+    if entry is None:
+        return 0  # Can't be played, as in the scalar engine
+    code = EFFECT_CODES.get(entry.effect)
+    if code is None:
+        raise ValueError(f"The batch engine has no version of {template.name}'s effect, {entry.effect.__name__}")
+    return code
+
+
+def _card_table(value):
+    """Return value(template) for every card_id, plus a 0 at the end for NONE"""
+    return np.array([value(t) for t in CARD_TEMPLATES] + [0], dtype=np.int16)
+
+
+class CardTables:
+    """Card properties as arrays indexed by card_id (index NONE gives 0)"""
+
+    def __init__(self):
+        self.type = _card_table(lambda t: CARD_TYPES[t.card_type])
+        self.hp = _card_table(lambda t: t.hp)
+        self.damage = _card_table(lambda t: t.damage)
+        self.cost = _card_table(lambda t: t.energy_cost)
+        self.basic = _card_table(lambda t: t.card_type == "pokemon" and t.energy_cost <= 1).astype(bool)
+        self.effect = _card_table(_effect_code)
+
+
+def _sort_keys(rng, shape):
+    """Random 32-bit sort keys; argsort sorts them faster than floats, and ties are too rare to matter"""
+    return rng.integers(0, 1 << 32, shape, dtype=np.uint32)
+
+
+def deal(n_games, rng, deck_list=ROCK_DECK_LIST):
+    """Shuffle and deal n_games games, redealing any hand without a basic Pokémon
+
+    Returns the card_id order of every deck, shape (2, n_games, deck
+    size), top card first: the starting hand, then the prize cards, then
+    the draw pile, the way Game.deal() lays them out.
+    """
+    tables = CardTables()
+    ids = np.array([t.card_id for t in deck_list], dtype=np.int16)
+    order = ids[np.argsort(_sort_keys(rng, (2, n_games, len(ids))), axis=2)]
+    decks = order.reshape(2 * n_games, len(ids))
+    redo = np.flatnonzero(~tables.basic[decks[:, :HAND_SIZE]].any(axis=1))
+    while len(redo):
+        # A mulligan shuffles the hand back in, so the redeal is a fresh permutation
+        decks[redo] = ids[np.argsort(_sort_keys(rng, (len(redo), len(ids))), axis=1)]
+        redo = redo[~tables.basic[decks[redo, :HAND_SIZE]].any(axis=1)]
+    return order
+
+
+def deal_like_scalar(seeds):
+    """Deal each game exactly as Game(random.Random(seed)).deal() does, in deal()'s layout"""
+    orders = None
+    for i, seed in enumerate(seeds):
+        game = Game(random.Random(seed))
+        game.deal()
+        for seat, player in enumerate(game.players):
+            cards = player.hand + list(player.prizes) + list(player.deck)
+            if orders is None:
+                orders = np.empty((2, len(seeds), len(cards)), dtype=np.int16)
+            orders[seat, i] = [card.template.card_id for card in cards]
+    return orders
+
+
+def _remove(hand, place):
+    """Return hand with hand[row, place[row]] taken out of every row and the cards after it moved up"""
+    shifted = np.concatenate((hand[:, 1:], np.full((len(hand), 1), NONE, dtype=hand.dtype)), axis=1)
+    return np.where(np.arange(hand.shape[1]) >= place[:, None], shifted, hand)
+
+
+class BatchGames:
+    """Many dealt games held as struct-of-arrays and played in lockstep
+
+    Most arrays are (2, n): one row per seat, one column per game. Hands
+    are kept the way the greedy policy reads them: Pokémon in the order
+    they arrived (it only ever plays the first), trainers as their
+    effect codes in the order they arrived (cleared to 0 once played),
+    and energy as a count since every energy card is alike. No Pokémon or
+    trainer goes back to a hand once it leaves, so neither list ever needs
+    more room than the deck holds cards of that type.
+
+    Every game is on the same turn, because seat 0 always starts and the
+    seats alternate, so a whole turn is played for every unfinished game
+    at once.
+    """
+
+    def __init__(self, orders):
+        self.cards = cards = CardTables()
+        _, n, size = orders.shape
+        self.n = n
+        self.size = size
+        types = cards.type[orders[0, 0]]
+        max_pokemon = max(1, int((types == POKEMON).sum()))
+        max_trainers = max(1, int((types == TRAINER).sum()))
+
+        self.deck = orders.astype(np.int16)
+        self.deck_pos = np.full((2, n), HAND_SIZE + PRIZE_COUNT, dtype=np.int16)
+        self.prizes = self.deck[:, :, HAND_SIZE:HAND_SIZE + PRIZE_COUNT]
+        self.prizes_taken = np.zeros((2, n), dtype=np.int16)
+
+        self.pokemon = np.full((2, n, max_pokemon), NONE, dtype=np.int16)
+        self.pokemon_head = np.zeros((2, n), dtype=np.int16)
+        self.pokemon_tail = np.zeros((2, n), dtype=np.int16)
+        self.trainers = np.zeros((2, n, max_trainers), dtype=np.uint8)
+        self.trainer_count = np.zeros((2, n), dtype=np.int16)
+        self.energy = np.zeros((2, n), dtype=np.int16)
+
+        self.active = np.full((2, n), NONE, dtype=np.int16)
+        self.active_damage = np.zeros((2, n), dtype=np.int16)
+        self.active_energy = np.zeros((2, n), dtype=np.int16)
+        self.bench = np.full((2, n, BENCH_SIZE), NONE, dtype=np.int16)
+        self.bench_damage = np.zeros((2, n, BENCH_SIZE), dtype=np.int16)
+        self.bench_energy = np.zeros((2, n, BENCH_SIZE), dtype=np.int16)
+        self.bench_count = np.zeros((2, n), dtype=np.int16)
+
+        self.discard_energy = np.zeros((2, n), dtype=np.int16)
+        self.knockouts = np.zeros((2, n), dtype=np.int16)
+        self.winner = np.full(n, NONE, dtype=np.int16)
+        self.turns = np.zeros(n, dtype=np.int16)
+        self.final_blow = np.full(n, NONE, dtype=np.int16)  # card_id of the winning attacker
+
+    def _add_to_hand(self, seat, games, cards):
+        """Put one card into the hand of each of games (card NONE adds nothing)"""
+        kind = self.cards.type[cards]
+
+        pokemon = kind == POKEMON
+        g = games[pokemon]
+        tail = self.pokemon_tail[seat]
+        self.pokemon[seat][g, tail[g]] = cards[pokemon]
+        tail[g] += 1
+
+        self.energy[seat][games[kind == ENERGY]] += 1
+
+        trainer = kind == TRAINER
+        g = games[trainer]
+        count = self.trainer_count[seat]
+        slot = count[g]
+        self.trainers[seat][g, slot] = self.cards.effect[cards[trainer]]
+        count[g] += 1
+
+    def _draw(self, seat, games):
+        """Draw a card for each of games that has one left; returns the games that did"""
+        deck_pos = self.deck_pos[seat]
+        pos = deck_pos[games]
+        left = pos < self.size
+        games = games[left]
+        pos = pos[left]
+        self._add_to_hand(seat, games, self.deck[seat][games, pos])
+        deck_pos[games] = pos + 1
+        return games
+
+    def setup(self):
+        """Place every starting active and bench Pokémon, as Player.make_computer_setup does
+
+        make_computer_setup finds its basic Pokémon by their places in the
+        starting hand, then only allows for the bench cards it has already
+        played, not the active one, when playing the rest. So a later
+        "basic" may be whatever card has moved into that place; this plays
+        the same cards.
+        """
+        games = np.arange(self.n)
+        for seat in range(2):
+            hand = self.deck[seat, :, :HAND_SIZE].copy()
+            basic = self.cards.basic[hand]
+            # Hand places of the basic Pokémon, first to last, then the rest
+            places = np.argsort(~basic, axis=1, kind="stable")
+            basics = basic.sum(axis=1)
+
+            # deal() has made sure every hand holds a basic Pokémon
+            self.active[seat] = hand[games, places[:, 0]]
+            hand = _remove(hand, places[:, 0])
+            for i in range(1, BENCH_SIZE + 1):
+                place = places[:, i] - self.bench_count[seat]
+                card = hand[games, place]
+                g = games[(basics > i) & (self.cards.type[card] == POKEMON)]
+                self.bench[seat, g, self.bench_count[seat, g]] = card[g]
+                self.bench_count[seat, g] += 1
+                hand[g] = _remove(hand[g], place[g])
+
+            for i in range(HAND_SIZE):
+                card = hand[:, i]
+                held = card != NONE
+                self._add_to_hand(seat, games[held], card[held])
+
+    def play_turn(self, seat):
+        """Play the next turn, by seat, of every unfinished game"""
+        opponent = 1 - seat
+        cards = self.cards
+        # This seat's and the opponent's rows, so each step indexes by game alone
+        active, active_damage, active_energy = self.active[seat], self.active_damage[seat], self.active_energy[seat]
+        bench, bench_damage, bench_energy = self.bench[seat], self.bench_damage[seat], self.bench_energy[seat]
+        bench_count = self.bench_count[seat]
+        pokemon, pokemon_head, pokemon_tail = self.pokemon[seat], self.pokemon_head[seat], self.pokemon_tail[seat]
+        energy = self.energy[seat]
+        prizes_taken = self.prizes_taken[seat]
+        their_active, their_damage = self.active[opponent], self.active_damage[opponent]
+        their_bench_count = self.bench_count[opponent]
+
+        games = np.flatnonzero(self.winner == NONE)
+        self.turns[games] += 1
+
+        # Draw a card; a player who can't loses
+        drew = self._draw(seat, games)
+        if len(drew) < len(games):
+            self.winner[np.setdiff1d(games, drew, assume_unique=True)] = opponent
+            games = drew
+
+        # With no active Pokémon, play the first Pokémon in hand
+        head = pokemon_head[games]
+        g = games[(active[games] == NONE) & (head < pokemon_tail[games])]
+        active[g] = pokemon[g, pokemon_head[g]]
+        active_damage[g] = 0
+        active_energy[g] = 0
+        pokemon_head[g] += 1
+
+        # Fill the bench from the front of the hand
+        to_bench = np.minimum(BENCH_SIZE - bench_count[games], pokemon_tail[games] - pokemon_head[games])
+        for i in range(BENCH_SIZE):
+            g = games[to_bench > i]
+            if not len(g):
+                break
+            slot = bench_count[g]
+            head = pokemon_head[g]
+            bench[g, slot] = pokemon[g, head]
+            bench_damage[g, slot] = 0
+            bench_energy[g, slot] = 0
+            bench_count[g] = slot + 1
+            pokemon_head[g] = head + 1
+
+        # Attach one energy to the active Pokémon
+        mine = active[games]
+        g = games[(energy[games] > 0) & (mine != NONE)]
+        energy[g] -= 1
+        active_energy[g] += 1
+
+        self._play_trainer(seat, games)
+
+        # Attack if the active Pokémon has enough energy
+        mine = active[games]
+        g = games[(mine != NONE) & (their_active[games] != NONE) & (active_energy[games] >= cards.cost[mine])]
+        damage = their_damage[g] + cards.damage[active[g]]
+        their_damage[g] = damage
+        g = g[damage >= cards.hp[their_active[g]]]
+        their_active[g] = NONE
+        self.knockouts[seat, g] += 1
+        taken = prizes_taken[g]
+        left = taken < PRIZE_COUNT
+        prize = g[left]
+        taken = taken[left]
+        self._add_to_hand(seat, prize, self.prizes[seat][prize, taken])
+        prizes_taken[prize] = taken + 1
+
+        # The opponent promotes their first bench Pokémon
+        g = g[their_bench_count[g] > 0]
+        their_active[g] = self.bench[opponent, g, 0]
+        their_damage[g] = self.bench_damage[opponent, g, 0]
+        self.active_energy[opponent, g] = self.bench_energy[opponent, g, 0]
+        for zone in (self.bench, self.bench_damage, self.bench_energy):
+            zone[opponent, g, :-1] = zone[opponent, g, 1:]
+        self.bench[opponent, g, -1] = NONE
+        their_bench_count[g] -= 1
+
+        # Win by taking every prize or leaving the opponent without Pokémon
+        won = games[(prizes_taken[games] == PRIZE_COUNT)
+                    | ((their_active[games] == NONE) & (their_bench_count[games] == 0))]
+        self.winner[won] = seat
+        self.final_blow[won] = active[won]
+
+    def _play_trainer(self, seat, games):
+        """Play the first trainer in hand that can be played, if any"""
+        active, bench_count = self.active[seat], self.bench_count[seat]
+        discard_energy, energy = self.discard_energy[seat], self.energy[seat]
+        trainers = self.trainers[seat]
+
+        # Bit e of playable[game] is set when a trainer with effect e can be
+        # played; bit 0 (no card, or one already played) never is
+        has_active = active != NONE
+        playable = np.zeros(self.n, dtype=np.uint8)
+        playable[games] = ((has_active[games] << POTION)
+                           | ((discard_energy[games] > 0) << ENERGY_RETRIEVAL)
+                           | (1 << PROFESSORS_RESEARCH)
+                           | ((has_active[games] & (bench_count[games] > 0)) << SWITCH)
+                           | (has_active[games] << POKEMON_CENTER))
+
+        # Every slot of every hand at once; argmax finds each hand's first playable one
+        pick = (playable[:, None] >> trainers) & 1
+        chosen = pick.argmax(axis=1)
+        g = np.flatnonzero(pick.any(axis=1))
+        slot = chosen[g]
+        effect = trainers[g, slot]
+        trainers[g, slot] = 0
+
+        # Potion and Pokémon Center heal nothing in trainers.py
+        r = g[effect == ENERGY_RETRIEVAL]
+        discard_energy[r] -= 1
+        energy[r] += 1
+
+        r = g[effect == SWITCH]
+        for in_play, bench in ((self.active, self.bench), (self.active_damage, self.bench_damage),
+                               (self.active_energy, self.bench_energy)):
+            swapped = bench[seat, r, 0]
+            bench[seat, r, 0] = in_play[seat, r]
+            in_play[seat, r] = swapped
+
+        # Professor's Research discards the whole hand, itself included, and draws 7
+        r = g[effect == PROFESSORS_RESEARCH]
+        discard_energy[r] += energy[r]
+        energy[r] = 0
+        self.pokemon_head[seat, r] = self.pokemon_tail[seat, r]
+        trainers[r] = 0
+        for _ in range(HAND_SIZE):
+            r = self._draw(seat, r)
+
+    def play(self):
+        """Set up and play every game to the end"""
+        self.setup()
+        seat = 0
+        while (self.winner == NONE).any():
+            self.play_turn(seat)
+            seat = 1 - seat
+
+    def totals(self):
+        """Integer totals in the form simulator._simulate_range returns"""
+        return {
+            "games": self.n,
+            "wins": [int((self.winner == seat).sum()) for seat in range(2)],
+            "prizes_taken": [int(self.prizes_taken[seat].sum()) for seat in range(2)],
+            "total_turns": int(self.turns.sum()),
+            "min_turns": int(self.turns.min()) if self.n else None,
+            "max_turns": int(self.turns.max()) if self.n else 0,
+        }
+
+
+def batch_totals(n_games, seed=None, batch_size=50000):
+    """Play n_games in batches of batch_size, yielding each batch's integer totals"""
+    rng = np.random.default_rng(seed)
+    for start in range(0, n_games, batch_size):
+        games = BatchGames(deal(min(batch_size, n_games - start), rng))
+        games.play()
+        yield games.totals()
+
+
+def check(seeds):
+    """Play the same deals in both engines; returns the number of games that differ"""
+    games = BatchGames(deal_like_scalar(seeds))
+    games.play()
+    mismatches = 0
+    for i, seed in enumerate(seeds):
+        game = Game(random.Random(seed))
+        winner = game.play()
+        final_blow = NONE if game.final_blow is None else game.final_blow.template.card_id
+        scalar = (winner, game.turns, final_blow, [PRIZE_COUNT - len(p.prizes) for p in game.players],
+                  [p.knockouts for p in game.players])
+        batch = (int(games.winner[i]), int(games.turns[i]), int(games.final_blow[i]),
+                 games.prizes_taken[:, i].tolist(), games.knockouts[:, i].tolist())
+        if scalar != batch:
+            mismatches += 1
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate headless Pokémon TCG games in NumPy batches")
+    parser.add_argument("games", type=int, nargs="?", default=100000, help="number of games to play")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for reproducible runs")
+    parser.add_argument("--batch-size", type=int, default=50000, help="games played in lockstep")
+    parser.add_argument("--check", type=int, default=0, metavar="N",
+                        help="first replay N scalar deals and compare every game with the scalar engine")
+    args = parser.parse_args()
+
+    if args.check:
+        seeds = [simulator.game_seed(args.seed or 0, i) for i in range(args.check)]
+        mismatches = check(seeds)
+        print(f"Checked {args.check} games against the scalar engine: {mismatches} differ")
+
+    start = time.perf_counter()
+    results = simulator.simulate_batch(args.games, args.seed, args.batch_size)
+    simulator.print_results(results, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the Pokémon TCG engine's hot paths
+Reports ops/sec and can save a JSON baseline or fail on a regression against one
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from ascii_art import print_board, print_hand
+from deck import Deck
+from engine import Game
+from player import Player
+from pokemon_cards import CARD_IDS, CARD_TEMPLATES, Card, create_rock_deck
+
+MIN_RUN_TIME = 0.05  # Seconds a timed run should last, to keep timer noise low
+
+
+def _card(name):
+    return Card(CARD_TEMPLATES[CARD_IDS[name]])
+
+
+def _player(seed):
+    return Player("PLAYER", is_computer=True, rng=random.Random(seed))
+
+
+def _with_active(seed, hand_card):
+    """A player with a Geodude active and hand_card first in hand"""
+    player = _player(seed)
+    player.active_pokemon = _card("Geodude")
+    player.hand = [_card(hand_card)]
+    return player
+
+
+def _set_up_game(seed):
+    """A game after setup, at the start of the first player's turn"""
+    game = Game(random.Random(seed))
+    game.setup()
+    game.begin_turn()
+    return game
+
+
+# Every benchmark takes a count n and returns a function that performs the
+# operation n times. Anything done before returning it is not timed.
+
+def bench_create_rock_deck(n):
+    rng = random.Random(0)
+
+    def run():
+        for _ in range(n):
+            create_rock_deck(rng)
+    return run
+
+
+def bench_draw_card(n):
+    player = _player(0)
+    player.deck = Deck([_card("Rock")] * n)
+
+    def run():
+        for _ in range(n):
+            player.draw_card()
+    return run
+
+
+def bench_play_pokemon(n):
+    player = _player(0)
+    player.hand = [_card("Geodude") for _ in range(n)]
+
+    def run():
+        # Play from the end of the hand so every play pops the last card
+        for i in range(n - 1, -1, -1):
+            player.active_pokemon = None
+            player.play_pokemon(i, as_active=True)
+    return run
+
+
+def bench_play_energy(n):
+    player = _with_active(0, "Rock")
+    player.hand = [_card("Rock")] * n
+
+    def run():
+        for i in range(n - 1, -1, -1):
+            player.play_energy(i)
+    return run
+
+
+def bench_play_trainer(n):
+    player = _with_active(0, "Potion")
+    player.hand = [_card("Potion") for _ in range(n)]
+
+    def run():
+        for i in range(n - 1, -1, -1):
+            player.play_trainer(i)
+    return run
+
+
+def bench_attack(n):
+    attacker = _with_active(0, "Rock")
+    attacker.active_pokemon.attached_energy = 1
+    defender = _with_active(1, "Rock")
+    target = defender.active_pokemon
+
+    def run():
+        for _ in range(n):
+            target.damage_taken = 0  # Keep the defender from being knocked out
+            attacker.attack(defender)
+    return run
+
+
+def bench_make_computer_move(n):
+    games = [_set_up_game(i) for i in range(n)]
+
+    def run():
+        for game in games:
+            game.players[0].make_computer_move(game.players[1])
+    return run
+
+
+def bench_full_game(n):
+    def run():
+        for seed in range(n):
+            Game(random.Random(seed)).play()
+    return run
+
+
+def bench_full_game_logged(n):
+    """full_game with every game recorded to a game log, to compare against it"""
+    from gamelog import GameLog
+    log = GameLog(io.BytesIO())
+
+    def run():
+        for seed in range(n):
+            game = Game(random.Random(seed))
+            log.start(game, seed)
+            game.play()
+        log.flush()
+        log.file.seek(0)
+        log.file.truncate()
+    return run
+
+
+def bench_print_board(n):
+    games = [_set_up_game(i) for i in range(10)]
+    sink = io.StringIO()
+
+    def run():
+        with contextlib.redirect_stdout(sink):
+            for i in range(n):
+                game = games[i % 10]
+                print_board(game.players[0], game.players[1])
+                sink.seek(0)
+                sink.truncate()
+    return run
+
+
+def bench_print_hand(n):
+    hands = [_set_up_game(i).players[0].hand for i in range(10)]
+    sink = io.StringIO()
+
+    def run():
+        with contextlib.redirect_stdout(sink):
+            for i in range(n):
+                print_hand(hands[i % 10])
+                sink.seek(0)
+                sink.truncate()
+    return run
+
+
+def bench_redraw_board(n):
+    from renderer import BoardRenderer
+    game = _set_up_game(0)
+    game.finish_turn()
+    for _ in range(7):
+        game.play_turn()  # A board from mid-game, with benches out
+    player, computer = game.players
+    # As tall as the terminal running the benchmark (24 rows if it isn't one)
+    renderer = BoardRenderer(out=io.StringIO(), rows=shutil.get_terminal_size().lines)
+    renderer.draw(player, computer)
+    active = player.active_pokemon
+
+    def run():
+        # One small change per frame, as after a typical command
+        for i in range(n):
+            active.attached_energy = i & 1
+            renderer.draw(player, computer)
+            renderer.out.seek(0)
+            renderer.out.truncate()
+    return run
+
+
+def import_time(module):
+    """Return the seconds a new interpreter takes to import module, as python -X importtime reports it"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    # Lines are "import time: self [us] | cumulative | name", nested imports indented under the name
+    for line in reversed(result.stderr.splitlines()):
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2] == f" {module}":
+            return int(fields[1]) / 1e6
+    raise ValueError(f"No import time reported for {module}")
+
+
+def bench_import(module):
+    """A benchmark of importing module in a new interpreter, so startup regressions show up"""
+    def bench(n):
+        def run():
+            # Only the import is timed, not the interpreter starting up
+            return sum(import_time(module) for _ in range(n))
+        return run
+    return bench
+
+
+BENCHMARKS = {
+    "create_rock_deck": bench_create_rock_deck,
+    "draw_card": bench_draw_card,
+    "play_pokemon": bench_play_pokemon,
+    "play_energy": bench_play_energy,
+    "play_trainer": bench_play_trainer,
+    "attack": bench_attack,
+    "make_computer_move": bench_make_computer_move,
+    "full_game": bench_full_game,
+    "full_game_logged": bench_full_game_logged,
+    "print_board": bench_print_board,
+    "print_hand": bench_print_hand,
+    "redraw_board": bench_redraw_board,
+    "import_engine": bench_import("engine"),  # The headless rules core
+    "import_simulator": bench_import("simulator"),
+    "import_pokemon_tcg": bench_import("pokemon_tcg"),
+}
+
+
+def _time_run(bench, n):
+    run = bench(n)
+    gc_was_enabled = gc.isenabled()
+    gc.disable()  # As timeit does, so collections don't land in random runs
+    try:
+        start = time.perf_counter()
+        measured = run()
+        elapsed = time.perf_counter() - start
+        # A run can time itself, as the import benchmarks do
+        return measured if measured is not None else elapsed
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def run_benchmark(bench, repeat=5, warmup=1):
+    """Time one benchmark and return its ops/sec statistics"""
+    # Warm up, growing n until a run is long enough to time reliably
+    n = 10
+    elapsed = _time_run(bench, n)
+    while elapsed < MIN_RUN_TIME:
+        n *= 2 if elapsed <= 0 else min(10, max(2, int(MIN_RUN_TIME / elapsed) + 1))
+        elapsed = _time_run(bench, n)
+    for _ in range(warmup - 1):
+        _time_run(bench, n)
+
+    rates = [n / _time_run(bench, n) for _ in range(repeat)]
+    return {
+        "ops": n,
+        "repeat": repeat,
+        "ops_per_sec": statistics.median(rates),
+        "min_ops_per_sec": min(rates),
+        "max_ops_per_sec": max(rates),
+        "stdev_pct": statistics.stdev(rates) / statistics.mean(rates) * 100 if repeat > 1 else 0.0,
+    }
+
+
+def run_all(names, repeat=5, warmup=1):
+    """Run the named benchmarks, printing each result as it finishes"""
+    results = {}
+    print(f"{'benchmark':<20} {'ops/sec':>14} {'min':>14} {'max':>14} {'stdev':>7}")
+    for name in names:
+        result = run_benchmark(BENCHMARKS[name], repeat, warmup)
+        results[name] = result
+        print(f"{name:<20} {result['ops_per_sec']:>14,.0f} {result['min_ops_per_sec']:>14,.0f} "
+              f"{result['max_ops_per_sec']:>14,.0f} {result['stdev_pct']:>6.1f}%")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return the benchmarks that are more than threshold slower than baseline"""
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        expected = baseline[name]["ops_per_sec"]
+        if result["ops_per_sec"] < expected * (1 - threshold):
+            regressions.append((name, expected, result["ops_per_sec"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Pokémon TCG engine")
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs per benchmark")
+    parser.add_argument("--save", metavar="FILE", help="save the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="FILE", help="fail if slower than this JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="allowed slowdown against the baseline, as a fraction (default 0.10)")
+    args = parser.parse_args()
+
+    names = args.names or list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    results = run_all(names, repeat=args.repeat, warmup=max(1, args.warmup))
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "results": results,
+            }, f, indent=2)
+        print(f"\nSaved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nSlower than baseline by more than {args.threshold:.0%}:")
+            for name, expected, actual in regressions:
+                print(f"  {name}: {actual:,.0f} ops/sec (baseline {expected:,.0f}, "
+                      f"{actual / expected - 1:+.1%})")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+External card database for Pokémon TCG
+Loads card pools from JSON or CSV through a compiled binary cache that later starts read with mmap
+"""
+
+# Only what loading from the cache needs: parsing a source, generating a
+# pool and the command line import their modules where they use them
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from pokemon_cards import define_card
+
+# A cache file is a header, one record per card, then the card names and
+# descriptions as two UTF-8 blobs of NUL-separated strings. The header
+# holds the SHA-256 of the source it was compiled from, so a changed
+# source is compiled again rather than read stale.
+MAGIC = b"TCGC"
+VERSION = 1
+HEADER = struct.Struct("<4sH32sIII")  # Magic, version, source hash, cards, names bytes, descriptions bytes
+RECORD = struct.Struct("<BHHH")  # Card type, hp, damage, energy cost
+CACHE_SUFFIX = ".tcgc"
+
+CARD_TYPES = ("pokemon", "energy", "trainer")  # Indexed by a record's card type
+TYPE_CODES = {card_type: code for code, card_type in enumerate(CARD_TYPES)}
+FIELDS = ("name", "card_type", "hp", "damage", "energy_cost", "description")
+
+
+def _row(fields, where):
+    """Check one source card and return it as a (name, type code, hp, damage, energy cost, description) tuple"""
+    try:
+        name = fields["name"]
+        code = TYPE_CODES[fields["card_type"]]
+        numbers = [int(fields.get(field) or 0) for field in ("hp", "damage", "energy_cost")]
+    except KeyError as e:
+        raise ValueError(f"{where}: missing or unknown {e}") from None
+    if not name or "\0" in name:
+        raise ValueError(f"{where}: bad card name {name!r}")
+    if not all(0 <= number <= 0xFFFF for number in numbers):
+        raise ValueError(f"{where}: hp, damage and energy_cost must be 0-65535")
+    return (name, code, *numbers, (fields.get("description") or "").replace("\0", ""))
+
+
+def parse_source(data, path):
+    """Return the cards of a JSON or CSV source (chosen by path's extension) as row tuples
+
+    JSON is a list of objects (or an object with a "cards" list) and CSV
+    has a header row; either way, the fields are those of FIELDS, with
+    hp, damage, energy_cost and description optional.
+    """
+    if path.lower().endswith(".csv"):
+        import csv
+        import io
+        cards = csv.DictReader(io.StringIO(data.decode("utf-8-sig")))
+    else:
+        import json
+        cards = json.loads(data)
+        if isinstance(cards, dict):
+            cards = cards["cards"]
+    return [_row(fields, f"{path} card {number}") for number, fields in enumerate(cards, 1)]
+
+
+def write_cache(path, rows, digest):
+    """Compile rows into a cache file, replacing it atomically"""
+    names = "\0".join(row[0] for row in rows).encode()
+    descriptions = "\0".join(row[5] for row in rows).encode()
+    records = b"".join(RECORD.pack(*row[1:5]) for row in rows)
+    temp = f"{path}.{os.getpid()}.tmp"
+    with open(temp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, digest, len(rows), len(names), len(descriptions)))
+        f.write(records)
+        f.write(names)
+        f.write(descriptions)
+    os.replace(temp, path)
+
+
+def read_cache(path, digest):
+    """Return the rows of a cache file compiled from a source with this digest, or None if it isn't one"""
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    with f:
+        if os.fstat(f.fileno()).st_size < HEADER.size:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            magic, version, cached, count, names_size, descriptions_size = HEADER.unpack_from(m)
+            if magic != MAGIC or version != VERSION or cached != digest:
+                return None
+            start = HEADER.size + count * RECORD.size
+            if len(m) != start + names_size + descriptions_size:
+                return None
+            records = list(RECORD.iter_unpack(m[HEADER.size:start]))
+            names = m[start:start + names_size].decode().split("\0") if count else []
+            descriptions = m[start + names_size:len(m)].decode().split("\0") if count else []
+    return [(name, *record, description) for name, record, description in zip(names, records, descriptions)]
+
+
+def load_cards(path, cache_path=None):
+    """Load the card pool in path and return its templates, defining any cards not yet defined
+
+    The pool is read from its cache file (path with CACHE_SUFFIX added,
+    unless cache_path is given) when the cache was compiled from the same
+    source bytes, and compiled into it otherwise. Loaded cards are interned like
+    the built-in ones, so every copy is referred to by its card_id, and
+    card types are the same string objects the rules compare against.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha256(data).digest()
+    if cache_path is None:
+        cache_path = path + CACHE_SUFFIX
+    rows = read_cache(cache_path, digest)
+    if rows is None:
+        rows = parse_source(data, path)
+        write_cache(cache_path, rows, digest)
+    types = CARD_TYPES
+    return [define_card(name, types[code], hp, damage, cost, description)
+            for name, code, hp, damage, cost, description in rows]
+
+
+def generate_pool(count, seed=None):
+    """Return a random pool of count cards as source objects, for timing loads"""
+    import random
+    rng = random.Random(seed)
+    cards = []
+    for number in range(count):
+        card_type = rng.choices(CARD_TYPES, weights=(6, 1, 3))[0]
+        card = {"name": f"Generated {card_type.title()} {number}", "card_type": card_type,
+                "description": f"Generated card number {number}"}
+        if card_type == "pokemon":
+            cost = rng.randint(0, 4)
+            card.update(hp=rng.randrange(40, 160, 10), damage=rng.randrange(10, 100, 10), energy_cost=cost)
+        cards.append(card)
+    return cards
+
+
+def _timed_load(path):
+    """Import card_db and load path in a new interpreter and return the seconds both took there"""
+    import subprocess
+    code = ("import time; start = time.perf_counter(); import card_db; card_db.load_cards(%r); "
+            "print(time.perf_counter() - start)" % os.path.abspath(path))
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    return float(output.stdout)
+
+
+def main():
+    import argparse
+    import time
+    parser = argparse.ArgumentParser(description="Compile and load an external card pool")
+    parser.add_argument("path", help="card pool as a .json or .csv file")
+    parser.add_argument("--generate", type=int, default=0, metavar="N",
+                        help="first write a random pool of N cards to path")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for the generated pool")
+    args = parser.parse_args()
+
+    if args.generate:
+        cards = generate_pool(args.generate, args.seed)
+        with open(args.path, "w", newline="") as f:
+            if args.path.lower().endswith(".csv"):
+                import csv
+                writer = csv.DictWriter(f, FIELDS)
+                writer.writeheader()
+                writer.writerows(cards)
+            else:
+                import json
+                json.dump(cards, f)
+
+    start = time.perf_counter()
+    templates = load_cards(args.path)
+    first = time.perf_counter() - start
+    counts = {card_type: 0 for card_type in CARD_TYPES}
+    for template in templates:
+        counts[template.card_type] += 1
+    print(f"{len(templates):,} cards ({', '.join(f'{n:,} {t}' for t, n in counts.items())}), "
+          f"card_ids {templates[0].card_id}-{templates[-1].card_id}" if templates else "No cards")
+    print(f"First load:              {first * 1e3:8.1f} ms")
+    print(f"Cold start, from cache:  {_timed_load(args.path) * 1e3:8.1f} ms (importing card_db included)")
+
+
+if __name__ == "__main__":
+    main()
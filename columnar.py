@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Columnar export of simulation results for Pokémon TCG
+Streams per-game and per-turn rows into chunked .npy files and memory-maps them back for analysis
+
+An export is a directory holding one subdirectory per table (games and
+turns). Each table is split into chunks of about chunk_rows rows (a
+chunk always ends with a whole game), and each chunk is a directory with
+one .npy file per column. Chunks are
+named after the first game of the range that wrote them and their
+number within it, so sorting the names puts the rows in game order.
+meta.json is written last and describes the columns.
+
+Files are written and read with the standard library alone. They are
+ordinary .npy files, so numpy.load(path, mmap_mode="r") opens any of
+them, and numpy.asarray() turns the chunk views below into arrays
+without copying.
+"""
+
+import argparse
+import ast
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections import Counter
+from itertools import chain, compress
+from player import PRIZE_COUNT
+from pokemon_cards import CARD_TEMPLATES
+
+NONE = 0xFFFF  # card_id column value for no card
+CHUNK_ROWS = 1 << 16
+META = "meta.json"
+
+# Per-table columns: (name, array typecode, shape of each cell). Cells
+# with a shape are given flat, seat 0 first.
+def game_columns(card_count):
+    """The games table's columns, for an export whose decks can hold card_ids below card_count"""
+    return (
+        ("game", "Q", ()),  # Index of the game; its seed is simulator.game_seed(seed, game)
+        ("winner", "B", ()),
+        ("turns", "H", ()),
+        ("prizes_taken", "B", (2,)),
+        ("knockouts", "B", (2,)),  # Pokémon each seat knocked out
+        ("final_blow", "H", ()),  # card_id of the Pokémon whose attack won, or NONE (deck out)
+        ("deck", "B", (2, card_count)),  # Copies of each card_id in each seat's deck
+    )
+
+# One row per turn, describing the seat that played it once the turn is over
+TURN_COLUMNS = (
+    ("game", "Q", ()),
+    ("turn", "H", ()),
+    ("seat", "B", ()),
+    ("hand", "B", ()),
+    ("deck", "B", ()),
+    ("bench", "B", ()),
+    ("prizes_left", "B", ()),
+    ("active", "H", ()),  # card_id, or NONE
+    ("active_damage", "H", ()),
+    ("active_energy", "B", ()),
+    ("knockouts", "B", ()),  # So far in the game
+)
+TABLES = ("games", "turns")
+
+
+def export_columns(card_count):
+    """Every table's columns (see game_columns), by table name"""
+    return {"games": game_columns(card_count), "turns": TURN_COLUMNS}
+
+NPY_MAGIC = b"\x93NUMPY"
+DESCRS = {"B": "|u1", "H": "<u2", "I": "<u4", "Q": "<u8"}
+TYPECODES = {descr: typecode for typecode, descr in DESCRS.items()}
+
+
+def write_npy(path, data, shape):
+    """Write an array.array as a little-endian .npy file of the given shape"""
+    header = "{'descr': %r, 'fortran_order': False, 'shape': %r, }" % (DESCRS[data.typecode], shape)
+    # numpy pads the header with spaces so the data starts on a 64-byte boundary
+    header += " " * (-(len(NPY_MAGIC) + 4 + len(header) + 1) % 64) + "\n"
+    if sys.byteorder != "little" and data.itemsize > 1:
+        data = array(data.typecode, data)
+        data.byteswap()
+    with open(path, "wb") as f:
+        f.write(NPY_MAGIC + b"\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin1"))
+        f.write(data.tobytes())
+
+
+def read_npy(path):
+    """Memory-map a .npy file written by write_npy, returning a memoryview of its shape"""
+    with open(path, "rb") as f:
+        prefix = f.read(10)
+        if prefix[:6] != NPY_MAGIC or prefix[6] != 1:
+            raise ValueError(f"{path} is not a version 1 .npy file")
+        header_len, = struct.unpack("<H", prefix[8:10])
+        header = ast.literal_eval(f.read(header_len).decode("latin1"))
+        typecode = TYPECODES[header["descr"]]
+        shape = header["shape"]
+        offset = 10 + header_len
+        if sys.byteorder != "little" and typecode != "B":
+            # Mapped data would be in the wrong byte order; read a swapped copy
+            data = array(typecode, f.read())
+            data.byteswap()
+            view = memoryview(data)
+        else:
+            view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))[offset:]
+    view = view.cast("B")
+    return view.cast(typecode, shape) if len(shape) > 1 else view.cast(typecode)
+
+
+class ChunkWriter:
+    """Buffers the rows of one table and writes them out a chunk at a time
+
+    Rows are tuples in column order; call flush() once enough have been
+    added (see full) and at the end.
+    """
+
+    def __init__(self, directory, columns, part, chunk_rows=CHUNK_ROWS):
+        self.directory = directory
+        self.columns = columns
+        self.part = part
+        self.chunk_rows = chunk_rows
+        self.rows = []
+        self.chunks = 0
+
+    @property
+    def full(self):
+        return len(self.rows) >= self.chunk_rows
+
+    def flush(self):
+        """Write the buffered rows as the next chunk"""
+        if not self.rows:
+            return
+        path = os.path.join(self.directory, f"{self.part:012d}-{self.chunks:04d}")
+        os.mkdir(path)
+        for (name, typecode, cell), values in zip(self.columns, zip(*self.rows)):
+            if cell:
+                values = chain.from_iterable(values)
+            write_npy(os.path.join(path, name + ".npy"), array(typecode, values), (len(self.rows),) + cell)
+        self.rows.clear()
+        self.chunks += 1
+
+
+def deck_counts(player, card_count):
+    """Return a list of how many copies of each card_id below card_count the player's deck holds"""
+    counts = [0] * card_count
+    for card in player.deck:
+        card_id = card.template.card_id
+        if card_id >= card_count:
+            raise ValueError(f"{card.name} was defined after the export was created")
+        counts[card_id] += 1
+    return counts
+
+
+class SimulationExport:
+    """Records simulated games into an export directory made by create_export
+
+    first_game, the index of the first game this export records, names
+    its chunks; parallel workers each use their own. card_count is the
+    number create_export returned, so every chunk's deck cells have the
+    shape meta.json gives them.
+    """
+
+    def __init__(self, directory, first_game, card_count, chunk_rows=CHUNK_ROWS):
+        self.card_count = card_count
+        self.games = ChunkWriter(os.path.join(directory, "games"), game_columns(card_count), first_game,
+                                 chunk_rows)
+        self.turns = ChunkWriter(os.path.join(directory, "turns"), TURN_COLUMNS, first_game, chunk_rows)
+        self._game = 0
+        self._add_turn = self.turns.rows.append
+
+    def play(self, game, index):
+        """Play game (number index), recording every turn and the result; returns the winner"""
+        decks = deck_counts(game.players[0], self.card_count) + deck_counts(game.players[1], self.card_count)
+        self._game = index
+        winner = game.play(self._turn)
+
+        players = game.players
+        self.games.rows.append((
+            index, winner, game.turns,
+            [PRIZE_COUNT - len(p.prizes) for p in players],
+            [p.knockouts for p in players],
+            NONE if game.final_blow is None else game.final_blow.template.card_id,
+            decks,
+        ))
+        if self.games.full:
+            self.games.flush()
+        if self.turns.full:
+            self.turns.flush()
+        return winner
+
+    def _turn(self, game):
+        seat = (game.turns - 1) & 1  # Seats alternate, seat 0 first
+        player = game.players[seat]
+        active = player.active_pokemon
+        if active is None:
+            active_id, damage, energy = NONE, 0, 0
+        else:
+            active_id, damage, energy = active.template.card_id, active.damage_taken, active.attached_energy
+        self._add_turn((
+            self._game, game.turns, seat, len(player.hand), len(player.deck), len(player.bench),
+            len(player.prizes), active_id, damage, energy, player.knockouts,
+        ))
+
+    def close(self):
+        self.games.flush()
+        self.turns.flush()
+
+
+def create_export(directory):
+    """Create the directories of a new export; fails if directory already holds one
+
+    Returns the export's card count: its deck columns count the copies of
+    every card defined now, even if more are loaded while it is written.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for table in TABLES:
+        os.mkdir(os.path.join(directory, table))
+    return len(CARD_TEMPLATES)
+
+
+def finish_export(directory, seed, games, card_count):
+    """Write meta.json, marking the export complete"""
+    meta = {
+        "seed": seed,
+        "games": games,
+        "tables": {table: [[name, DESCRS[typecode], list(cell)] for name, typecode, cell in columns]
+                   for table, columns in export_columns(card_count).items()},
+    }
+    with open(os.path.join(directory, META), "w") as f:
+        json.dump(meta, f, indent=1)
+
+
+class Table:
+    """One table of an export, read a chunk at a time through memory maps"""
+
+    def __init__(self, directory, columns):
+        self.directory = directory
+        self.columns = {name: (TYPECODES[descr], tuple(cell)) for name, descr, cell in columns}
+        self.chunk_names = sorted(os.listdir(directory))
+
+    def chunks(self, column):
+        """Yield a memoryview of column for every chunk, in row order"""
+        if column not in self.columns:
+            raise KeyError(f"No column {column!r}; columns are {', '.join(self.columns)}")
+        for name in self.chunk_names:
+            yield read_npy(os.path.join(self.directory, name, column + ".npy"))
+
+    def column(self, column):
+        """Return the whole column as one flat array.array (a copy)"""
+        values = array(self.columns[column][0])
+        for chunk in self.chunks(column):
+            values.frombytes(chunk.tobytes())
+        return values
+
+    def __len__(self):
+        first = next(iter(self.columns))
+        return sum(len(chunk) for chunk in self.chunks(first))
+
+
+def load(directory):
+    """Open a finished export, returning (meta, {table name: Table})"""
+    path = os.path.join(directory, META)
+    if not os.path.exists(path):
+        raise ValueError(f"{directory} is not a finished export (no {META})")
+    with open(path) as f:
+        meta = json.load(f)
+    tables = {name: Table(os.path.join(directory, name), columns) for name, columns in meta["tables"].items()}
+    return meta, tables
+
+
+def summarize(tables):
+    """Aggregate an export chunk by chunk, so memory use stays bounded"""
+    games = tables["games"]
+    turns = tables["turns"]
+    n_games = 0
+    wins = [0, 0]
+    total_turns = 0
+    prizes = [0, 0]
+    knockouts = [0, 0]
+    final_blows = Counter()
+    for winner, length, taken, knocked, blow in zip(
+            games.chunks("winner"), games.chunks("turns"), games.chunks("prizes_taken"),
+            games.chunks("knockouts"), games.chunks("final_blow")):
+        n_games += len(winner)
+        raw = winner.tobytes()
+        for seat in range(2):
+            wins[seat] += raw.count(seat)
+            prizes[seat] += sum(taken.cast("B")[seat::2])
+            knockouts[seat] += sum(knocked.cast("B")[seat::2])
+        total_turns += sum(length)
+        final_blows.update(blow)
+
+    seat_turns = [0, 0]
+    hand = [0, 0]
+    bench = [0, 0]
+    for seat_view, hand_view, bench_view in zip(turns.chunks("seat"), turns.chunks("hand"), turns.chunks("bench")):
+        seat_1 = seat_view.tobytes().count(1)
+        seat_turns[0] += len(seat_view) - seat_1
+        seat_turns[1] += seat_1
+        # Seat is 0 or 1, so it doubles as a selector for seat 1's rows
+        for totals, view in ((hand, hand_view), (bench, bench_view)):
+            seat_1 = sum(compress(view, seat_view))
+            totals[0] += sum(view) - seat_1
+            totals[1] += seat_1
+    n_turns = sum(seat_turns)
+
+    return {
+        "games": n_games,
+        "wins": wins,
+        "avg_turns": total_turns / n_games if n_games else 0.0,
+        "avg_prizes_taken": [p / n_games if n_games else 0.0 for p in prizes],
+        "avg_knockouts": [k / n_games if n_games else 0.0 for k in knockouts],
+        "final_blows": final_blows,
+        "turn_rows": n_turns,
+        "avg_hand": [hand[s] / seat_turns[s] if seat_turns[s] else 0.0 for s in range(2)],
+        "avg_bench": [bench[s] / seat_turns[s] if seat_turns[s] else 0.0 for s in range(2)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a columnar export from simulator.py --export")
+    parser.add_argument("export", help="export directory")
+    parser.add_argument("--top", type=int, default=5, help="final-blow cards to list")
+    args = parser.parse_args()
+
+    meta, tables = load(args.export)
+    s = summarize(tables)
+    n = s["games"]
+    print(f"Games:          {n:,} (seed {meta['seed']}), {s['turn_rows']:,} turn rows")
+    print(f"Wins:           {s['wins'][0]:,} / {s['wins'][1]:,} "
+          f"({s['wins'][0] / n if n else 0:.1%} / {s['wins'][1] / n if n else 0:.1%})")
+    print(f"Game length:    {s['avg_turns']:.2f} turns on average")
+    print(f"Prizes taken:   {s['avg_prizes_taken'][0]:.2f} / {s['avg_prizes_taken'][1]:.2f} on average")
+    print(f"Knockouts:      {s['avg_knockouts'][0]:.2f} / {s['avg_knockouts'][1]:.2f} on average")
+    print(f"End of turn:    hand {s['avg_hand'][0]:.2f} / {s['avg_hand'][1]:.2f}, "
+          f"bench {s['avg_bench'][0]:.2f} / {s['avg_bench'][1]:.2f} on average")
+    print("Final blows:")
+    for card_id, count in s["final_blows"].most_common(args.top):
+        name = "(deck out)" if card_id == NONE else CARD_TEMPLATES[card_id].name
+        print(f"  {name:<16} {count:>10,}  {count / n:.1%}")
+
+
+if __name__ == "__main__":
+    main()
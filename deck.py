@@ -0,0 +1,65 @@
+"""
+Deck type for Pokémon TCG game
+A pile of cards (deck or prize cards) with O(1) draws from the top
+"""
+
+class Deck:
+    def __init__(self, cards=()):
+        # Stored bottom-first so the top card is at the end of the list
+        # and drawing is a list.pop() rather than a list.pop(0)
+        self._cards = list(cards)
+        self._cards.reverse()
+
+    def __len__(self):
+        return len(self._cards)
+
+    def __iter__(self):
+        """Iterate over the cards from the top of the deck down"""
+        return reversed(self._cards)
+
+    def draw(self):
+        """Remove and return the top card, or None if the deck is empty"""
+        if not self._cards:
+            return None
+        return self._cards.pop()
+
+    def draw_n(self, n):
+        """Remove and return up to n cards from the top, top card first"""
+        if n <= 0:
+            return []
+        cards = self._cards[-n:]
+        del self._cards[-n:]
+        cards.reverse()
+        return cards
+
+    def peek(self):
+        """Return the top card without drawing it, or None if the deck is empty"""
+        if not self._cards:
+            return None
+        return self._cards[-1]
+
+    def replace(self, cards):
+        """Replace every card in the deck with cards, top card first, keeping this Deck object"""
+        self._cards[:] = cards
+        self._cards.reverse()
+
+    def put_top(self, card):
+        """Place a card on top of the deck"""
+        self._cards.append(card)
+
+    def extend(self, cards):
+        """Place cards on the bottom of the deck, keeping their order"""
+        cards = list(cards)
+        cards.reverse()
+        self._cards[:0] = cards
+
+    def shuffle(self, rng):
+        """Shuffle the deck in place using rng (a random.Random or the random module)"""
+        rng.shuffle(self._cards)
+
+    def search(self, predicate):
+        """Remove and return the first card from the top that matches predicate"""
+        for i in range(len(self._cards) - 1, -1, -1):
+            if predicate(self._cards[i]):
+                return self._cards.pop(i)
+        return None
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Deck-building optimizer for Pokémon TCG
+Searches the card pool for deck lists that beat a reference deck in simulated computer-vs-computer games
+"""
+
+import argparse
+import math
+import os
+import random
+import time
+from engine import Game
+from pokemon_cards import CARD_TEMPLATES, ROCK_DECK_LIST
+from simulator import game_seed
+
+MAX_COPIES = 4  # Copies allowed of any card but energy
+
+
+def to_counts(deck_list):
+    """Return a deck list as copies per card_id, the form decks are searched and cached in"""
+    counts = [0] * len(CARD_TEMPLATES)
+    for template in deck_list:
+        counts[template.card_id] += 1
+    return tuple(counts)
+
+
+def to_deck_list(counts):
+    """Return the card templates of a deck given as copies per card_id"""
+    return [CARD_TEMPLATES[card_id] for card_id, copies in enumerate(counts) for _ in range(copies)]
+
+
+def describe(counts):
+    """Return a deck's cards as one line, most copies first"""
+    cards = sorted((-copies, CARD_TEMPLATES[card_id].name) for card_id, copies in enumerate(counts) if copies)
+    return ", ".join(f"{-copies} {name}" for copies, name in cards)
+
+
+def play_matches(candidate, reference, seed, start, stop):
+    """Play games start..stop-1 of candidate against reference; returns the candidate's wins
+
+    The candidate takes the first seat in even-numbered games and the
+    second in odd ones, so the first player's advantage cancels out.
+    Game index i is seeded the same way for every candidate, so
+    candidates are compared on the same shuffles where they can be.
+    """
+    decks = (to_deck_list(candidate), to_deck_list(reference))
+    wins = 0
+    for index in range(start, stop):
+        seat = index & 1
+        game = Game(random.Random(game_seed(seed, index)), decks=decks if seat == 0 else decks[::-1])
+        if game.play() == seat:
+            wins += 1
+    return wins
+
+
+class Score:
+    """A deck's results against the reference deck so far"""
+
+    def __init__(self):
+        self.wins = 0
+        self.games = 0
+        self.dropped = False  # Stopped early as clearly worse than the best deck
+
+    @property
+    def win_rate(self):
+        return self.wins / self.games if self.games else 0.0
+
+
+class DeckOptimizer:
+    """Local search over deck lists, scored by simulated win rate against a reference deck
+
+    Candidates are mutations of the best decks found so far that keep the
+    deck size and copy limits and hold at least one basic Pokémon (without
+    one a hand could never be dealt). Scores are cached by deck list, so
+    a deck the search proposes again costs nothing. Each new candidate
+    plays rounds of games, all candidates of a generation at once across
+    the worker processes. After each round a sequential probability ratio
+    test drops every candidate that is clearly worse than the best deck so
+    far, so most poor decks are only played for a round or two; the rest
+    play max_games.
+    """
+
+    def __init__(self, reference=ROCK_DECK_LIST, seed=None, deck_size=None, max_copies=MAX_COPIES,
+                 max_games=400, round_games=50, margin=0.05, alpha=0.05, beta=0.05):
+        self.reference = to_counts(reference)
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.deck_size = deck_size if deck_size is not None else len(reference)
+        self.max_copies = max_copies
+        self.max_games = max_games
+        self.round_games = round_games
+        self.margin = margin  # Win rate difference that counts as clearly worse
+        # Dropping a deck that is margin worse than the best is accepted once the
+        # test's log-likelihood ratio reaches this bound
+        self.drop_bound = math.log((1 - beta) / alpha)
+        self.scores = {}  # Deck counts -> Score
+        self.cache_hits = 0
+        self.games_played = 0
+
+    def allowed(self, counts):
+        """Check a deck against the size and copy limits"""
+        if sum(counts) != self.deck_size:
+            return False
+        has_basic = False
+        for card_id, copies in enumerate(counts):
+            template = CARD_TEMPLATES[card_id]
+            if copies > self.max_copies and template.card_type != "energy":
+                return False
+            if copies and template.card_type == "pokemon" and template.energy_cost <= 1:
+                has_basic = True
+        return has_basic
+
+    def mutate(self, counts, rng):
+        """Return counts with one to three cards swapped for others, within the limits"""
+        counts = list(counts)
+        card_ids = range(len(counts))
+        for _ in range(rng.randint(1, 3)):
+            for _ in range(100):
+                out = rng.choices(card_ids, weights=counts)[0]
+                into = rng.choice(card_ids)
+                if into == out:
+                    continue
+                counts[out] -= 1
+                counts[into] += 1
+                if self.allowed(counts):
+                    break
+                counts[out] += 1
+                counts[into] -= 1
+        return tuple(counts)
+
+    def ranking(self):
+        """Return (counts, score) of every fully played deck, best first"""
+        played = [(counts, score) for counts, score in self.scores.items() if not score.dropped]
+        return sorted(played, key=lambda item: item[1].win_rate, reverse=True)
+
+    def best(self):
+        """Return (counts, score) of the best deck found so far"""
+        ranking = self.ranking()
+        return ranking[0] if ranking else (None, None)
+
+    def clearly_worse(self, score, target):
+        """Sequential test of whether a deck's win rate is margin below target"""
+        worse = min(max(target - self.margin, 0.01), 0.98)
+        same = worse + self.margin
+        losses = score.games - score.wins
+        llr = score.wins * math.log(worse / same) + losses * math.log((1 - worse) / (1 - same))
+        return llr >= self.drop_bound
+
+    def evaluate(self, candidates, map_fn=map):
+        """Score every candidate not already scored; map_fn runs the game rounds"""
+        todo = []
+        for counts in candidates:
+            if counts in self.scores:
+                self.cache_hits += 1
+            else:
+                self.scores[counts] = Score()
+                todo.append(counts)
+
+        _, best = self.best()
+        target = best.win_rate if best is not None else 0.5
+        start = 0
+        while todo and start < self.max_games:
+            stop = min(start + self.round_games, self.max_games)
+            n = len(todo)
+            wins = map_fn(play_matches, todo, [self.reference] * n, [self.seed] * n, [start] * n, [stop] * n)
+            for counts, won in zip(todo, wins):
+                score = self.scores[counts]
+                score.wins += won
+                score.games += stop - start
+            self.games_played += n * (stop - start)
+            start = stop
+            if start < self.max_games:
+                for counts in todo:
+                    if self.clearly_worse(self.scores[counts], target):
+                        self.scores[counts].dropped = True
+                todo = [counts for counts in todo if not self.scores[counts].dropped]
+
+    def run(self, generations, population=16, parents=4, rng=None, map_fn=map):
+        """Search for generations, yielding (generation, candidates, dropped) after each"""
+        rng = rng if rng is not None else random.Random(self.seed)
+        self.evaluate([self.reference], map_fn)
+        for generation in range(1, generations + 1):
+            best = [counts for counts, _ in self.ranking()[:parents]]
+            candidates = list(dict.fromkeys(self.mutate(rng.choice(best), rng) for _ in range(population)))
+            new = [counts for counts in candidates if counts not in self.scores]
+            self.evaluate(candidates, map_fn)
+            yield generation, len(candidates), sum(1 for counts in new if self.scores[counts].dropped)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search for deck lists that beat the rock deck")
+    parser.add_argument("--generations", type=int, default=10, help="rounds of mutation and selection")
+    parser.add_argument("--population", type=int, default=16, help="candidate decks per generation")
+    parser.add_argument("--parents", type=int, default=4, help="best decks that candidates are mutated from")
+    parser.add_argument("--max-games", type=int, default=400, help="games played by a deck that is not dropped")
+    parser.add_argument("--round-games", type=int, default=50, help="games between early-stopping tests")
+    parser.add_argument("--max-copies", type=int, default=MAX_COPIES, help="copies allowed of a non-energy card")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for reproducible runs")
+    parser.add_argument("--cards", metavar="FILE", default=None,
+                        help="also search the card pool in FILE (.json or .csv, see card_db.py)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes to use (0 for one per core)")
+    args = parser.parse_args()
+
+    if args.cards:
+        from card_db import load_cards
+        load_cards(args.cards)
+    optimizer = DeckOptimizer(seed=args.seed, max_copies=args.max_copies, max_games=args.max_games,
+                              round_games=args.round_games)
+    workers = args.workers or os.cpu_count() or 1
+    # Workers load the pool too, in the same order, so its cards get the same card_ids there
+    pool = {"initializer": load_cards, "initargs": (args.cards,)} if args.cards else {}
+    executor = None
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(max_workers=workers, **pool)
+    map_fn = executor.map if executor is not None else map
+
+    start = time.perf_counter()
+    try:
+        for generation, candidates, dropped in optimizer.run(args.generations, args.population, args.parents,
+                                                             map_fn=map_fn):
+            counts, score = optimizer.best()
+            print(f"Generation {generation}: {candidates} decks, {dropped} dropped early; "
+                  f"best {score.win_rate:.1%} over {score.games} games")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    elapsed = time.perf_counter() - start
+
+    counts, score = optimizer.best()
+    reference = optimizer.scores[optimizer.reference]
+    print(f"\nBest deck ({score.win_rate:.1%} against the rock deck, which scores "
+          f"{reference.win_rate:.1%} against itself):")
+    print(f"  {describe(counts)}")
+    full = len(optimizer.scores) * optimizer.max_games
+    print(f"Decks scored:   {len(optimizer.scores)} ({optimizer.cache_hits} repeats answered from the cache)")
+    print(f"Games played:   {optimizer.games_played:,} of {full:,} without early stopping "
+          f"({optimizer.games_played / elapsed:,.0f} games/sec)")
+
+
+if __name__ == "__main__":
+    main()
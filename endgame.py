@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Endgame solver for Pokémon TCG
+Plays small late-game positions perfectly with memoized expectimax over the cards left to draw
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import struct
+import time
+from array import array
+from collections import Counter
+from math import comb
+from actions import ATTACH_ENERGY, ATTACK, END_TURN, PLAY_ACTIVE, PLAY_BENCH, PLAY_TRAINER, \
+    apply, legal_actions, perform, undo
+from engine import Game
+from pokemon_cards import CARD_TEMPLATES
+from state import decode_game, encode_game
+from trainers import TRAINER_EFFECTS
+
+DEFAULT_MAX_SIZE = 12  # Largest state_size solved by default, in under a second with an empty table
+
+# Actions that never draw a card, so have no chance outcome
+_NO_DRAWS = (PLAY_ACTIVE, PLAY_BENCH, ATTACH_ENERGY)
+
+# A tablebase file is a header followed by one entry per solved position:
+# the first player's win probability and the length of the position's key,
+# then the key itself (see position_key). The header holds a digest of the
+# card definitions, so a tablebase solved for other cards is never reused.
+MAGIC = b"TCGT"
+VERSION = 1
+HEADER = struct.Struct("<4sH32sI")  # Magic, version, card digest, entries
+ENTRY = struct.Struct("<dH")  # First player's win probability, key bytes
+NONE = 0xFFFF  # card_id of an empty active spot
+
+
+def state_size(game):
+    """Cards both players have yet to play: their decks, prize cards and hands"""
+    return sum(len(player.deck) + len(player.prizes) + len(player.hand) for player in game.players)
+
+
+def position_key(game):
+    """Return bytes naming game's position up to what can't change its outcome
+
+    Deck and prize cards are kept together as one multiset of unseen cards
+    (plus the deck's size), since nobody knows their order. Hands are
+    multisets too, and of the discard pile only the energy is kept, in
+    order, since nothing else ever comes back from it.
+    """
+    values = [game.current]
+    for player in game.players:
+        active = player.active_pokemon
+        if active is None:
+            values += (player.can_attack, NONE, 0, 0)
+        else:
+            values += (player.can_attack, active.template.card_id, active.damage_taken, active.attached_energy)
+        values.append(len(player.bench))
+        for card in player.bench:
+            values += (card.template.card_id, card.damage_taken, card.attached_energy)
+        hand = [card.template.card_id for card in player.hand]
+        hand.sort()
+        energy = [card.template.card_id for card in player.discard if card.card_type == "energy"]
+        unseen = [card.template.card_id for card in player.deck]
+        unseen += [card.template.card_id for card in player.prizes]
+        unseen.sort()
+        values += (len(hand), *hand, len(energy), *energy, len(player.deck), len(unseen), *unseen)
+    return array("H", values).tobytes()
+
+
+def card_digest():
+    """Digest of every card definition and trainer effect a tablebase's values depend on"""
+    cards = []
+    for template in CARD_TEMPLATES:
+        effect = TRAINER_EFFECTS.get(template.card_id)
+        cards.append((tuple(template[:6]), effect and (effect.effect.__name__, effect.draws)))
+    return hashlib.sha256(repr(cards).encode()).digest()
+
+
+def _unseen(player):
+    return list(player.deck) + list(player.prizes)
+
+
+def _draws(pool, count):
+    """Every multiset of count cards drawn from pool (card_id -> copies), with its probability"""
+    card_ids = sorted(pool)
+    total = comb(sum(pool.values()), count)
+    outcomes = []
+
+    def split(i, left, drawn, ways):
+        if not left:
+            outcomes.append((drawn, ways / total))
+            return
+        if i == len(card_ids):
+            return
+        copies = pool[card_ids[i]]
+        for k in range(min(left, copies), -1, -1):
+            split(i + 1, left - k, drawn + (card_ids[i],) * k, ways * comb(copies, k))
+
+    split(0, count, (), 1)
+    return outcomes
+
+
+def _arrange(player, drawn, prizes):
+    """Put cards with the card_ids in drawn on top of player's deck (or prize cards), as a draw outcome"""
+    unseen = _unseen(player)
+    top = []
+    for card_id in drawn:
+        for i, card in enumerate(unseen):
+            if card.template.card_id == card_id:
+                top.append(unseen.pop(i))
+                break
+    if prizes:
+        rest = len(player.prizes) - len(top)
+        player.prizes.replace(top + unseen[:rest])
+        player.deck.replace(unseen[rest:])
+    else:
+        rest = len(player.deck) - len(top)
+        player.deck.replace(top + unseen[:rest])
+        player.prizes.replace(unseen[rest:])
+
+
+class EndgameSolver:
+    """Exact expectimax search of positions with at most max_size cards left to play
+
+    Both players are assumed to play perfectly, and both hands are taken
+    as known; the only chance is in the order of the decks and prize
+    cards, which no one has seen. So every card drawn (at the start of a
+    turn, by a trainer such as Professor's Research, or as a prize after a
+    knockout) is dealt by chance from that player's unseen cards. Every
+    position searched is stored in table, keyed by position_key, as the
+    first player's chance of winning; the table lasts across games and
+    can be kept on disk as a tablebase with save() and load().
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, tablebase=None):
+        self.max_size = max_size
+        self.tablebase = tablebase  # Path the table is loaded from and saved to, if any
+        self.table = {}  # position_key -> the first player's win probability
+        self.loaded = 0  # Positions read from the tablebase file
+        self.searched = 0  # Positions solved by search
+        self.hits = 0  # Positions found in the table during a search
+        self.value = None  # Win probability of the player to move at the last position chosen for
+        if tablebase is not None and os.path.exists(tablebase):
+            self.load(tablebase)
+
+    def load(self, path):
+        """Add the positions in a tablebase file to the table; returns how many there were"""
+        with open(path, "rb") as f:
+            data = f.read()
+        if len(data) < HEADER.size:
+            raise ValueError(f"{path} is not an endgame tablebase")
+        magic, version, digest, count = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an endgame tablebase")
+        if version != VERSION:
+            raise ValueError(f"Unsupported endgame tablebase version {version}")
+        if digest != card_digest():
+            raise ValueError(f"{path} was solved for other card definitions")
+        table = self.table
+        pos = HEADER.size
+        for _ in range(count):
+            value, size = ENTRY.unpack_from(data, pos)
+            pos += ENTRY.size
+            table[data[pos:pos + size]] = value
+            pos += size
+        self.loaded += count
+        return count
+
+    def save(self, path=None):
+        """Write the whole table to a tablebase file (by default the one it was loaded from)"""
+        path = path if path is not None else self.tablebase
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, card_digest(), len(self.table)))
+            f.write(b"".join(ENTRY.pack(value, len(key)) + key for key, value in self.table.items()))
+        os.replace(temp, path)
+
+    def solve(self, game):
+        """Return the chance that the player to move in game wins"""
+        sim = decode_game(encode_game(game))
+        value = self._value(sim)
+        return value if game.current == 0 else 1 - value
+
+    def choose_action(self, game):
+        """Return the best legal action for the player to move, or None if game is too big to solve"""
+        if game.winner is not None or state_size(game) > self.max_size:
+            return None
+        sim = decode_game(encode_game(game))  # Searched in place, so never the game itself
+        me = game.current
+        best = best_value = None
+        # Ties go to an attack, then the earliest in legal_actions order, so play before ending the turn
+        for action in sorted(legal_actions(sim), key=lambda action: action.kind != ATTACK):
+            value = self._after(sim, action)
+            if me == 1:
+                value = 1 - value
+            if best is None or value > best_value + 1e-12:
+                best, best_value = action, value
+                if value == 1.0:
+                    break
+        self.value = best_value
+        return best
+
+    def _value(self, game):
+        """The first player's chance of winning from game with perfect play"""
+        if game.winner is not None:
+            return 1.0 if game.winner == 0 else 0.0
+        key = position_key(game)
+        value = self.table.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        # Attacks first: they settle the most games, and a certain win ends the search
+        legal = sorted(legal_actions(game), key=lambda action: action.kind != ATTACK)
+        if game.current == 0:
+            value = 0.0
+            for action in legal:
+                value = max(value, self._after(game, action))
+                if value == 1.0:
+                    break
+        else:
+            value = 1.0
+            for action in legal:
+                value = min(value, self._after(game, action))
+                if value == 0.0:
+                    break
+        self.table[key] = value
+        self.searched += 1
+        return value
+
+    def _after(self, game, action):
+        """The first player's chance of winning after action, averaged over any cards it draws"""
+        count = 0
+        if action.kind not in _NO_DRAWS:
+            drawer, prizes, count = self._draw(game, action)
+        if not count:
+            token = apply(game, action)
+            value = self._value(game)
+            undo(game, token)
+            return value
+
+        pool = Counter(card.template.card_id for card in _unseen(drawer))
+        value = 0.0
+        for drawn, chance in _draws(pool, count):
+            _arrange(drawer, drawn, prizes)
+            token = apply(game, action)
+            value += chance * self._value(game)
+            undo(game, token)
+        return value
+
+    def _draw(self, game, action):
+        """Return (player, from prizes, count) for the cards action draws"""
+        player = game.players[game.current]
+        kind = action.kind
+        if kind == END_TURN:
+            # The next player draws for their turn; with an empty deck they lose instead
+            opponent = game.players[1 - game.current]
+            return opponent, False, min(1, len(opponent.deck))
+        if kind == ATTACK:
+            defender = game.players[1 - game.current].active_pokemon
+            knockout = player.active_pokemon.damage >= defender.hp
+            return player, True, 1 if knockout and player.prizes else 0
+        if kind == PLAY_TRAINER:
+            return player, False, min(TRAINER_EFFECTS[action.card_id].draws, len(player.deck))
+        raise ValueError(f"Unknown action kind {kind}")
+
+
+def play_match(solver, seed, seat):
+    """Play solver (in seat, once positions are small enough) against make_computer_move; returns the winner"""
+    game = Game(random.Random(seed))
+    game.setup()
+    game.begin_turn()
+    while game.winner is None:
+        if game.current == seat:
+            action = solver.choose_action(game)
+            while action is not None and action.kind != END_TURN:
+                perform(game, action)
+                action = solver.choose_action(game)
+            if action is not None:
+                perform(game, action)
+                continue
+        if game.winner is None:
+            game.finish_turn()
+            if game.winner is None:
+                game.begin_turn()
+    return game.winner
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play the endgame solver against the greedy computer player")
+    parser.add_argument("games", type=int, nargs="?", default=20, help="number of games to play")
+    parser.add_argument("--max-size", type=int, default=DEFAULT_MAX_SIZE,
+                        help="solve positions with at most this many cards left in decks, prizes and hands")
+    parser.add_argument("--tablebase", metavar="FILE", help="load solved positions from FILE and save them back")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for reproducible runs")
+    args = parser.parse_args()
+
+    solver = EndgameSolver(args.max_size, args.tablebase)
+    wins = greedy_wins = 0
+    start = time.perf_counter()
+    for i in range(args.games):
+        seat = i % 2  # Alternate who goes first
+        seed = args.seed * 1000003 + i
+        if play_match(solver, seed, seat) == seat:
+            wins += 1
+        if Game(random.Random(seed)).play() == seat:
+            greedy_wins += 1
+    elapsed = time.perf_counter() - start
+    if args.tablebase is not None:
+        solver.save()
+
+    print(f"Solver won {wins} of {args.games} games ({wins / args.games:.1%}); "
+          f"the greedy player won {greedy_wins} of the same deals in its seat")
+    print(f"Positions:      {solver.searched:,} searched, {solver.hits:,} found in the table, "
+          f"{solver.loaded:,} loaded from the tablebase")
+    print(f"Time:           {elapsed:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
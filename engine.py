@@ -0,0 +1,107 @@
+"""
+Headless game engine for Pokémon TCG
+Plays computer-vs-computer matches with no input, output or delays
+"""
+from gamelog import TURN
+from player import Player
+from pokemon_cards import ROCK_DECK_LIST, create_deck
+
+
+class Game:
+    def __init__(self, rng=None, players=None, decks=None):
+        self.rng = rng  # random.Random used for every shuffle in this game
+        if players is None:
+            if decks is None:
+                decks = (ROCK_DECK_LIST, ROCK_DECK_LIST)  # Each seat's deck list of card templates
+            players = [
+                Player("PLAYER", is_computer=True, rng=rng, deck=create_deck(decks[0], rng)),
+                Player("COMPUTER", is_computer=True, rng=rng, deck=create_deck(decks[1], rng)),
+            ]
+        self.players = players
+        self.current = 0  # Index of the player whose turn it is
+        self.turns = 0
+        self.winner = None  # Index of the winning player once the game is over
+        self.final_blow = None  # The Pokémon whose attack won the game, if one did
+        self.log = None  # GameLog recording this game, if any
+
+    def deal(self):
+        """Draw starting hands, handle mulligans and set aside prize cards"""
+        for player in self.players:
+            player.draw_starting_hand()
+
+        for player in self.players:
+            while not player.has_basic_pokemon():
+                player.mulligan()
+
+        for player in self.players:
+            player.setup_prizes()
+
+    def setup(self):
+        """Deal, then place the starting Pokémon"""
+        self.deal()
+        for player in self.players:
+            player.make_computer_setup()
+
+    def begin_turn(self):
+        """Start the current player's turn; returns False if they lose by decking out"""
+        player = self.players[self.current]
+        self.turns += 1
+        if player.log is not None:
+            player.log(player.log_codes[TURN][0] | self.turns)
+
+        # Start turn (draw a card)
+        if player.draw_card() is None:
+            self.winner = 1 - self.current  # Player loses if can't draw a card
+            return False
+        player.can_attack = True
+        return True
+
+    def resolve_knockouts(self):
+        """Promote the opponent's new active Pokémon and check for a winner
+
+        Returns the opponent's promotion message, or None if nothing was promoted.
+        """
+        player = self.players[self.current]
+        opponent = self.players[1 - self.current]
+        message = None
+
+        # Check if the opponent's active was knocked out
+        if not opponent.active_pokemon and opponent.bench:
+            _, message = opponent.choose_new_active()
+
+        if player.has_won(opponent):
+            self.winner = self.current
+            self.final_blow = player.active_pokemon
+        return message
+
+    def end_turn(self):
+        """Pass the turn to the other player and start their turn"""
+        self.current = 1 - self.current
+        self.begin_turn()
+
+    def finish_turn(self):
+        """Let make_computer_move play out the current turn, then pass to the other player"""
+        self.players[self.current].make_computer_move(self.players[1 - self.current], quiet=True)
+        self.resolve_knockouts()
+
+        if self.winner is None:
+            self.current = 1 - self.current
+
+    def play_turn(self):
+        """Play a single turn for the current player"""
+        if self.begin_turn():
+            self.finish_turn()
+
+    def play(self, on_turn=None):
+        """Play the whole game and return the index of the winner
+
+        on_turn, if given, is called with the game after every turn.
+        """
+        self.setup()
+        while self.winner is None:
+            self.play_turn()
+            if on_turn is not None:
+                on_turn(self)
+        if self.log is not None:
+            self.log.end(self.winner, self.turns)
+        return self.winner
@@ -0,0 +1,276 @@
+"""
+Append-only binary game log for Pokémon TCG
+Records each game's seed and every action as fixed-width records for replay and analysis
+"""
+import mmap
+import struct
+import sys
+from array import array
+from collections import namedtuple
+
+# A log file is a header followed by 4-byte little-endian records:
+#   bytes 0-1  card_id of the card played, or the turn number for TURN and END
+#   byte 2     hand index of the card played
+#   byte 3     kind (bits 0-3), seat (bit 4), energy target + 1 (bits 5-7)
+# A GAME record is followed by `index` raw u32 words holding the game's
+# seed, least significant first. Records are built as plain ints, so
+# recording an action is one OR and one array append.
+MAGIC = b"TCGL"
+VERSION = 1
+HEADER = struct.Struct("<4sHH")  # Magic, version, record size
+RECORD = struct.Struct("<HBB")
+RECORD_SIZE = RECORD.size
+CODE_OFFSET = 3  # Byte of a record holding its kind
+
+INDEX_SHIFT = 16
+CODE_SHIFT = 24
+SEAT_SHIFT = 4  # Within the code byte
+TARGET_SHIFT = 5
+KIND_MASK = 0x0F
+ENERGY_TARGET_SHIFT = CODE_SHIFT + TARGET_SHIFT  # Energy target bits within a record
+
+# Record kinds. The action kinds have the same values as in actions.py.
+PLAY_ACTIVE = 0  # Played hand[index] (card_id) as the active Pokémon
+PLAY_BENCH = 1  # Played hand[index] to the bench
+ATTACH_ENERGY = 2  # Attached hand[index] to the active (target -1) or a bench slot
+PLAY_TRAINER = 3  # Played the trainer hand[index]
+ATTACK = 4  # Attacked with the active Pokémon
+PROMOTE = 6  # Promoted the first bench Pokémon (card_id) to active
+TURN = 7  # Seat started turn number `value` and drew a card
+GAME = 8  # A new game; `index` seed words follow
+END = 9  # The game ended after `value` turns; index is the winner, or NO_WINNER
+
+KIND_NAMES = {
+    PLAY_ACTIVE: "play active", PLAY_BENCH: "play bench", ATTACH_ENERGY: "attach energy",
+    PLAY_TRAINER: "play trainer", ATTACK: "attack", PROMOTE: "promote",
+    TURN: "turn", GAME: "game", END: "end",
+}
+
+NO_WINNER = 0xFF
+ACTIVE = -1  # Energy target meaning the active Pokémon
+MAX_INDEX = 0xFF
+
+FLUSH_RECORDS = 8192  # Records held in memory before a finished game is written out
+
+
+def encode(kind, seat=0, index=0, value=0, target=ACTIVE):
+    """Build one record as an int"""
+    code = kind | seat << SEAT_SHIFT | (target + 1) << TARGET_SHIFT
+    return value | index << INDEX_SHIFT | code << CODE_SHIFT
+
+
+def decode(value, index, code):
+    """Split an unpacked record into (kind, seat, index, target, value)"""
+    return code & KIND_MASK, code >> SEAT_SHIFT & 1, index, (code >> TARGET_SHIFT) - 1, value
+
+
+def seat_codes(seat):
+    """Return the record codes a player in seat ORs a value into
+
+    codes[kind][index] is the record for that kind and hand index with no
+    value, so a player logs an action with a lookup and one OR.
+    """
+    return tuple(tuple(encode(kind, seat, index) for index in range(MAX_INDEX + 1))
+                 for kind in range(END + 1))
+
+
+class GameLog:
+    """Writes games to a binary file as they are played
+
+    Players record their own actions by appending record ints (see
+    Player.log), and the headless engine records each turn the same way.
+    Records are held in memory and written out in batches at the end of a
+    game, so a log being written only ever holds whole games. Game flows
+    that call turn() themselves can set flush_turns to write and flush the
+    log at the start of every turn instead, so an interactive game loses at
+    most the turn in progress if the process dies.
+    """
+
+    def __init__(self, file, flush_turns=False):
+        self.file = file
+        self.flush_turns = flush_turns
+        self._records = array("I")  # Records held until the next flush
+        self._append = self._records.append
+        self._players = ()
+        self._codes = (seat_codes(0), seat_codes(1))
+
+    def start(self, game, seed):
+        """Begin recording a game whose rng was seeded with seed"""
+        if seed < 0:
+            raise ValueError("Game log seeds must be non-negative")
+        words = []
+        while True:
+            words.append(seed & 0xFFFFFFFF)
+            seed >>= 32
+            if not seed:
+                break
+
+        self._records.append(self._codes[0][GAME][len(words)])
+        self._records.extend(words)
+
+        game.log = self
+        self._players = players = game.players
+        players[0].log = players[1].log = self._append
+        players[0].log_codes, players[1].log_codes = self._codes
+
+    def turn(self, seat, number):
+        """Record the start of turn number for seat"""
+        self._append(self._codes[seat][TURN][0] | number)
+        if self.flush_turns:
+            self.flush()
+
+    def end(self, winner, turns):
+        """Record the end of the game and stop recording its players"""
+        self._append(self._codes[0][END][NO_WINNER if winner is None else winner] | turns)
+        if self.flush_turns or len(self._records) >= FLUSH_RECORDS:
+            self.flush()
+        for player in self._players:
+            player.log = None
+        self._players = ()
+
+    def flush(self):
+        """Write out every record held in memory"""
+        data = self._records
+        if sys.byteorder != "little":
+            data.byteswap()
+        self.file.write(data.tobytes())
+        del data[:]
+        if self.flush_turns:
+            self.file.flush()
+
+    def close(self):
+        """Write anything still held and close the file"""
+        if self._records:
+            self.flush()
+        self.file.close()
+
+
+def open_log(path, flush_turns=False):
+    """Open a log file for appending, writing the header if it is new"""
+    f = open(path, "ab")
+    if f.tell() == 0:
+        f.write(HEADER.pack(MAGIC, VERSION, RECORD_SIZE))
+    return GameLog(f, flush_turns)
+
+
+# One game in a log. start and stop are record numbers of its first
+# record after the seed and one past its last; winner and turns are None
+# if the log ends before the game does.
+GameEntry = namedtuple("GameEntry", "number seed start stop winner turns")
+
+# Maps the code byte of a record to its kind
+_KIND_TABLE = bytes(byte & KIND_MASK for byte in range(256))
+
+
+class GameLogReader:
+    """Reads a game log through a memory map
+
+    Games are found by scanning only the kind bits of every record, so
+    indexing a large log never unpacks the records themselves.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        size = self._file.seek(0, 2)
+        if size < HEADER.size:
+            raise ValueError(f"{path} is not a game log")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size = HEADER.unpack_from(self._map)
+        if magic != MAGIC or record_size != RECORD_SIZE:
+            raise ValueError(f"{path} is not a game log")
+        if version != VERSION:
+            raise ValueError(f"Unsupported game log version {version}")
+        self.count = (size - HEADER.size) // RECORD_SIZE  # Records, counting seed words
+        self._games = None
+        self._seed_words = None  # (first, stop) record numbers of each game's seed
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def kinds(self):
+        """Return the kind of every record (seed words included) as bytes"""
+        end = HEADER.size + self.count * RECORD_SIZE
+        return self._map[HEADER.size + CODE_OFFSET:end:RECORD_SIZE].translate(_KIND_TABLE)
+
+    def record(self, number):
+        """Unpack record number as (kind, seat, index, target, value)"""
+        return decode(*RECORD.unpack_from(self._map, HEADER.size + number * RECORD_SIZE))
+
+    def records(self, start, stop):
+        """Unpack records start..stop-1"""
+        view = memoryview(self._map)[HEADER.size + start * RECORD_SIZE:HEADER.size + stop * RECORD_SIZE]
+        try:
+            return [decode(*fields) for fields in RECORD.iter_unpack(view)]
+        finally:
+            view.release()
+
+    def _scan(self):
+        """Find every GAME record: a list of (record number, seed word count, seed)"""
+        kinds = self.kinds()
+        game_kind = bytes([GAME])
+        found = []
+        pos = kinds.find(game_kind)
+        while pos != -1:
+            offset = HEADER.size + pos * RECORD_SIZE
+            words = self._map[offset + 2]
+            seed = int.from_bytes(self._map[offset + RECORD_SIZE:offset + (words + 1) * RECORD_SIZE], "little")
+            found.append((pos, words, seed))
+            # Resume after the seed words, which can hold any bits
+            pos = kinds.find(game_kind, pos + 1 + words)
+        return found
+
+    def games(self):
+        """Return a GameEntry for every game in the log"""
+        if self._games is not None:
+            return self._games
+        found = self._scan()
+        games = []
+        self._seed_words = []
+        for number, (pos, words, seed) in enumerate(found):
+            start = pos + 1 + words
+            self._seed_words.append((pos + 1, start))
+            stop = found[number + 1][0] if number + 1 < len(found) else self.count
+            winner = turns = None
+            if stop > start:
+                kind, _, index, _, value = self.record(stop - 1)
+                if kind == END:
+                    winner = None if index == NO_WINNER else index
+                    turns = value
+            games.append(GameEntry(number, seed, start, stop, winner, turns))
+        self._games = games
+        return games
+
+    def summary(self):
+        """Return totals across the whole log: games, wins per seat, turns and action counts"""
+        games = self.games()
+        kinds = self.kinds()
+        counts = {kind: kinds.count(bytes([kind])) for kind in KIND_NAMES}
+        # Seed words aren't records; take back the kinds they seemed to have
+        for first, stop in self._seed_words:
+            for kind in kinds[first:stop]:
+                if kind in counts:
+                    counts[kind] -= 1
+
+        wins = [0, 0]
+        finished = 0
+        total_turns = 0
+        for game in games:
+            if game.turns is not None:
+                finished += 1
+                total_turns += game.turns
+                if game.winner is not None:
+                    wins[game.winner] += 1
+        return {
+            "games": len(games),
+            "finished": finished,
+            "wins": wins,
+            "avg_turns": total_turns / finished if finished else 0.0,
+            "actions": {KIND_NAMES[kind]: count for kind, count in counts.items()},
+        }
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Load generator for the Pokémon TCG server
+Keeps many bot-played tables open at once and reports command latency percentiles
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from async_game import BotInput
+
+
+def percentile(sorted_values, fraction):
+    """Return the value below which the given fraction of sorted_values fall"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+class LoadStats:
+    """Totals gathered across every table"""
+
+    def __init__(self):
+        self.latencies = []  # Seconds from sending a command to the next prompt
+        self.games = 0
+        self.results = {}
+        self.errors = 0
+        self.bytes_received = 0
+
+
+async def play_table(connect, bot, stats, think_ms, rng):
+    """Play one game over a fresh connection, timing every command"""
+    reader, writer = await connect()
+    sent_at = None
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                stats.errors += 1  # Closed before the game ended
+                return
+            stats.bytes_received += len(line)
+            tag = line[:1]
+            if tag == b"P":
+                if sent_at is not None:
+                    stats.latencies.append(time.perf_counter() - sent_at)
+                if think_ms > 0:
+                    await asyncio.sleep(rng.uniform(0.5, 1.5) * think_ms / 1000)
+                reply = await bot(line[2:].decode("utf-8").rstrip("\n"))
+                writer.write(reply.encode("utf-8") + b"\n")
+                sent_at = time.perf_counter()
+            elif tag == b"E":
+                result = line[2:].decode("utf-8").strip()
+                stats.results[result] = stats.results.get(result, 0) + 1
+                stats.games += 1
+                return
+    finally:
+        writer.close()
+
+
+async def run_load(connect, tables, duration, think_ms, seed):
+    """Keep `tables` games going until duration seconds have passed"""
+    stats = LoadStats()
+    rng = random.Random(seed)
+    deadline = time.perf_counter() + duration
+
+    async def table(index):
+        table_rng = random.Random(rng.getrandbits(64))
+        bot = BotInput(table_rng)
+        while time.perf_counter() < deadline:
+            try:
+                await play_table(connect, bot, stats, think_ms, table_rng)
+            except (ConnectionError, OSError):
+                stats.errors += 1
+                await asyncio.sleep(0.1)
+
+    await asyncio.gather(*(table(i) for i in range(tables)))
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Put load on a Pokémon TCG server and measure latency")
+    parser.add_argument("--host", default="127.0.0.1", help="server address")
+    parser.add_argument("--port", type=int, default=7777, help="server TCP port")
+    parser.add_argument("--unix", metavar="PATH", help="connect to a Unix socket instead of TCP")
+    parser.add_argument("--tables", type=int, default=100, help="concurrent tables to keep open")
+    parser.add_argument("--duration", type=float, default=30.0,
+                        help="seconds to keep starting games (games in progress then finish)")
+    parser.add_argument("--think-ms", type=float, default=200.0,
+                        help="mean bot thinking time before each command (0 sends at once)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for the bots")
+    args = parser.parse_args()
+
+    if args.unix:
+        def connect():
+            return asyncio.open_unix_connection(args.unix)
+    else:
+        def connect():
+            return asyncio.open_connection(args.host, args.port)
+
+    start = time.perf_counter()
+    stats = asyncio.run(run_load(connect, args.tables, args.duration, args.think_ms, args.seed))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(stats.latencies)
+    print(f"Tables: {args.tables} concurrent for {elapsed:.1f}s")
+    print(f"Games finished: {stats.games} ({stats.games / elapsed:,.1f}/sec), errors: {stats.errors}")
+    print(f"Results: " + ", ".join(f"{name} {count}" for name, count in sorted(stats.results.items())))
+    print(f"Commands: {len(latencies):,} ({len(latencies) / elapsed:,.0f}/sec), "
+          f"{stats.bytes_received / max(1, len(latencies)):,.0f} bytes received per command")
+    if latencies:
+        print(f"Latency: p50 {percentile(latencies, 0.50) * 1000:.2f} ms, "
+              f"p90 {percentile(latencies, 0.90) * 1000:.2f} ms, "
+              f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms, "
+              f"max {latencies[-1] * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo tree search AI for Pokémon TCG
+Searches the legal actions within a per-move time budget
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+from actions import ATTACH_ENERGY, END_TURN, PLAY_ACTIVE, PLAY_BENCH, legal_actions, perform
+from deck import Deck
+from engine import Game
+from state import decode_game, encode_game
+from zobrist import TranspositionTable, hash_game
+
+# Actions with no random outcome, whose results transpose when reordered
+_TRANSPOSABLE = (PLAY_ACTIVE, PLAY_BENCH, ATTACH_ENERGY)
+
+
+class Node:
+    """Search statistics for one action sequence from the root"""
+    __slots__ = ("mover", "visits", "wins", "available", "children")
+
+    def __init__(self, mover):
+        self.mover = mover  # Index of the player who chose the action leading here
+        self.visits = 0
+        self.wins = 0
+        self.available = 0  # Playouts in which this action was legal
+        self.children = {}  # Action -> Node
+
+
+def determinize(game, observer, rng):
+    """Replace everything observer can't see with one random guess, in place
+
+    The observer doesn't know the order of either deck or either set of
+    prize cards, nor what is in the opponent's hand.
+    """
+    for index, player in enumerate(game.players):
+        hidden = list(player.deck) + list(player.prizes)
+        hand_size = 0
+        if index != observer:
+            hand_size = len(player.hand)
+            hidden += player.hand
+        rng.shuffle(hidden)
+
+        prize_count = len(player.prizes)
+        if hand_size:
+            player.hand = hidden[:hand_size]
+        player.prizes = Deck(hidden[hand_size:hand_size + prize_count])
+        player.deck = Deck(hidden[hand_size + prize_count:])
+
+
+def playout(game):
+    """Finish the game with make_computer_move for both players and return the winner"""
+    if game.winner is None:
+        game.finish_turn()
+    while game.winner is None:
+        game.play_turn()
+    return game.winner
+
+
+# Root actions each worker can report in shared memory
+MAX_ROOT_ACTIONS = 256
+
+# Shared visit counts, one row of MAX_ROOT_ACTIONS per worker task.
+# Set in every worker (process or thread) by _init_worker.
+_shared_visits = None
+
+
+def _init_worker(shared_visits):
+    global _shared_visits
+    _shared_visits = shared_visits
+
+
+def _free_threaded():
+    """Check if this interpreter runs without the GIL"""
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+def _root_search(data, me, seed, budget_ms, playouts, exploration, row, legal):
+    """Run one independent search in a worker and store its root visit counts"""
+    agent = MCTSAgent(budget_ms=budget_ms, exploration=exploration,
+                      rng=random.Random(seed), playouts=playouts)
+    root = Node(1 - me)
+    count = agent._search(root, data, me)
+
+    base = row * MAX_ROOT_ACTIONS
+    for i, action in enumerate(legal):
+        child = root.children.get(action)
+        _shared_visits[base + i] = child.visits if child is not None else 0
+    return count
+
+
+class MCTSAgent:
+    """Computer player that picks actions by open-loop Monte Carlo tree search
+
+    Tree nodes stand for action sequences rather than exact positions, so
+    hidden cards and draws are sampled afresh for every playout. The tree
+    is kept between moves: after choose_action() the chosen child becomes
+    the new root, and observe() follows the opponent's moves the same way.
+
+    Positions reached within the searching player's turn by reordering
+    Pokémon and energy plays share one node, found through a Zobrist-keyed
+    transposition table (see `table` for its hit rate).
+
+    Each move searches for budget_ms milliseconds, or for exactly
+    `playouts` playouts if that is given. With workers > 1 the search is
+    root-parallel: every worker searches its own tree from the current
+    position and their root visit counts are summed. Workers are threads
+    on free-threaded builds and processes otherwise. With a seeded rng
+    and a fixed playout count, decisions are reproducible from run to run
+    for a given number of workers.
+
+    With an endgame solver (see endgame.py), positions small enough for it
+    are played by the solver instead of searched. The solver plays with
+    perfect information, so it is given a determinized copy of the game
+    rather than the game itself, and sees only what this player could.
+    """
+
+    def __init__(self, budget_ms=1000, exploration=0.7, rng=None, playouts=None, workers=1,
+                 table_size=1 << 14, endgame=None):
+        self.budget_ms = budget_ms
+        self.exploration = exploration
+        self.rng = rng if rng is not None else random.Random()
+        self.playouts_per_move = playouts  # Fixed playouts per move (per worker), or None
+        self.workers = workers
+        self.root = None
+        self.table = TranspositionTable(table_size)  # Information-set hash -> Node
+        self.playouts = 0  # Playouts run by the most recent search
+        self.search_time = 0.0  # Seconds spent in the most recent search
+        self.total_playouts = 0
+        self.total_time = 0.0
+        self._executor = None
+        self._shared_visits = None
+        self.endgame = endgame
+
+    @property
+    def playouts_per_second(self):
+        """Average playout throughput over every search so far"""
+        if self.total_time <= 0:
+            return 0.0
+        return self.total_playouts / self.total_time
+
+    def reset(self):
+        """Forget the search tree, e.g. after moves that weren't observed
+
+        The transposition table goes too: its nodes belong to the old tree,
+        and positions from earlier turns can't come round again.
+        """
+        self.root = None
+        self.table.clear()
+
+    def close(self):
+        """Shut down the worker pool, if one was started"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def observe(self, action):
+        """Follow an action played by someone else down the search tree"""
+        if self.root is not None:
+            self.root = self.root.children.get(action)
+
+    def choose_action(self, game):
+        """Search from the current position and return the best legal action"""
+        me = game.current
+        data = encode_game(game)
+        if self.endgame is not None:
+            # The solver sees every card, so it only gets a guess at the ones
+            # we can't see; our own hand is left alone, so its action is legal
+            sim = decode_game(data)
+            determinize(sim, me, self.rng)
+            action = self.endgame.choose_action(sim)
+            if action is not None:
+                self.root = None  # The tree no longer follows the game
+                return action
+
+        legal = list(legal_actions(game))
+
+        start = time.perf_counter()
+        if self.workers > 1:
+            visits, playouts = self._parallel_search(data, me, legal)
+        else:
+            if self.root is None:
+                self.root = Node(1 - me)
+            playouts = self._search(self.root, data, me)
+            visits = []
+            for action in legal:
+                child = self.root.children.get(action)
+                visits.append(child.visits if child is not None else 0)
+
+        self.playouts = playouts
+        self.search_time = time.perf_counter() - start
+        self.total_playouts += playouts
+        self.total_time += self.search_time
+
+        # Most visited action; ties go to the earliest in legal_actions order
+        best = legal[visits.index(max(visits))]
+
+        if self.root is not None:
+            self.root = self.root.children.get(best)
+        return best
+
+    def _search(self, root, data, me):
+        """Run playouts from the encoded position until the budget is spent"""
+        deadline = time.perf_counter() + self.budget_ms / 1000
+        playouts = 0
+        while True:
+            sim = decode_game(data)
+            determinize(sim, me, self.rng)
+            self._iterate(root, sim)
+            playouts += 1
+            if self.playouts_per_move is not None:
+                if playouts >= self.playouts_per_move:
+                    break
+            elif time.perf_counter() >= deadline:
+                break
+        return playouts
+
+    def _parallel_search(self, data, me, legal):
+        """Search in every worker and return the summed root visits and playouts"""
+        if len(legal) > MAX_ROOT_ACTIONS:
+            raise ValueError(f"Too many legal actions to search in parallel ({len(legal)})")
+
+        if self._executor is None:
+            # Loaded on first use, so single-worker searches never load multiprocessing
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+            self._shared_visits = multiprocessing.RawArray("q", self.workers * MAX_ROOT_ACTIONS)
+            pool = ThreadPoolExecutor if _free_threaded() else ProcessPoolExecutor
+            self._executor = pool(max_workers=self.workers, initializer=_init_worker,
+                                  initargs=(self._shared_visits,))
+
+        # One seed per move from our own rng keeps parallel decisions reproducible
+        base_seed = self.rng.getrandbits(64)
+        futures = [
+            self._executor.submit(_root_search, data, me, (base_seed << 16) | row,
+                                  self.budget_ms, self.playouts_per_move, self.exploration,
+                                  row, legal)
+            for row in range(self.workers)
+        ]
+        playouts = sum(future.result() for future in futures)
+
+        # Merge rows in worker order so the result doesn't depend on timing
+        visits = [0] * len(legal)
+        for row in range(self.workers):
+            base = row * MAX_ROOT_ACTIONS
+            for i in range(len(legal)):
+                visits[i] += self._shared_visits[base + i]
+        return visits, playouts
+
+    def _iterate(self, root, sim):
+        """Run one selection, expansion, playout and backpropagation pass"""
+        me = sim.current
+        node = root
+        path = []
+        exact = True  # Whether only transposable actions have been played so far
+
+        while sim.winner is None:
+            mover = sim.current
+            legal = list(legal_actions(sim))
+            untried = []
+            for action in legal:
+                child = node.children.get(action)
+                if child is None:
+                    untried.append(action)
+                else:
+                    child.available += 1
+
+            if untried:
+                action = self.rng.choice(untried)
+                perform(sim, action)
+                if exact and action.kind in _TRANSPOSABLE:
+                    h = hash_game(sim, me)
+                    child = self.table.get(h)
+                    if child is None:
+                        child = Node(mover)
+                        # The new node has no visits yet; its parent's visits measure
+                        # how much search passes this way, so positions nearer the
+                        # root keep the table's depth-preferred slot
+                        self.table.put(h, child, node.visits)
+                else:
+                    child = Node(mover)
+                node.children[action] = child
+                child.available += 1
+                path.append(child)
+                break
+
+            best_score = -1.0
+            for action in legal:
+                child = node.children[action]
+                score = (child.wins / child.visits
+                         + self.exploration * math.sqrt(math.log(child.available) / child.visits))
+                if score > best_score:
+                    best_score, best_action, best_child = score, action, child
+            perform(sim, best_action)
+            exact = exact and best_action.kind in _TRANSPOSABLE
+            node = best_child
+            path.append(node)
+
+        winner = playout(sim)
+        root.visits += 1
+        for node in path:
+            node.visits += 1
+            if node.mover == winner:
+                node.wins += 1
+
+
+def play_turn(agent, game):
+    """Let agent play the current player's turn, returning the action messages
+
+    Stops before ending the turn, so the caller decides what happens next.
+    """
+    messages = []
+    while game.winner is None:
+        action = agent.choose_action(game)
+        if action.kind == END_TURN:
+            break
+        messages.append(perform(game, action))
+    return messages
+
+
+def play_match(agent, seed, agent_index=1):
+    """Play agent against make_computer_move and return the winner's index"""
+    game = Game(random.Random(seed))
+    game.setup()
+    game.begin_turn()
+    agent.reset()
+
+    while game.winner is None:
+        if game.current == agent_index:
+            play_turn(agent, game)
+            if game.winner is None:
+                game.end_turn()
+        else:
+            game.finish_turn()
+            agent.reset()  # The greedy player's moves aren't reported as actions
+            if game.winner is None:
+                game.begin_turn()
+    return game.winner
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play the MCTS AI against the greedy computer player")
+    parser.add_argument("games", type=int, nargs="?", default=10, help="number of games to play")
+    parser.add_argument("--think-ms", type=int, default=100, help="search budget per move in milliseconds")
+    parser.add_argument("--playouts", type=int, default=None,
+                        help="fixed playouts per move (per worker) instead of a time budget")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes for root-parallel search")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for reproducible runs")
+    parser.add_argument("--endgame", type=int, default=None, metavar="SIZE",
+                        help="solve positions with at most SIZE cards left to play exactly (see endgame.py)")
+    parser.add_argument("--tablebase", metavar="FILE", help="endgame tablebase to load and save back")
+    args = parser.parse_args()
+    if args.tablebase is not None and args.endgame is None:
+        parser.error("--tablebase needs --endgame")
+
+    solver = None
+    if args.endgame is not None:
+        from endgame import EndgameSolver
+        solver = EndgameSolver(args.endgame, args.tablebase)
+    agent = MCTSAgent(budget_ms=args.think_ms, rng=random.Random(args.seed),
+                      playouts=args.playouts, workers=args.workers, endgame=solver)
+    wins = 0
+    for i in range(args.games):
+        agent_index = i % 2  # Alternate who goes first
+        if play_match(agent, args.seed * 1000003 + i, agent_index) == agent_index:
+            wins += 1
+
+    agent.close()
+    if solver is not None and args.tablebase is not None:
+        solver.save()
+
+    print(f"MCTS won {wins} of {args.games} games ({wins / args.games:.1%}) against the greedy AI")
+    print(f"Playout throughput: {agent.playouts_per_second:,.0f} playouts/sec")
+    if args.workers <= 1:
+        print(f"Transposition table hit rate: {agent.table.hit_rate:.1%} "
+              f"of {agent.table.lookups:,} lookups")
+    if solver is not None:
+        print(f"Endgame positions: {solver.searched:,} solved, {solver.loaded:,} loaded from the tablebase")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Exact opening-hand odds for Pokémon TCG
+Computes mulligan, first-turn attack and prize-card lockout probabilities for any deck list
+without shuffling a deck
+"""
+
+import argparse
+import random
+import time
+from functools import lru_cache
+from math import comb
+from engine import Game
+from player import PRIZE_COUNT
+from pokemon_cards import CARD_IDS, CARD_TEMPLATES, ROCK_DECK_LIST
+
+HAND_SIZE = 7
+
+
+def is_basic(template):
+    """The engine's basic Pokémon rule, as in Player.has_basic_pokemon"""
+    return template.card_type == "pokemon" and template.energy_cost <= 1
+
+
+@lru_cache(maxsize=None)
+def _hands(sizes, draws):
+    """Every way to draw cards from a deck split into groups of sizes
+
+    Returns ((counts drawn from each group), probability) pairs, one per
+    composition of the draws: the multivariate hypergeometric distribution.
+    """
+    total = comb(sum(sizes), draws)
+    hands = []
+
+    def split(group, left, counts, ways):
+        if group == len(sizes) - 1:
+            if left <= sizes[group]:
+                hands.append((counts + (left,), ways * comb(sizes[group], left) / total))
+            return
+        for count in range(min(left, sizes[group]) + 1):
+            split(group + 1, left - count, counts + (count,), ways * comb(sizes[group], count))
+
+    split(0, draws, (), 1)
+    return tuple(hands)
+
+
+def _composition(deck_list):
+    """Copies of each card_id in deck_list, the key the odds are cached under"""
+    counts = [0] * len(CARD_TEMPLATES)
+    for template in deck_list:
+        counts[template.card_id] += 1
+    return tuple(counts)
+
+
+def _group_sizes(composition, *groups):
+    """Count the cards of a deck in each group (a predicate on templates), plus one for the rest"""
+    sizes = [0] * (len(groups) + 1)
+    for card_id, copies in enumerate(composition):
+        template = CARD_TEMPLATES[card_id]
+        for i, group in enumerate(groups):
+            if group(template):
+                sizes[i] += copies
+                break
+        else:
+            sizes[-1] += copies
+    return tuple(sizes)
+
+
+@lru_cache(maxsize=None)
+def _mulligan_chance(basics, size):
+    return comb(size - basics, HAND_SIZE) / comb(size, HAND_SIZE)
+
+
+@lru_cache(maxsize=None)
+def _mulligan_distribution(composition, most):
+    basics, rest = _group_sizes(composition, is_basic)
+    if not basics:
+        raise ValueError("Deck has no basic Pokémon, so every hand is a mulligan")
+    chance = _mulligan_chance(basics, basics + rest)
+    return tuple(chance ** count * (1 - chance) for count in range(most)) + (chance ** most,)
+
+
+def mulligan_distribution(deck_list, most=10):
+    """Probabilities of 0, 1, ... most mulligans before a hand with a basic Pokémon
+
+    A mulligan shuffles the hand back into the deck, so every redeal is a
+    fresh try and the count is geometric. The last entry covers most or more.
+    """
+    return _mulligan_distribution(_composition(deck_list), most)
+
+
+@lru_cache(maxsize=None)
+def _attack_chance(composition):
+    sizes = _group_sizes(
+        composition,
+        lambda t: is_basic(t) and t.energy_cost == 0,
+        is_basic,
+        lambda t: t.card_type == "energy",
+    )
+    free, costly, energy, rest = sizes  # Basics costing 0 and 1 energy, energy, other cards
+    deck_size = sum(sizes)
+    kept = 1 - _mulligan_chance(free + costly, deck_size)
+    chance = 0.0
+    for (x_free, x_costly, x_energy, _), p in _hands(sizes, HAND_SIZE):
+        basics = x_free + x_costly
+        if not basics:
+            continue  # A mulligan
+        # Any energy in hand, or the first draw: a card from outside the hand
+        powered = 1.0 if x_energy else energy / (deck_size - HAND_SIZE)
+        # The active Pokémon is the first basic in the hand, any of them alike
+        chance += p * (x_free + x_costly * powered) / basics
+    return chance / kept
+
+
+def first_turn_attack_chance(deck_list):
+    """Probability that a player's starting active Pokémon can attack on their first turn
+
+    After any mulligans, the starting active is the first basic Pokémon in
+    the hand (as Player.make_computer_setup picks it). It can attack on the
+    player's first turn if it needs no energy, or if the opening hand or the
+    first card drawn is an energy to attach. Trainer cards are left out.
+    """
+    return _attack_chance(_composition(deck_list))
+
+
+@lru_cache(maxsize=None)
+def _prize_distribution(composition, card_id):
+    sizes = _group_sizes(
+        composition,
+        lambda t: t.card_id == card_id and is_basic(t),
+        lambda t: t.card_id == card_id,
+        is_basic,
+    )
+    basic_copies, copies, other_basics, rest = sizes  # Copies of the card that are and aren't basic
+    if not basic_copies + copies:
+        raise ValueError(f"Deck has no {CARD_TEMPLATES[card_id].name}")
+    deck_size = sum(sizes)
+    kept = 1 - _mulligan_chance(basic_copies + other_basics, deck_size)
+    distribution = [0.0] * (min(basic_copies + copies, PRIZE_COUNT) + 1)
+    unseen = deck_size - HAND_SIZE
+    for (x_basic, x_copies, x_other, _), p in _hands(sizes, HAND_SIZE):
+        if not x_basic + x_other:
+            continue  # A mulligan
+        left = basic_copies + copies - x_basic - x_copies
+        # The prizes are the next cards after the hand, so any 6 of the rest
+        for prized in range(min(left, PRIZE_COUNT) + 1):
+            distribution[prized] += (p * comb(left, prized) * comb(unseen - left, PRIZE_COUNT - prized)
+                                     / comb(unseen, PRIZE_COUNT))
+    return tuple(p / kept for p in distribution)
+
+
+def prize_distribution(deck_list, name):
+    """Probabilities that 0, 1, ... copies of the named card are among the prize cards
+
+    The last entry is the chance that every copy is prized (or all six
+    prizes are copies), locking the card out until the player takes them.
+    """
+    return _prize_distribution(_composition(deck_list), CARD_IDS[name])
+
+
+def sample(deck_list, name, games, seed=None):
+    """Estimate the same odds by dealing games, to check the exact ones against"""
+    rng = random.Random(seed)
+    card_id = CARD_IDS[name]
+    mulligans = [0] * 11
+    attacks = 0
+    prized = [0] * (PRIZE_COUNT + 1)
+    for _ in range(games):
+        game = Game(rng, decks=(deck_list, deck_list))
+        player = game.players[0]
+        player.draw_starting_hand()
+        count = 0
+        while not player.has_basic_pokemon():
+            player.mulligan()
+            count += 1
+        mulligans[min(count, 10)] += 1
+        player.setup_prizes()
+        active = next(card for card in player.hand if is_basic(card.template))
+        seen = player.hand + [player.deck.peek()]
+        if active.energy_cost == 0 or any(card.card_type == "energy" for card in seen):
+            attacks += 1
+        prized[sum(1 for card in player.prizes if card.template.card_id == card_id)] += 1
+    return [count / games for count in mulligans], attacks / games, [count / games for count in prized]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exact opening-hand odds for the rock deck")
+    parser.add_argument("--card", default="Tyranitar", help="card to show the prize lockout odds of")
+    parser.add_argument("--sample", type=int, default=0, metavar="N",
+                        help="also deal N hands and show the sampled odds alongside")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for the sampled hands")
+    args = parser.parse_args()
+
+    deck_list = ROCK_DECK_LIST
+    start = time.perf_counter()
+    mulligans = mulligan_distribution(deck_list)
+    attack = first_turn_attack_chance(deck_list)
+    prizes = prize_distribution(deck_list, args.card)
+    elapsed = time.perf_counter() - start
+    if args.sample:
+        sampled_mulligans, sampled_attack, sampled_prizes = sample(deck_list, args.card, args.sample, args.seed)
+
+    def show(label, exact, sampled=None):
+        line = f"{label:<28}{exact:9.4%}"
+        if sampled is not None:
+            line += f"   sampled {sampled:8.4%}"
+        print(line)
+
+    print(f"Rock deck: {len(deck_list)} cards, "
+          f"{sum(1 for t in deck_list if is_basic(t))} basic Pokémon")
+    for count, p in enumerate(mulligans[:4]):
+        show(f"{count} mulligans", p, sampled_mulligans[count] if args.sample else None)
+    show("First-turn attack", attack, sampled_attack if args.sample else None)
+    for count, p in enumerate(prizes):
+        show(f"{count} {args.card} prized", p, sampled_prizes[count] if args.sample else None)
+
+    start_cached = time.perf_counter()
+    mulligan_distribution(deck_list)
+    first_turn_attack_chance(deck_list)
+    prize_distribution(deck_list, args.card)
+    cached = time.perf_counter() - start_cached
+    print(f"Computed in {elapsed * 1e6:,.0f} µs ({cached * 1e6:,.0f} µs once cached)")
+
+
+if __name__ == "__main__":
+    main()
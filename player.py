@@ -1,39 +1,52 @@
 """
 Player class for Pokémon TCG game
 """
+import random
+from deck import Deck
+from gamelog import (
+    ATTACH_ENERGY, ATTACK, ENERGY_TARGET_SHIFT, PLAY_ACTIVE, PLAY_BENCH, PLAY_TRAINER, PROMOTE
+)
 from pokemon_cards import create_rock_deck
+from trainers import TRAINER_EFFECTS
+
+PRIZE_COUNT = 6  # Prize cards each player sets aside
 
 class Player:
-    def __init__(self, name, is_computer=False):
+    def __init__(self, name, is_computer=False, rng=None, deck=None):
         self.name = name
         self.is_computer = is_computer
-        self.deck = create_rock_deck()
+        self.rng = rng if rng is not None else random  # Source of shuffles
+        if deck is None:
+            deck = create_rock_deck(self.rng)
+        self.deck = Deck(deck)  # Cards are given top of deck first
         self.hand = []
         self.active_pokemon = None
         self.bench = []  # Max 5 Pokémon
         self.discard = []
-        self.prizes = []  # Cards set aside as prizes (6 cards)
+        self.prizes = Deck()  # Cards set aside as prizes (6 cards)
         self.can_attack = False
+        self.knockouts = 0  # Opponent's Pokémon this player has knocked out
+        # While a GameLog records this player, log appends a record int for
+        # each action and log_codes holds the player's gamelog.seat_codes
+        self.log = None
+        self.log_codes = None
         
     def draw_card(self):
         """Draw a card from the deck to hand"""
-        if not self.deck:
+        card = self.deck.draw()
+        if card is None:
             return None  # No cards left, player loses
         
-        card = self.deck.pop(0)
         self.hand.append(card)
         return card
     
     def draw_starting_hand(self):
         """Draw the initial 7 cards"""
-        for _ in range(7):
-            self.draw_card()
+        self.hand.extend(self.deck.draw_n(7))
     
     def setup_prizes(self):
         """Set up 6 prize cards"""
-        for _ in range(6):
-            if self.deck:
-                self.prizes.append(self.deck.pop(0))
+        self.prizes.extend(self.deck.draw_n(PRIZE_COUNT))
     
     def has_basic_pokemon(self):
         """Check if player has a basic Pokémon in hand"""
@@ -48,14 +61,13 @@ class Player:
         self.deck.extend(self.hand)
         self.hand = []
         # Shuffle deck
-        import random
-        random.shuffle(self.deck)
+        self.deck.shuffle(self.rng)
         # Draw new hand
         self.draw_starting_hand()
         return not self.has_basic_pokemon()  # Return True if still need to mulligan
     
-    def play_pokemon(self, card_index, as_active=False):
-        """Play a Pokémon card from hand"""
+    def play_pokemon(self, card_index, as_active=False, quiet=False):
+        """Play a Pokémon card from hand; with quiet, a success message is left empty"""
         if card_index < 0 or card_index >= len(self.hand):
             return False, "Invalid card index"
         
@@ -66,18 +78,22 @@ class Player:
         if as_active and self.active_pokemon is None:
             self.active_pokemon = card
             self.hand.pop(card_index)
-            return True, f"Played {card.name} as your active Pokémon"
+            if self.log is not None:
+                self.log(self.log_codes[PLAY_ACTIVE][card_index] | card.card_id)
+            return True, "" if quiet else f"Played {card.name} as your active Pokémon"
         elif not as_active and len(self.bench) < 5:
             self.bench.append(card)
             self.hand.pop(card_index)
-            return True, f"Played {card.name} to your bench"
+            if self.log is not None:
+                self.log(self.log_codes[PLAY_BENCH][card_index] | card.card_id)
+            return True, "" if quiet else f"Played {card.name} to your bench"
         elif as_active and self.active_pokemon is not None:
             return False, "You already have an active Pokémon"
         else:
             return False, "Your bench is full (max 5 Pokémon)"
     
-    def play_energy(self, card_index, target_index=None):
-        """Play an energy card from hand onto a Pokémon"""
+    def play_energy(self, card_index, target_index=None, quiet=False):
+        """Play an energy card from hand onto a Pokémon; with quiet, a success message is left empty"""
         if card_index < 0 or card_index >= len(self.hand):
             return False, "Invalid card index"
         
@@ -89,12 +105,17 @@ class Player:
         if target_index is None and self.active_pokemon:
             self.active_pokemon.attached_energy += 1
             self.hand.pop(card_index)
-            return True, f"Attached energy to {self.active_pokemon.name}"
+            if self.log is not None:
+                self.log(self.log_codes[ATTACH_ENERGY][card_index] | card.card_id)
+            return True, "" if quiet else f"Attached energy to {self.active_pokemon.name}"
         # Target is bench Pokémon
         elif target_index is not None and 0 <= target_index < len(self.bench):
             self.bench[target_index].attached_energy += 1
             self.hand.pop(card_index)
-            return True, f"Attached energy to {self.bench[target_index].name}"
+            if self.log is not None:
+                self.log(self.log_codes[ATTACH_ENERGY][card_index] | card.card_id
+                         | (target_index + 1) << ENERGY_TARGET_SHIFT)
+            return True, "" if quiet else f"Attached energy to {self.bench[target_index].name}"
         else:
             return False, "No valid Pokémon target for energy"
     
@@ -107,52 +128,20 @@ class Player:
         if card.card_type != "trainer":
             return False, "This is not a trainer card"
         
-        # Implement effects for different trainer cards
-        if card.name == "Potion" and self.active_pokemon:
-            self.active_pokemon.hp = min(self.active_pokemon.hp + 20, self.active_pokemon.hp)
-            self.hand.pop(card_index)
-            self.discard.append(card)
-            return True, f"Used Potion to heal {self.active_pokemon.name}"
-        
-        elif card.name == "Energy Retrieval" and any(c.card_type == "energy" for c in self.discard):
-            energy_cards = [c for c in self.discard if c.card_type == "energy"]
-            if energy_cards:
-                energy = energy_cards[0]
-                self.discard.remove(energy)
-                self.hand.append(energy)
-                self.hand.pop(card_index)
-                self.discard.append(card)
-                return True, "Retrieved an energy card from your discard pile"
-        
-        elif card.name == "Professor's Research":
-            # Discard hand and draw 7 new cards
-            discarded_cards = self.hand.copy()
-            self.hand = []
-            self.discard.extend(discarded_cards)
-            for _ in range(7):
-                if not self.deck:
-                    break
-                self.draw_card()
-            return True, "Discarded your hand and drew 7 new cards"
-        
-        elif card.name == "Switch" and self.active_pokemon and self.bench:
-            # For simplicity, switch with the first bench Pokémon
-            self.active_pokemon, self.bench[0] = self.bench[0], self.active_pokemon
-            self.hand.pop(card_index)
-            self.discard.append(card)
-            return True, f"Switched your active Pokémon with {self.active_pokemon.name}"
-        
-        elif card.name == "Pokémon Center" and self.active_pokemon:
-            # Heal all damage
-            self.active_pokemon.hp = self.active_pokemon.hp  # In a real game, would restore to max HP
-            self.hand.pop(card_index)
-            self.discard.append(card)
-            return True, f"Healed all damage from {self.active_pokemon.name}"
-        
-        return False, "Cannot play this trainer card now"
+        success, message = self._trainer_effect(card, card_index)
+        if success and self.log is not None:
+            self.log(self.log_codes[PLAY_TRAINER][card_index] | card.card_id)
+        return success, message
     
-    def attack(self, opponent):
-        """Attack the opponent's active Pokémon"""
+    def _trainer_effect(self, card, card_index):
+        """Carry out a trainer card's effect, if it can be played now"""
+        entry = TRAINER_EFFECTS.get(card.template.card_id)
+        if entry is None or not entry.can_play(self):
+            return False, "Cannot play this trainer card now"
+        return True, entry.effect(self, card, card_index)
+    
+    def attack(self, opponent, quiet=False):
+        """Attack the opponent's active Pokémon; with quiet, a success message is left empty"""
         if not self.active_pokemon:
             return False, "You don't have an active Pokémon"
         
@@ -165,25 +154,29 @@ class Player:
         damage = self.active_pokemon.damage
         opponent.active_pokemon.hp -= damage
         
-        result_message = f"{self.active_pokemon.name} used {self.active_pokemon.description} for {damage} damage!"
+        result_message = "" if quiet else f"{self.active_pokemon.name} used {self.active_pokemon.description} for {damage} damage!"
         
         # Check if the defending Pokémon is knocked out
         if opponent.active_pokemon.hp <= 0:
-            opponent.discard.append(opponent.active_pokemon)
-            knocked_out_name = opponent.active_pokemon.name
+            knocked_out = opponent.active_pokemon
+            opponent.discard.append(knocked_out)
             opponent.active_pokemon = None
+            self.knockouts += 1
             
             # Take a prize card
             if self.prizes:
-                prize = self.prizes.pop(0)
+                prize = self.prizes.draw()
                 self.hand.append(prize)
-                result_message += f"\n{knocked_out_name} was knocked out! You took a prize card."
+                if not quiet:
+                    result_message += f"\n{knocked_out.name} was knocked out! You took a prize card."
             
             # Check if all prizes have been taken (win condition)
-            if not self.prizes:
+            if not self.prizes and not quiet:
                 result_message += "\nYou've taken all your prize cards!"
         
         self.can_attack = False  # Can only attack once per turn
+        if self.log is not None:
+            self.log(self.log_codes[ATTACK][0])
         return True, result_message
     
     def choose_new_active(self):
@@ -193,59 +186,104 @@ class Player:
         
         # For simplicity, just promote the first bench Pokémon
         self.active_pokemon = self.bench.pop(0)
+        if self.log is not None:
+            self.log(self.log_codes[PROMOTE][0] | self.active_pokemon.card_id)
         return True, f"Promoted {self.active_pokemon.name} to active"
     
     def start_turn(self):
         """Start a new turn"""
         self.draw_card()
         self.can_attack = True
+    
+    def has_won(self, opponent):
+        """Check if this player has won against the opponent"""
+        if not self.prizes:
+            return True  # Took all prize cards
+        if not opponent.active_pokemon and not opponent.bench:
+            return True  # Knocked out all of the opponent's Pokémon
+        return False
+    
+    def make_computer_setup(self):
+        """AI logic for placing the starting active and bench Pokémon"""
+        actions = []
+        
+        # Find all basic Pokémon in hand
+        basic_indices = [i for i, card in enumerate(self.hand)
+                         if card.card_type == "pokemon" and card.energy_cost <= 1]
+        
+        if not basic_indices:
+            return actions  # Shouldn't happen due to mulligan checks
+        
+        # Play first as active
+        success, message = self.play_pokemon(basic_indices[0], as_active=True)
+        if success:
+            actions.append(message)
+        
+        # Play rest on bench (up to 5)
+        basic_indices = basic_indices[1:]  # Remove the one we just played
+        bench_count = 0
+        
+        for idx in basic_indices[:5]:  # Max 5 on bench
+            # Adjust index because we're removing cards
+            adjusted_idx = idx - bench_count
+            success, message = self.play_pokemon(adjusted_idx, as_active=False)
+            if success:
+                actions.append(message)
+                bench_count += 1
+        
+        return actions
         
-    def make_computer_move(self, opponent):
-        """AI logic for computer player's turn"""
+    def make_computer_move(self, opponent, quiet=False):
+        """AI logic for computer player's turn
+
+        Returns the messages of the moves made, which quiet (for headless
+        games, which never show them) leaves empty.
+        """
         actions = []
+        hand = self.hand
+        
+        # Pokémon are played first in hand first, so each one played moves
+        # the rest down by one and their indices never need rescanning
+        pokemon_indices = [i for i, card in enumerate(hand) if card.card_type == "pokemon"]
+        played = 0
         
         # If no active Pokémon, play one
-        if not self.active_pokemon:
-            for i, card in enumerate(self.hand):
-                if card.card_type == "pokemon":
-                    success, message = self.play_pokemon(i, as_active=True)
-                    if success:
-                        actions.append(message)
-                        break
+        if not self.active_pokemon and pokemon_indices:
+            success, message = self.play_pokemon(pokemon_indices[0], as_active=True, quiet=quiet)
+            if success:
+                actions.append(message)
+                played = 1
         
         # Play Pokémon to bench
         bench_slots = 5 - len(self.bench)
-        pokemon_indices = [i for i, card in enumerate(self.hand) if card.card_type == "pokemon"]
-        for _ in range(min(bench_slots, len(pokemon_indices))):
-            idx = pokemon_indices.pop(0)
-            success, message = self.play_pokemon(idx, as_active=False)
+        for idx in pokemon_indices[played:played + bench_slots]:
+            success, message = self.play_pokemon(idx - played, as_active=False, quiet=quiet)
             if success:
                 actions.append(message)
-                # Adjust indices for cards that have been removed
-                pokemon_indices = [i-1 if i > idx else i for i in pokemon_indices]
+                played += 1
         
         # Play one energy card if possible
-        energy_indices = [i for i, card in enumerate(self.hand) if card.card_type == "energy"]
-        if energy_indices and self.active_pokemon:
-            success, message = self.play_energy(energy_indices[0])
-            if success:
-                actions.append(message)
+        if self.active_pokemon:
+            for idx, card in enumerate(hand):
+                if card.card_type == "energy":
+                    success, message = self.play_energy(idx, quiet=quiet)
+                    if success:
+                        actions.append(message)
+                    break
         
         # Play useful trainer cards
-        trainer_indices = [i for i, card in enumerate(self.hand) if card.card_type == "trainer"]
-        for idx in trainer_indices:
-            if len(self.hand) <= idx:  # Skip if card index is now out of range
-                continue
-            success, message = self.play_trainer(idx)
-            if success:
-                actions.append(message)
-                # Don't play more than one trainer per turn for simplicity
-                break
+        for idx, card in enumerate(hand):
+            if card.card_type == "trainer":
+                success, message = self.play_trainer(idx)
+                if success:
+                    actions.append(message)
+                    # Don't play more than one trainer per turn for simplicity
+                    break
         
         # Attack if possible
         if self.active_pokemon and opponent.active_pokemon and self.can_attack:
             if self.active_pokemon.attached_energy >= self.active_pokemon.energy_cost:
-                success, message = self.attack(opponent)
+                success, message = self.attack(opponent, quiet=quiet)
                 if success:
                     actions.append(message)
         
@@ -2,17 +2,69 @@
 Pokemon TCG Card Definitions
 Contains all the card data for the game
 """
+import random
+from collections import namedtuple
+
+# Immutable card definition, shared by every copy of the card in every game
+CardTemplate = namedtuple(
+    "CardTemplate", "card_id name card_type hp damage energy_cost description"
+)
+
+CARD_TEMPLATES = []  # Interned card definitions, indexed by card_id
+CARD_IDS = {}  # Card name -> card_id
+
+def define_card(name, card_type, hp=0, damage=0, energy_cost=0, description=""):
+    """Intern a card definition and return its template"""
+    template = CardTemplate(len(CARD_TEMPLATES), name, card_type, hp, damage, energy_cost, description)
+    if name in CARD_IDS:
+        existing = CARD_TEMPLATES[CARD_IDS[name]]
+        if existing[1:] != template[1:]:
+            raise ValueError(f"Card {name!r} is already defined differently")
+        return existing
+    CARD_TEMPLATES.append(template)
+    CARD_IDS[name] = template.card_id
+    return template
 
 class Card:
-    def __init__(self, name, card_type, hp=0, damage=0, energy_cost=0, description=""):
-        self.name = name
-        self.card_type = card_type  # "pokemon", "energy", "trainer"
-        self.hp = hp
-        self.damage = damage
-        self.energy_cost = energy_cost
-        self.description = description
+    """One copy of a card in a game, holding only its in-play state"""
+    __slots__ = ("template", "card_type", "card_id", "damage_taken", "attached_energy")
+
+    def __init__(self, template):
+        self.template = template
+        # Copied from the template because every rule and AI scan checks it
+        self.card_type = template.card_type  # "pokemon", "energy", "trainer"
+        self.card_id = template.card_id  # Likewise for every game log record
+        self.damage_taken = 0
         self.attached_energy = 0
 
+    @property
+    def name(self):
+        return self.template.name
+
+    @property
+    def max_hp(self):
+        return self.template.hp
+
+    @property
+    def hp(self):
+        return self.template.hp - self.damage_taken
+
+    @hp.setter
+    def hp(self, value):
+        self.damage_taken = self.template.hp - value
+
+    @property
+    def damage(self):
+        return self.template.damage
+
+    @property
+    def energy_cost(self):
+        return self.template.energy_cost
+
+    @property
+    def description(self):
+        return self.template.description
+
     def __str__(self):
         if self.card_type == "pokemon":
             return f"{self.name} (HP: {self.hp}, DMG: {self.damage}, Energy: {self.attached_energy}/{self.energy_cost})"
@@ -23,35 +75,44 @@ class Card:
 
 # Define Rock-type Pokémon
 ROCK_POKEMON = [
-    Card("Geodude", "pokemon", hp=60, damage=20, energy_cost=1, description="Rock Throw"),
-    Card("Graveler", "pokemon", hp=90, damage=40, energy_cost=2, description="Rock Slide"),
-    Card("Golem", "pokemon", hp=120, damage=70, energy_cost=3, description="Earthquake"),
-    Card("Onix", "pokemon", hp=90, damage=30, energy_cost=2, description="Rock Throw"),
-    Card("Rhyhorn", "pokemon", hp=80, damage=30, energy_cost=2, description="Horn Attack"),
-    Card("Rhydon", "pokemon", hp=100, damage=50, energy_cost=3, description="Horn Drill"),
-    Card("Sudowoodo", "pokemon", hp=70, damage=30, energy_cost=1, description="Rock Throw"),
-    Card("Larvitar", "pokemon", hp=50, damage=10, energy_cost=1, description="Bite"),
-    Card("Pupitar", "pokemon", hp=70, damage=30, energy_cost=2, description="Rock Slide"),
-    Card("Tyranitar", "pokemon", hp=130, damage=80, energy_cost=4, description="Hyper Beam"),
+    define_card("Geodude", "pokemon", hp=60, damage=20, energy_cost=1, description="Rock Throw"),
+    define_card("Graveler", "pokemon", hp=90, damage=40, energy_cost=2, description="Rock Slide"),
+    define_card("Golem", "pokemon", hp=120, damage=70, energy_cost=3, description="Earthquake"),
+    define_card("Onix", "pokemon", hp=90, damage=30, energy_cost=2, description="Rock Throw"),
+    define_card("Rhyhorn", "pokemon", hp=80, damage=30, energy_cost=2, description="Horn Attack"),
+    define_card("Rhydon", "pokemon", hp=100, damage=50, energy_cost=3, description="Horn Drill"),
+    define_card("Sudowoodo", "pokemon", hp=70, damage=30, energy_cost=1, description="Rock Throw"),
+    define_card("Larvitar", "pokemon", hp=50, damage=10, energy_cost=1, description="Bite"),
+    define_card("Pupitar", "pokemon", hp=70, damage=30, energy_cost=2, description="Rock Slide"),
+    define_card("Tyranitar", "pokemon", hp=130, damage=80, energy_cost=4, description="Hyper Beam"),
 ]
 
 # Define Energy cards
 ENERGY_CARDS = [
-    Card("Rock", "energy", description="Provides energy for Rock-type Pokémon"),
-] * 20  # 20 energy cards
+    define_card("Rock", "energy", description="Provides energy for Rock-type Pokémon"),
+] * 20  # 20 energy cards (templates are immutable, so sharing is safe)
 
 # Define Trainer cards
 TRAINER_CARDS = [
-    Card("Potion", "trainer", description="Heal 20 damage from one of your Pokémon"),
-    Card("Energy Retrieval", "trainer", description="Add an energy card from your discard pile to your hand"),
-    Card("Professor's Research", "trainer", description="Discard your hand and draw 7 cards"),
-    Card("Switch", "trainer", description="Switch your active Pokémon with one on your bench"),
-    Card("Pokémon Center", "trainer", description="Heal all damage from your active Pokémon"),
+    define_card("Potion", "trainer", description="Heal 20 damage from one of your Pokémon"),
+    define_card("Energy Retrieval", "trainer", description="Add an energy card from your discard pile to your hand"),
+    define_card("Professor's Research", "trainer", description="Discard your hand and draw 7 cards"),
+    define_card("Switch", "trainer", description="Switch your active Pokémon with one on your bench"),
+    define_card("Pokémon Center", "trainer", description="Heal all damage from your active Pokémon"),
 ]
 
+ROCK_DECK_LIST = ROCK_POKEMON + ENERGY_CARDS + TRAINER_CARDS
+
+def create_deck(deck_list, rng=None):
+    """Create a shuffled deck from a list of card templates, using rng (a random.Random) if given"""
+    if rng is None:
+        rng = random
+    # Every copy gets its own in-play state on top of the shared template
+    deck = [Card(template) for template in deck_list]
+    rng.shuffle(deck)
+    return deck
+
 # Create default rock deck
-def create_rock_deck():
-    import random
-    deck = ROCK_POKEMON.copy() + ENERGY_CARDS.copy() + TRAINER_CARDS.copy()
-    random.shuffle(deck)
-    return deck 
\ No newline at end of file
+def create_rock_deck(rng=None):
+    """Create a shuffled rock deck, using rng (a random.Random) if given"""
+    return create_deck(ROCK_DECK_LIST, rng) 
\ No newline at end of file
@@ -4,34 +4,88 @@ Pokémon TCG Game
 A simple implementation of the Pokémon Trading Card Game with rock-type Pokémon.
 """
 
+import argparse
+import random
 import time
 import sys
+from actions import (
+    ACTIVE, ATTACK, ATTACH_ENERGY, END_TURN, PLAY_ACTIVE, PLAY_BENCH, PLAY_TRAINER, get_action
+)
+from engine import Game
+from gamelog import open_log
 from player import Player
+from profiler import Profiler
 from ascii_art import (
-    print_title, print_board, print_turn_banner, 
-    print_action, print_winner, print_help, print_hand
+    render_title, render_turn_banner,
+    render_action, render_winner, render_help, render_hand
 )
 
-def clear_screen():
-    """Clear the terminal screen"""
-    print("\033[H\033[J", end="")
+# Draws the board, repainting only what changed since the last frame (see terminal_board)
+board = None
+
+# The game flow below is written as generators that yield IO requests
+# instead of doing IO themselves, so the same flow can be driven by the
+# blocking terminal loop in run() or by the asyncio loop in async_game.
+# Each request is a (kind, value) pair:
+WRITE = "write"  # Write the text value
+ART = "art"  # Write the text value, drawn for a terminal: screen clears, the title and card art
+SLOW = "slow"  # Type out (text, delay per character), then a newline
+PAUSE = "pause"  # Wait value seconds
+INPUT = "input"  # Prompt with value; the line read is sent back
+BOARD = "board"  # Draw the board for value = (player, computer), or None to release the screen
+CALL = "call"  # Run value() (slow, e.g. an AI search); its result is sent back
+
+# Phase names a Profiler times the driver's handling of each request under
+REQUEST_PHASES = {
+    WRITE: "output",
+    ART: "output",
+    SLOW: "text delay",
+    PAUSE: "pause",
+    INPUT: "input",
+    BOARD: "print_board",
+    CALL: "ai search",
+}
+
+def say(text=""):
+    """Request: write a line of text"""
+    return (WRITE, text + "\n")
+
+def draw_art(text):
+    """Request: write terminal art, which clients that draw the game themselves skip"""
+    return (ART, text + "\n")
 
 def slow_print(text, delay=0.03):
-    """Print text with a slight delay for better readability"""
-    for char in text:
-        sys.stdout.write(char)
-        sys.stdout.flush()
-        time.sleep(delay)
-    print()
+    """Request: print text with a slight delay for better readability"""
+    return (SLOW, (text, delay))
+
+def pause(seconds):
+    """Request: wait before going on"""
+    return (PAUSE, seconds)
+
+def ask(prompt=""):
+    """Request: read a line of input"""
+    return (INPUT, prompt)
 
-def setup_game():
+def show_board(player, computer):
+    """Request: draw the current game board"""
+    return (BOARD, (player, computer))
+
+def call(func):
+    """Request: run a slow function and send back its result"""
+    return (CALL, func)
+
+def clear_screen():
+    """Request: clear the terminal screen"""
+    return (ART, "\033[H\033[J")
+
+def setup_game(rng=None):
     """Initialize the game and players"""
-    clear_screen()
-    print_title()
+    yield clear_screen()
+    yield draw_art(render_title())
     
     # Create players
-    player = Player("PLAYER", is_computer=False)
-    computer = Player("COMPUTER", is_computer=True)
+    player = Player("PLAYER", is_computer=False, rng=rng)
+    computer = Player("COMPUTER", is_computer=True, rng=rng)
     
     # Draw starting hands
     player.draw_starting_hand()
@@ -42,11 +96,11 @@ def setup_game():
     computer_mulligan = computer.has_basic_pokemon()
     
     while not player_mulligan:
-        slow_print("You have no basic Pokémon! Performing a mulligan...")
+        yield slow_print("You have no basic Pokémon! Performing a mulligan...")
         player_mulligan = not player.mulligan()
     
     while not computer_mulligan:
-        slow_print("Computer has no basic Pokémon! Performing a mulligan...")
+        yield slow_print("Computer has no basic Pokémon! Performing a mulligan...")
         computer_mulligan = not computer.mulligan()
     
     # Set up prize cards
@@ -58,114 +112,99 @@ def setup_game():
 def select_active_pokemon(player):
     """Let the player select their starting active Pokémon"""
     while True:
-        print("\nSelect a basic Pokémon to be your active Pokémon:")
+        yield say("\nSelect a basic Pokémon to be your active Pokémon:")
         basic_indices = []
         for i, card in enumerate(player.hand):
             if card.card_type == "pokemon" and card.energy_cost <= 1:
                 basic_indices.append(i)
-                print(f"{i+1}. {card}")
+                yield say(f"{i+1}. {card}")
         
         try:
-            choice = int(input("\nEnter card number: ")) - 1
+            choice = int((yield ask("\nEnter card number: "))) - 1
             if choice in basic_indices:
                 success, message = player.play_pokemon(choice, as_active=True)
                 if success:
-                    print_action(message)
+                    yield say(render_action(message))
                     return
             else:
-                print("Invalid choice. Please select a basic Pokémon.")
+                yield say("Invalid choice. Please select a basic Pokémon.")
         except ValueError:
-            print("Please enter a number.")
+            yield say("Please enter a number.")
 
 def select_bench_pokemon(player):
     """Let the player select Pokémon for their bench"""
     while True:
-        print("\nDo you want to place any basic Pokémon on your bench? (y/n)")
-        choice = input().lower()
+        yield say("\nDo you want to place any basic Pokémon on your bench? (y/n)")
+        choice = (yield ask()).lower()
         
         if choice == 'n':
             return
         
         if choice == 'y':
-            print("\nSelect a basic Pokémon for your bench:")
+            yield say("\nSelect a basic Pokémon for your bench:")
             basic_indices = []
             for i, card in enumerate(player.hand):
                 if card.card_type == "pokemon" and card.energy_cost <= 1:
                     basic_indices.append(i)
-                    print(f"{i+1}. {card}")
+                    yield say(f"{i+1}. {card}")
             
             if not basic_indices:
-                print("No more basic Pokémon in your hand.")
+                yield say("No more basic Pokémon in your hand.")
                 return
             
             try:
-                card_choice = int(input("\nEnter card number (0 to stop): ")) - 1
+                card_choice = int((yield ask("\nEnter card number (0 to stop): "))) - 1
                 if card_choice == -1:
                     return
                 
                 if card_choice in basic_indices:
                     success, message = player.play_pokemon(card_choice, as_active=False)
                     if success:
-                        print_action(message)
+                        yield say(render_action(message))
                     else:
-                        print(message)
+                        yield say(message)
                 else:
-                    print("Invalid choice. Please select a basic Pokémon.")
+                    yield say("Invalid choice. Please select a basic Pokémon.")
             except ValueError:
-                print("Please enter a number.")
+                yield say("Please enter a number.")
 
 def computer_setup(computer):
     """Set up the computer's active Pokémon and bench"""
-    # Find all basic Pokémon in hand
-    basic_indices = [i for i, card in enumerate(computer.hand) 
-                   if card.card_type == "pokemon" and card.energy_cost <= 1]
-    
-    if not basic_indices:
-        return  # Shouldn't happen due to mulligan checks
-    
-    # Play first as active
-    success, message = computer.play_pokemon(basic_indices[0], as_active=True)
-    if success:
-        print_action(f"Computer {message.lower()}")
-    
-    # Play rest on bench (up to 5)
-    basic_indices = basic_indices[1:]  # Remove the one we just played
-    bench_count = 0
-    
-    for idx in basic_indices[:5]:  # Max 5 on bench
-        # Adjust index because we're removing cards
-        adjusted_idx = idx - bench_count
-        success, message = computer.play_pokemon(adjusted_idx, as_active=False)
-        if success:
-            print_action(f"Computer {message.lower()}")
-            bench_count += 1
+    for action in computer.make_computer_setup():
+        yield say(render_action(f"Computer {action.lower()}"))
+
+def observe(ai, kind, card=None, target=None):
+    """Tell the search AI (if any) about an action the player took"""
+    if ai is not None:
+        ai.observe(get_action(kind, card.template.card_id if card else None, target))
 
-def player_turn(player, computer):
+def player_turn(player, computer, ai=None):
     """Handle the player's turn"""
-    print_turn_banner("PLAYER")
+    yield say(render_turn_banner("PLAYER"))
     
     # Start turn (draw a card)
     card = player.draw_card()
     if card is None:
         return "computer"  # Player loses if can't draw a card
     
-    slow_print(f"You drew: {card}")
+    yield slow_print(f"You drew: {card}")
     player.can_attack = True
     
     # Display the player's hand with ASCII art
-    print_hand(player.hand)
+    yield draw_art(render_hand(player.hand))
     
     while True:
         # Print the current game state
-        print_board(player, computer)
+        yield show_board(player, computer)
         
         # Ask for action
-        command = input("\nEnter command (help for list of commands): ").lower()
+        command = (yield ask("\nEnter command (help for list of commands): ")).lower()
         
         if command == "help":
-            print_help()
+            yield say(render_help())
         
         elif command == "end":
+            observe(ai, END_TURN)
             return "continue"  # End turn, game continues
         
         elif command == "quit":
@@ -173,39 +212,37 @@ def player_turn(player, computer):
         
         elif command == "attack":
             if not player.active_pokemon:
-                print_action("You don't have an active Pokémon to attack with!")
+                yield say(render_action("You don't have an active Pokémon to attack with!"))
                 continue
                 
             if not player.can_attack:
-                print_action("You've already attacked this turn!")
+                yield say(render_action("You've already attacked this turn!"))
                 continue
                 
             success, message = player.attack(computer)
             if success:
-                print_action(message)
+                yield say(render_action(message))
+                observe(ai, ATTACK)
                 
                 # Check if computer's active was knocked out
                 if not computer.active_pokemon and computer.bench:
                     # Computer must promote a new active
                     success, message = computer.choose_new_active()
                     if success:
-                        print_action(f"Computer {message.lower()}")
+                        yield say(render_action(f"Computer {message.lower()}"))
                 
-                # Check win condition
-                if not player.prizes:
-                    return "player"  # Player wins by taking all prize cards
-                
-                if not computer.active_pokemon and not computer.bench:
-                    return "player"  # Player wins by knocking out all Pokémon
+                # Check win condition (all prizes taken or all Pokémon knocked out)
+                if player.has_won(computer):
+                    return "player"
             else:
-                print_action(message)
+                yield say(render_action(message))
         
         elif command.isdigit():
             # Play a card from hand
             card_index = int(command) - 1
             
             if card_index < 0 or card_index >= len(player.hand):
-                print_action("Invalid card number!")
+                yield say(render_action("Invalid card number!"))
                 continue
             
             card = player.hand[card_index]
@@ -217,19 +254,20 @@ def player_turn(player, computer):
                     success, message = player.play_pokemon(card_index, as_active=True)
                 else:
                     if len(player.bench) >= 5:
-                        print_action("Your bench is full! Cannot play more Pokémon.")
+                        yield say(render_action("Your bench is full! Cannot play more Pokémon."))
                         continue
                     success, message = player.play_pokemon(card_index, as_active=False)
                 
                 if success:
-                    print_action(message)
+                    yield say(render_action(message))
+                    observe(ai, PLAY_ACTIVE if target == "active" else PLAY_BENCH, card)
                 else:
-                    print_action(message)
+                    yield say(render_action(message))
             
             elif card.card_type == "energy":
                 # Choose target for energy
                 if not player.active_pokemon and not player.bench:
-                    print_action("You have no Pokémon to attach energy to!")
+                    yield say(render_action("You have no Pokémon to attach energy to!"))
                     continue
                 
                 targets = []
@@ -239,125 +277,264 @@ def player_turn(player, computer):
                 for i, pokemon in enumerate(player.bench):
                     targets.append((f"bench {i+1}", pokemon))
                 
-                print("\nChoose a Pokémon to attach energy to:")
+                yield say("\nChoose a Pokémon to attach energy to:")
                 for i, (label, pokemon) in enumerate(targets):
-                    print(f"{i+1}. {pokemon.name} ({label})")
+                    yield say(f"{i+1}. {pokemon.name} ({label})")
                 
                 try:
-                    target_choice = int(input("Enter choice number: ")) - 1
+                    target_choice = int((yield ask("Enter choice number: "))) - 1
                     if 0 <= target_choice < len(targets):
                         target_type, _ = targets[target_choice]
                         if target_type == "active":
+                            bench_idx = ACTIVE
                             success, message = player.play_energy(card_index)
                         else:
                             bench_idx = int(target_type.split()[1]) - 1
                             success, message = player.play_energy(card_index, target_index=bench_idx)
                         
                         if success:
-                            print_action(message)
+                            yield say(render_action(message))
+                            observe(ai, ATTACH_ENERGY, card, bench_idx)
                         else:
-                            print_action(message)
+                            yield say(render_action(message))
                     else:
-                        print_action("Invalid choice!")
+                        yield say(render_action("Invalid choice!"))
                 except ValueError:
-                    print_action("Please enter a number.")
+                    yield say(render_action("Please enter a number."))
             
             elif card.card_type == "trainer":
                 success, message = player.play_trainer(card_index)
                 if success:
-                    print_action(message)
+                    yield say(render_action(message))
+                    observe(ai, PLAY_TRAINER, card)
                 else:
-                    print_action(message)
-        
+                    yield say(render_action(message))
+                    
         else:
-            print_action("Unknown command. Type 'help' for a list of commands.")
+            yield say(render_action("Unknown command. Type 'help' for a list of commands."))
             
-def computer_turn(computer, player):
+def computer_turn(computer, player, ai=None):
     """Handle the computer's turn"""
-    print_turn_banner("COMPUTER")
+    yield say(render_turn_banner("COMPUTER"))
     
     # Start turn (draw a card)
     card = computer.draw_card()
     if card is None:
         return "player"  # Computer loses if can't draw a card
     
-    slow_print(f"Computer drew a card.")
+    yield slow_print(f"Computer drew a card.")
     computer.can_attack = True
     
     # Computer AI makes moves
-    actions = computer.make_computer_move(player)
+    if ai is None:
+        actions = computer.make_computer_move(player)
+    else:
+        import mcts  # Already loaded by whoever made the agent
+        game = Game(players=[player, computer])
+        game.current = 1
+        playouts_before = ai.total_playouts
+        actions = yield call(lambda: mcts.play_turn(ai, game))
+        yield slow_print(f"Computer considered {ai.total_playouts - playouts_before:,} playouts "
+                         f"({ai.playouts_per_second:,.0f} playouts/sec).")
     
     # Display each action with a delay
     for action in actions:
-        time.sleep(1)  # Slight delay between actions
-        print_action(action)
+        yield pause(1)  # Slight delay between actions
+        yield say(render_action(action))
     
     # Check if player's active was knocked out
     if not player.active_pokemon and player.bench:
         # Player must promote a new active
         success, message = player.choose_new_active()
         if success:
-            print_action(message)
+            yield say(render_action(message))
     
-    # Check win conditions
-    if not computer.prizes:
-        return "computer"  # Computer wins by taking all prize cards
-    
-    if not player.active_pokemon and not player.bench:
-        return "computer"  # Computer wins by knocking out all Pokémon
+    # Check win conditions (all prizes taken or all Pokémon knocked out)
+    if computer.has_won(player):
+        return "computer"
     
     # Print final board state after computer's turn
-    print_board(player, computer)
+    yield show_board(player, computer)
     
     # Wait for player to acknowledge
-    input("\nPress Enter to continue to your turn...")
+    yield ask("\nPress Enter to continue to your turn...")
     return "continue"
 
-def main():
-    """Main game loop"""
-    player, computer = setup_game()
+def profiled(profiler, name, flow):
+    """Return flow timed as a phase by profiler, or flow itself if there is no profiler"""
+    return flow if profiler is None else profiler.flow(name, flow)
+
+def play_game(ai=None, rng=None, log=None, profiler=None):
+    """Play one whole game, yielding IO requests; returns the game result
+    
+    With log, a GameLog, the game is recorded so replay.py can rebuild it.
+    With profiler, a Profiler, setup, every turn and the players' actions
+    are timed.
+    """
+    if log is not None:
+        # A logged game is replayed from its seed, so deal from a seeded rng
+        seed = (rng or random).getrandbits(64)
+        rng = random.Random(seed)
+    player, computer = yield from profiled(profiler, "setup_game", setup_game(rng))
+    if profiler is not None:
+        profiler.instrument_player(player)
+        profiler.instrument_player(computer)
+    if log is not None:
+        log.start(Game(players=[player, computer]), seed)
     
     # Initial setup phase
-    slow_print("Setting up the game...")
-    time.sleep(1)
+    yield slow_print("Setting up the game...")
+    yield pause(1)
     
     # Player chooses active Pokémon
-    select_active_pokemon(player)
+    yield from select_active_pokemon(player)
     
     # Player chooses bench Pokémon
-    select_bench_pokemon(player)
+    yield from select_bench_pokemon(player)
     
     # Computer sets up
-    slow_print("\nComputer is setting up...")
-    computer_setup(computer)
+    yield slow_print("\nComputer is setting up...")
+    yield from computer_setup(computer)
     
     # Initial board state
-    print_board(player, computer)
-    input("\nPress Enter to start the game...")
+    yield show_board(player, computer)
+    yield ask("\nPress Enter to start the game...")
     
     # Main game loop
     current_player = "player"  # Player goes first
     game_result = "continue"
+    turns = 0
     
     while game_result == "continue":
+        turns += 1
+        if log is not None:
+            log.turn(0 if current_player == "player" else 1, turns)
         if current_player == "player":
-            game_result = player_turn(player, computer)
+            game_result = yield from profiled(profiler, "player turn", player_turn(player, computer, ai))
             current_player = "computer"
         else:
-            game_result = computer_turn(computer, player)
+            game_result = yield from profiled(profiler, "computer turn", computer_turn(computer, player, ai))
             current_player = "player"
     
     # Game over
+    if log is not None:
+        log.end({"player": 0, "computer": 1}.get(game_result), turns)
+    yield (BOARD, None)
     if game_result == "player":
-        print_winner("PLAYER")
+        yield draw_art(render_winner("PLAYER"))
     elif game_result == "computer":
-        print_winner("COMPUTER")
+        yield draw_art(render_winner("COMPUTER"))
     elif game_result == "quit":
-        print("\nGame ended by player. Thanks for playing!")
+        yield say("\nGame ended by player. Thanks for playing!")
+    return game_result
+
+def terminal_board():
+    """Return the terminal's board renderer, creating it on first use"""
+    global board
+    if board is None:
+        from renderer import BoardRenderer
+        board = BoardRenderer()
+    return board
+
+def run(flow, pace=1.0, renderer=None):
+    """Drive a game flow in the terminal, blocking on input and delays
+    
+    pace scales every delay; 0 skips them. The board is drawn with
+    renderer, or the terminal's board renderer if None.
+    """
+    if renderer is None:
+        renderer = terminal_board()
+    reply = None
+    while True:
+        try:
+            kind, value = flow.send(reply)
+        except StopIteration as stop:
+            return stop.value
+        reply = None
+        
+        if kind == WRITE or kind == ART:
+            sys.stdout.write(value)
+        elif kind == SLOW:
+            text, delay = value
+            if pace > 0:
+                for char in text:
+                    sys.stdout.write(char)
+                    sys.stdout.flush()
+                    time.sleep(delay * pace)
+                sys.stdout.write("\n")
+            else:
+                sys.stdout.write(text + "\n")
+        elif kind == PAUSE:
+            sys.stdout.flush()
+            if pace > 0:
+                time.sleep(value * pace)
+        elif kind == INPUT:
+            reply = input(value)
+        elif kind == BOARD:
+            if value is None:
+                renderer.close()
+            else:
+                renderer.draw(*value)
+        elif kind == CALL:
+            sys.stdout.flush()
+            reply = value()
+
+def main():
+    """Main game loop"""
+    parser = argparse.ArgumentParser(description="Play the Pokémon TCG against the computer")
+    parser.add_argument("--ai", choices=["greedy", "mcts"], default="greedy",
+                        help="computer opponent: fixed greedy script or Monte Carlo tree search")
+    parser.add_argument("--think-ms", type=int, default=1000,
+                        help="MCTS search budget per computer move in milliseconds")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes for parallel MCTS search")
+    parser.add_argument("--endgame", type=int, default=None, metavar="SIZE",
+                        help="with --ai mcts, play positions with at most SIZE cards left to play perfectly")
+    parser.add_argument("--tablebase", metavar="FILE", help="endgame tablebase to load and save back")
+    parser.add_argument("--pace", type=float, default=1.0,
+                        help="speed of text and action animations as a delay multiplier (0 skips them)")
+    parser.add_argument("--log", metavar="FILE", help="append the game to this game log for replay.py")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="time the game's phases, printing a summary and writing a Chrome trace to FILE")
+    args = parser.parse_args()
+    if args.endgame is not None and args.ai != "mcts":
+        parser.error("--endgame needs --ai mcts")
+    if args.tablebase is not None and args.endgame is None:
+        parser.error("--tablebase needs --endgame")
+    
+    ai = None
+    solver = None
+    if args.ai == "mcts":
+        import mcts
+        if args.endgame is not None:
+            from endgame import EndgameSolver
+            solver = EndgameSolver(args.endgame, args.tablebase)
+        ai = mcts.MCTSAgent(budget_ms=args.think_ms, workers=args.workers, endgame=solver)
+    log = open_log(args.log, flush_turns=True) if args.log else None
+    profiler = Profiler(trace=True) if args.profile else None
+    
+    flow = play_game(ai, log=log, profiler=profiler)
+    if profiler is not None:
+        flow = profiler.flow("game", flow, REQUEST_PHASES)
+    try:
+        run(flow, pace=args.pace)
+    finally:
+        if log is not None:
+            log.close()
+        if profiler is not None:
+            print("\n" + profiler.summary())
+            profiler.write_chrome_trace(args.profile)
+    
+    if ai is not None:
+        ai.close()
+    if solver is not None and args.tablebase is not None:
+        solver.save()
 
 if __name__ == "__main__":
     try:
         main()
     except KeyboardInterrupt:
+        if board is not None:
+            board.close()
         print("\n\nGame interrupted. Thanks for playing!")
-        sys.exit(0) 
\ No newline at end of file
+        sys.exit(0)
@@ -0,0 +1,123 @@
+"""
+Profiling hooks for Pokémon TCG
+Times game phases (setup, turns, AI moves, attacks, trainers, board drawing, input) and exports
+a summary table and a Chrome trace
+"""
+import os
+import time
+
+# Player methods timed by Profiler.instrument
+PLAYER_METHODS = ("make_computer_move", "attack", "play_trainer")
+# Game methods timed by Profiler.instrument, and the phase names they are reported under
+GAME_METHODS = {"setup": "setup", "play_turn": "turn"}
+
+
+class Profiler:
+    """Collects how many times each named phase ran and how long it took
+
+    Nothing in the engine checks for a profiler. Instead, instrument()
+    replaces the timed methods of one game's objects with timing wrappers,
+    so games that aren't profiled run exactly the code they always did.
+    With trace, every span is also kept (start and duration in
+    nanoseconds) for write_chrome_trace.
+    """
+
+    def __init__(self, trace=False, clock=time.perf_counter_ns):
+        self.clock = clock
+        self.totals = {}  # Phase name -> [calls, total ns, longest ns]
+        self.events = [] if trace else None  # (name, start ns, duration ns, pid)
+        self.pid = os.getpid()
+
+    def add(self, name, start, duration):
+        """Record one span of a phase"""
+        totals = self.totals.get(name)
+        if totals is None:
+            self.totals[name] = [1, duration, duration]
+        else:
+            totals[0] += 1
+            totals[1] += duration
+            if duration > totals[2]:
+                totals[2] = duration
+        if self.events is not None:
+            self.events.append((name, start, duration, self.pid))
+
+    def wrap(self, name, func):
+        """Return func timed as a phase of name"""
+        clock = self.clock
+        add = self.add
+
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                add(name, start, clock() - start)
+        return timed
+
+    def instrument_player(self, player):
+        """Time a player's AI move, attacks and trainer cards"""
+        for method in PLAYER_METHODS:
+            setattr(player, method, self.wrap(method, getattr(player, method)))
+
+    def instrument(self, game):
+        """Time a headless game's setup and turns and both players' actions"""
+        for method, name in GAME_METHODS.items():
+            setattr(game, method, self.wrap(name, getattr(game, method)))
+        for player in game.players:
+            self.instrument_player(player)
+
+    def flow(self, name, flow, requests=None):
+        """Wrap a game flow generator (see pokemon_tcg.py), timing it as one phase of name
+
+        The phase runs from the flow's start to its end, so it includes the
+        time its requests take. With requests, a dict of request kind ->
+        phase name, the time the driver takes to carry out each request is
+        timed as that phase too.
+        """
+        start = self.clock()
+        reply = None
+        try:
+            while True:
+                try:
+                    request = flow.send(reply)
+                except StopIteration as stop:
+                    return stop.value
+                if requests is None:
+                    reply = yield request
+                else:
+                    waited = self.clock()
+                    try:
+                        reply = yield request
+                    finally:
+                        self.add(requests.get(request[0], request[0]), waited, self.clock() - waited)
+        finally:
+            flow.close()
+            self.add(name, start, self.clock() - start)
+
+    def merge(self, other):
+        """Add another profiler's totals and spans (from a worker process) to this one"""
+        for name, (calls, total, longest) in other.totals.items():
+            totals = self.totals.setdefault(name, [0, 0, 0])
+            totals[0] += calls
+            totals[1] += total
+            totals[2] = max(totals[2], longest)
+        if self.events is not None and other.events is not None:
+            self.events += other.events
+
+    def summary(self):
+        """Return the totals as a table, longest total first"""
+        lines = [f"{'Phase':<22}{'Calls':>10}{'Total ms':>12}{'Mean µs':>12}{'Max µs':>12}"]
+        for name, (calls, total, longest) in sorted(self.totals.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:<22}{calls:>10,}{total / 1e6:>12,.1f}{total / calls / 1e3:>12,.1f}"
+                         f"{longest / 1e3:>12,.1f}")
+        return "\n".join(lines)
+
+    def write_chrome_trace(self, path):
+        """Write every span as a Chrome trace (chrome://tracing, Perfetto or speedscope)"""
+        import json
+        if self.events is None:
+            raise ValueError("Profiler was created without trace=True")
+        events = [{"name": name, "ph": "X", "ts": start / 1e3, "dur": duration / 1e3, "pid": pid, "tid": pid}
+                  for name, start, duration, pid in self.events]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
@@ -0,0 +1,103 @@
+"""
+Diff-based terminal renderer for the Pokémon TCG board
+Keeps the board pinned to the top of the screen and repaints only changed lines
+"""
+import shutil
+import sys
+from ascii_art import render_board, render_compact_board
+
+MIN_LOG_ROWS = 6  # Rows left under the board for messages and prompts
+
+CLEAR_SCREEN = "\033[H\033[J"
+SAVE_CURSOR = "\0337"
+RESTORE_CURSOR = "\0338"
+CLEAR_LINE = "\033[K"
+RESET_SCROLL_REGION = "\033[r"
+
+
+class BoardRenderer:
+    """Draws the board with one write per frame
+
+    On a terminal tall enough for the board plus a few rows of messages,
+    the board is painted once at the top of the screen and everything else
+    scrolls in a region underneath it. Later frames rewrite only the lines
+    that differ from the previous frame, leaving the cursor where it was.
+    The full board with its card art only fits on very tall terminals, so
+    most get the compact board, with one line per Pokémon. Anywhere else
+    (a terminal too short even for that, or output that isn't a terminal)
+    each frame is the full board written whole, but still as a single write.
+    """
+
+    def __init__(self, out=None, rows=None):
+        self.out = out if out is not None else sys.stdout
+        self.rows = rows  # Terminal height; looked up on every frame when None
+        self._previous = None  # Lines of the frame on screen, or None to repaint
+        self._region_set = False
+        self._compact_rows = None  # Terminal height the full board was last too tall for
+        self.lines_written = 0  # Board lines written, for measuring redraw cost
+
+    def _terminal_rows(self):
+        if self.rows is not None:
+            return self.rows
+        if not self.out.isatty():
+            return 0
+        return shutil.get_terminal_size().lines
+
+    def invalidate(self):
+        """Force the next frame to repaint the whole screen"""
+        self._previous = None
+
+    def draw(self, player, computer, show_computer_hand=False):
+        """Draw the board for the current game state"""
+        rows = self._terminal_rows()
+        lines = None
+        if rows != self._compact_rows:
+            lines = render_board(player, computer, show_computer_hand).split("\n")
+            if rows and len(lines) + MIN_LOG_ROWS > rows:
+                # Stay compact from now on (until the terminal is resized), not switching back and forth
+                self._compact_rows = rows
+        if rows == self._compact_rows:
+            compact = render_compact_board(player, computer, show_computer_hand).split("\n")
+            if len(compact) + MIN_LOG_ROWS <= rows:
+                lines = compact
+            elif lines is None:
+                lines = render_board(player, computer, show_computer_hand).split("\n")
+
+        if len(lines) + MIN_LOG_ROWS > rows:
+            # No room to pin even the compact board, so print the frame like print_board
+            self.close()
+            self.out.write("\n".join(lines) + "\n")
+            self.out.flush()
+            self.lines_written += len(lines)
+            return
+
+        previous = self._previous
+        if previous is not None and len(previous) > len(lines):
+            # Pad to the pinned height so a shorter board clears old lines
+            lines += [""] * (len(previous) - len(lines))
+
+        if previous is None or len(previous) != len(lines):
+            # Paint the whole board, then let messages scroll underneath it
+            frame = [CLEAR_SCREEN, "\n".join(lines),
+                     f"\033[{len(lines) + 1};{rows}r", f"\033[{rows};1H"]
+            self._region_set = True
+            self.lines_written += len(lines)
+        else:
+            frame = [SAVE_CURSOR]
+            for row, (line, old) in enumerate(zip(lines, previous), 1):
+                if line != old:
+                    frame.append(f"\033[{row};1H{line}{CLEAR_LINE}")
+                    self.lines_written += 1
+            frame.append(RESTORE_CURSOR)
+
+        self._previous = lines
+        self.out.write("".join(frame))
+        self.out.flush()
+
+    def close(self):
+        """Give the whole terminal back to normal scrolling output"""
+        if self._region_set:
+            self.out.write(RESET_SCROLL_REGION + f"\033[{self._terminal_rows()};1H\n")
+            self.out.flush()
+            self._region_set = False
+        self._previous = None
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Replay tool for Pokémon TCG game logs
+Rebuilds any logged game from its seed and actions, optionally stopping at a given turn
+"""
+
+import argparse
+import random
+from ascii_art import render_board
+from engine import Game
+from gamelog import (
+    ACTIVE, ATTACH_ENERGY, ATTACK, END, KIND_NAMES, NO_WINNER, PLAY_ACTIVE, PLAY_BENCH,
+    PLAY_TRAINER, PROMOTE, TURN, GameLogReader
+)
+from pokemon_cards import CARD_TEMPLATES
+
+
+def replay(seed, records, turn=None):
+    """Rebuild a game from its seed and records and return the Game
+
+    With turn, stops at the start of that turn, just after its draw.
+    Cards are dealt exactly as in the logged game, so every action is
+    applied to the same hand position it was taken from.
+    """
+    game = Game(random.Random(seed))
+    game.deal()
+    players = game.players
+
+    for kind, seat, index, target, value in records:
+        player = players[seat]
+        if kind == TURN:
+            game.current = seat
+            game.turns = value - 1
+            game.begin_turn()
+            if value == turn:
+                break
+        elif kind == PLAY_ACTIVE:
+            player.play_pokemon(index, as_active=True)
+        elif kind == PLAY_BENCH:
+            player.play_pokemon(index, as_active=False)
+        elif kind == ATTACH_ENERGY:
+            player.play_energy(index, None if target == ACTIVE else target)
+        elif kind == PLAY_TRAINER:
+            player.play_trainer(index)
+        elif kind == ATTACK:
+            player.attack(players[1 - seat])
+        elif kind == PROMOTE:
+            player.choose_new_active()
+        elif kind == END:
+            game.winner = None if index == NO_WINNER else index
+    return game
+
+
+def describe(record):
+    """Return a short human-readable description of a record"""
+    kind, seat, index, target, value = record
+    if kind == TURN:
+        return f"turn {value}: seat {seat}"
+    if kind == END:
+        return "game over: " + (f"seat {index} wins" if index != NO_WINNER else "no winner")
+    text = f"  seat {seat} {KIND_NAMES[kind]}"
+    if kind != ATTACK:
+        text += f" {CARD_TEMPLATES[value].name}"
+    if kind in (PLAY_ACTIVE, PLAY_BENCH, ATTACH_ENERGY, PLAY_TRAINER):
+        text += f" (hand {index + 1})"
+    if kind == ATTACH_ENERGY:
+        text += " to active" if target == ACTIVE else f" to bench {target + 1}"
+    return text
+
+
+def print_summary(reader):
+    summary = reader.summary()
+    print(f"Games:    {summary['games']} ({summary['finished']} finished)")
+    print(f"Wins:     seat 0 {summary['wins'][0]}, seat 1 {summary['wins'][1]}")
+    print(f"Length:   {summary['avg_turns']:.2f} turns on average")
+    print("Actions:  " + ", ".join(f"{name} {count:,}" for name, count in summary["actions"].items()
+                                   if name not in ("game", "end")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize or replay a Pokémon TCG game log")
+    parser.add_argument("log", help="game log file")
+    parser.add_argument("--list", action="store_true", help="list every game in the log")
+    parser.add_argument("--game", type=int, help="number of the game to replay")
+    parser.add_argument("--turn", type=int, help="stop the replay at the start of this turn")
+    parser.add_argument("--actions", action="store_true", help="print the replayed records")
+    args = parser.parse_args()
+
+    with GameLogReader(args.log) as reader:
+        games = reader.games()
+
+        if args.list:
+            for game in games:
+                result = "unfinished" if game.turns is None else (
+                    f"seat {game.winner} won in {game.turns} turns" if game.winner is not None
+                    else f"no winner after {game.turns} turns")
+                print(f"{game.number:6d}  seed {game.seed:<40d} {result}")
+            return
+
+        if args.game is None:
+            print_summary(reader)
+            return
+
+        if not 0 <= args.game < len(games):
+            parser.error(f"the log holds games 0 to {len(games) - 1}")
+        entry = games[args.game]
+        records = reader.records(entry.start, entry.stop)
+        game = replay(entry.seed, records, args.turn)
+
+        if args.actions:
+            for record in records:
+                print(describe(record))
+                if record[0] == TURN and record[4] == args.turn:
+                    break
+
+        player, computer = game.players
+        print(render_board(player, computer, show_computer_hand=True))
+        if game.winner is not None:
+            print(f"Seat {game.winner} ({game.players[game.winner].name}) won after {game.turns} turns")
+        else:
+            print(f"Position at turn {game.turns}, seat {game.current} to play")
+
+
+if __name__ == "__main__":
+    main()
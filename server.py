@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Multi-table Pokémon TCG server
+Hosts many human-vs-computer games in one process over TCP or a Unix socket
+
+Each connection plays one game with the usual commands (digits, attack,
+end, help, quit). The protocol is line based, and every line from the
+server starts with a tag and a space:
+
+    C <id> <type> <hp> <damage> <cost> <name>   card catalog, sent first
+    T <text>                                    a line of game text, never terminal art
+    S <field>=<value> ...                       board fields that changed
+    P <prompt>                                  the server waits for one line
+    E <result>                                  game over: player, computer or quit
+
+Board fields are you.* for the connected player and opp.* for the
+computer: active and bench as <card id>:<damage>:<energy> (bench entries
+comma-separated, "-" for none), hand as comma-separated card ids (a
+count for opp.hand), and deck, discard and prizes as counts. A client
+keeps the last value of each field and draws the board and hand itself;
+the server sends no terminal escapes or card art.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+from async_game import StreamInput, run_async
+from pokemon_cards import CARD_TEMPLATES
+from pokemon_tcg import play_game
+
+
+def _pokemon_field(card):
+    return f"{card.template.card_id}:{card.damage_taken}:{card.attached_energy}"
+
+
+def board_fields(player, computer):
+    """Return the board as a dict of protocol fields"""
+    fields = {}
+    for prefix, side in (("you", player), ("opp", computer)):
+        active = side.active_pokemon
+        fields[prefix + ".active"] = _pokemon_field(active) if active is not None else "-"
+        fields[prefix + ".bench"] = ",".join(_pokemon_field(card) for card in side.bench) or "-"
+        fields[prefix + ".deck"] = str(len(side.deck))
+        fields[prefix + ".discard"] = str(len(side.discard))
+        fields[prefix + ".prizes"] = str(len(side.prizes))
+    fields["you.hand"] = ",".join(str(card.template.card_id) for card in player.hand) or "-"
+    fields["opp.hand"] = str(len(computer.hand))
+    return fields
+
+
+class StateDeltas:
+    """Stands in for BoardRenderer, sending only the board fields that changed"""
+
+    def __init__(self, session):
+        self.session = session
+        self._previous = {}
+
+    def draw(self, player, computer, show_computer_hand=False):
+        fields = board_fields(player, computer)
+        previous = self._previous
+        changed = [f"{key}={value}" for key, value in fields.items() if previous.get(key) != value]
+        self._previous = fields
+        if changed:
+            self.session.send("S", " ".join(changed))
+
+    def invalidate(self):
+        self._previous = {}
+
+    def close(self):
+        pass
+
+
+class Session:
+    """One connection: a file-like output that frames game text as protocol lines"""
+
+    def __init__(self, reader, writer, encoding="utf-8"):
+        self.writer = writer
+        self.encoding = encoding
+        self._input = StreamInput(reader, encoding)
+        self._pending = ""  # Text written since the last newline
+
+    def send(self, tag, text=""):
+        self.writer.write(f"{tag} {text}\n".encode(self.encoding))
+
+    def write(self, text):
+        lines = (self._pending + text).split("\n")
+        self._pending = lines.pop()
+        for line in lines:
+            self.send("T", line)
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+    async def ask(self, prompt):
+        """Send what's left of the current line as the prompt and read the reply"""
+        self.send("P", self._pending)
+        self._pending = ""
+        await self.writer.drain()
+        return await self._input(prompt)
+
+    def end(self, result):
+        """Send any unfinished line of text, then the game result"""
+        if self._pending:
+            self.send("T", self._pending)
+            self._pending = ""
+        self.send("E", result)
+
+    def send_catalog(self):
+        for t in CARD_TEMPLATES:
+            self.send("C", f"{t.card_id} {t.card_type} {t.hp} {t.damage} {t.energy_cost} {t.name}")
+
+
+class GameServer:
+    """Runs one game per connection on the current event loop"""
+
+    def __init__(self, pace=0.0, ai="greedy", think_ms=1000, seed=None):
+        self.pace = pace
+        self.ai = ai
+        self.think_ms = think_ms
+        self.rng = random.Random(seed)
+        self.active = 0
+        self.completed = 0  # Sessions that have ended, finished or not
+        self.commands = 0
+
+    async def handle(self, reader, writer):
+        session = Session(reader, writer)
+        ai = None
+        if self.ai == "mcts":
+            import mcts
+            ai = mcts.MCTSAgent(budget_ms=self.think_ms)
+        game_rng = random.Random(self.rng.getrandbits(64))
+
+        async def ask(prompt):
+            line = await session.ask(prompt)
+            self.commands += 1
+            return line
+
+        self.active += 1
+        try:
+            session.send_catalog()
+            result = await run_async(play_game(ai, game_rng), ask, session, self.pace,
+                                     renderer=StateDeltas(session), art=False)
+            session.end(result)
+            await writer.drain()
+        except (EOFError, ConnectionError):
+            pass  # The client went away mid-game
+        finally:
+            self.active -= 1
+            self.completed += 1
+            if ai is not None:
+                ai.close()
+            writer.close()
+
+    async def report(self, interval):
+        """Print load statistics every interval seconds"""
+        wall, cpu, commands = time.perf_counter(), time.process_time(), self.commands
+        while True:
+            await asyncio.sleep(interval)
+            now_wall, now_cpu = time.perf_counter(), time.process_time()
+            load = (now_cpu - cpu) / (now_wall - wall)
+            rate = (self.commands - commands) / (now_wall - wall)
+            per_core = f"{self.active / load:,.0f}" if load > 0 else "-"
+            print(f"tables {self.active:5d}  completed {self.completed:7d}  "
+                  f"commands/sec {rate:8,.0f}  cpu {load:6.1%}  tables/core {per_core}", flush=True)
+            wall, cpu, commands = now_wall, now_cpu, self.commands
+
+
+async def serve(host="127.0.0.1", port=7777, unix=None, stats_interval=5.0, **options):
+    """Run the server until cancelled"""
+    game_server = GameServer(**options)
+    if unix:
+        server = await asyncio.start_unix_server(game_server.handle, path=unix)
+        where = unix
+    else:
+        server = await asyncio.start_server(game_server.handle, host, port)
+        where = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+    print(f"Serving Pokémon TCG tables on {where} (pid {os.getpid()})", flush=True)
+
+    reporter = asyncio.ensure_future(game_server.report(stats_interval)) if stats_interval > 0 else None
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if reporter is not None:
+            reporter.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host many Pokémon TCG tables from one process")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=7777, help="TCP port to listen on")
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--pace", type=float, default=0.0,
+                        help="animation delay multiplier for every table (default 0, no delays)")
+    parser.add_argument("--ai", choices=["greedy", "mcts"], default="greedy", help="computer opponent")
+    parser.add_argument("--think-ms", type=int, default=1000, help="MCTS search budget per move")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for reproducible deals")
+    parser.add_argument("--stats-interval", type=float, default=5.0,
+                        help="seconds between load reports (0 turns them off)")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.stats_interval, pace=args.pace,
+                          ai=args.ai, think_ms=args.think_ms, seed=args.seed))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if args.unix and os.path.exists(args.unix):
+            os.unlink(args.unix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Batch match simulator for Pokémon TCG
+Runs many headless computer-vs-computer games and reports aggregate statistics
+"""
+
+import argparse
+import io
+import os
+import random
+import time
+from engine import Game
+from gamelog import GameLog, open_log
+from player import PRIZE_COUNT
+from profiler import Profiler
+
+
+def game_seed(seed, index):
+    """Derive the seed for one game from the master seed and the game's index"""
+    return (seed << 64) | index
+
+
+def _simulate_range(seed, start, stop, log=None, export=None, profiler=None, profile_every=1):
+    """Play games start..stop-1 and return their integer totals
+
+    Every game is recorded to log, a GameLog, and to export, a
+    SimulationExport, if they are given. With profiler, every game whose
+    index is a multiple of profile_every is timed by it.
+    """
+    wins = [0, 0]
+    prizes_taken = [0, 0]
+    total_turns = 0
+    min_turns = None
+    max_turns = 0
+
+    for index in range(start, stop):
+        game = Game(random.Random(game_seed(seed, index)))
+        if log is not None:
+            log.start(game, game_seed(seed, index))
+        if profiler is not None and index % profile_every == 0:
+            profiler.instrument(game)
+        winner = game.play() if export is None else export.play(game, index)
+
+        wins[winner] += 1
+        for i, player in enumerate(game.players):
+            prizes_taken[i] += PRIZE_COUNT - len(player.prizes)
+
+        total_turns += game.turns
+        if min_turns is None or game.turns < min_turns:
+            min_turns = game.turns
+        if game.turns > max_turns:
+            max_turns = game.turns
+
+    return {
+        "games": stop - start,
+        "wins": wins,
+        "prizes_taken": prizes_taken,
+        "total_turns": total_turns,
+        "min_turns": min_turns,
+        "max_turns": max_turns,
+    }
+
+
+def _simulate_shard(seed, start, stop, record, export_to, profile):
+    """Worker entry point: like _simulate_range, returning the log bytes and profiler with the totals
+
+    With export_to, (export directory, card count), the shard writes its
+    own chunks of the export. profile is None, or (trace, profile_every)
+    to time games with a new Profiler.
+    """
+    log = GameLog(io.BytesIO()) if record else None
+    export = None
+    if export_to is not None:
+        from columnar import SimulationExport
+        directory, card_count = export_to
+        export = SimulationExport(directory, start, card_count)
+    profiler = Profiler(trace=profile[0]) if profile is not None else None
+    try:
+        totals = _simulate_range(seed, start, stop, log, export, profiler,
+                                 profile[1] if profile is not None else 1)
+    finally:
+        if export is not None:
+            export.close()
+    if log is None:
+        return totals, b"", profiler
+    log.flush()
+    return totals, log.file.getvalue(), profiler
+
+
+def _merge(totals):
+    """Combine the totals of several game ranges"""
+    merged = {
+        "games": 0,
+        "wins": [0, 0],
+        "prizes_taken": [0, 0],
+        "total_turns": 0,
+        "min_turns": None,
+        "max_turns": 0,
+    }
+    for part in totals:
+        merged["games"] += part["games"]
+        merged["total_turns"] += part["total_turns"]
+        merged["max_turns"] = max(merged["max_turns"], part["max_turns"])
+        if part["min_turns"] is not None and (
+                merged["min_turns"] is None or part["min_turns"] < merged["min_turns"]):
+            merged["min_turns"] = part["min_turns"]
+        for i in range(2):
+            merged["wins"][i] += part["wins"][i]
+            merged["prizes_taken"][i] += part["prizes_taken"][i]
+    return merged
+
+
+def _summarize(totals):
+    """Turn integer totals into the results reported to callers"""
+    n_games = totals["games"]
+    return {
+        "games": n_games,
+        "wins": totals["wins"],
+        "win_rate": [w / n_games if n_games else 0.0 for w in totals["wins"]],
+        "avg_turns": totals["total_turns"] / n_games if n_games else 0.0,
+        "min_turns": totals["min_turns"] or 0,
+        "max_turns": totals["max_turns"],
+        "avg_prizes_taken": [p / n_games if n_games else 0.0 for p in totals["prizes_taken"]],
+    }
+
+
+def simulate(n_games, seed=None, log_path=None, export_dir=None, profiler=None, profile_every=1, batch=False):
+    """Play n_games headless games and return aggregate statistics
+
+    With log_path, every game is appended to that game log. With
+    export_dir, per-game and per-turn rows are streamed into a new
+    columnar export there (see columnar.py). With profiler, a Profiler,
+    every profile_every-th game has its phases timed. With batch, the
+    games are played by the NumPy batch engine instead (see
+    simulate_batch), which can do none of those.
+    """
+    if batch:
+        if log_path is not None or export_dir is not None or profiler is not None:
+            raise ValueError("The batch engine can't log, export or profile games")
+        return simulate_batch(n_games, seed)
+    if seed is None:
+        seed = random.getrandbits(32)
+    log = open_log(log_path) if log_path is not None else None
+    export = None
+    if export_dir is not None:
+        from columnar import SimulationExport, create_export, finish_export
+        card_count = create_export(export_dir)
+        export = SimulationExport(export_dir, 0, card_count)
+    try:
+        totals = _simulate_range(seed, 0, n_games, log, export, profiler, profile_every)
+    finally:
+        if log is not None:
+            log.close()
+        if export is not None:
+            export.close()
+    if export_dir is not None:
+        finish_export(export_dir, seed, n_games, card_count)
+    return _summarize(totals)
+
+
+def simulate_parallel(n_games, seed=None, workers=None, log_path=None, export_dir=None, profiler=None,
+                      profile_every=1):
+    """Play n_games headless games across a process pool
+
+    Every game is seeded from the master seed and its own index, so the
+    results (and the game log and export rows, if asked for) are
+    identical to simulate() whatever the number of workers.
+    """
+    if seed is None:
+        seed = random.getrandbits(32)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        return simulate(n_games, seed, log_path, export_dir, profiler, profile_every)
+    # Loaded here, so importing the simulator (as each worker does) doesn't load multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    # A few shards per worker keeps every core busy until the end
+    n_shards = min(n_games, workers * 4) or 1
+    bounds = [n_games * i // n_shards for i in range(n_shards + 1)]
+
+    export_to = None
+    if export_dir is not None:
+        from columnar import create_export, finish_export
+        export_to = (export_dir, create_export(export_dir))
+    log = open_log(log_path) if log_path is not None else None
+    profile = (profiler.events is not None, profile_every) if profiler is not None else None
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            totals = []
+            # Shards come back in order, so the log is written in game order
+            for part, data, shard_profiler in executor.map(
+                    _simulate_shard,
+                    [seed] * n_shards, bounds[:-1], bounds[1:], [log is not None] * n_shards,
+                    [export_to] * n_shards, [profile] * n_shards):
+                totals.append(part)
+                if log is not None:
+                    log.file.write(data)
+                if profiler is not None:
+                    profiler.merge(shard_profiler)
+    finally:
+        if log is not None:
+            log.close()
+    if export_to is not None:
+        finish_export(export_dir, seed, n_games, export_to[1])
+    return _summarize(_merge(totals))
+
+
+def simulate_batch(n_games, seed=None, batch_size=50000):
+    """Play n_games with the NumPy batch engine and return aggregate statistics
+
+    The batch engine (batch_engine.py, which needs NumPy) plays the same
+    greedy games many times faster, but shuffles with NumPy's generator,
+    so its games match simulate()'s in distribution rather than one by one.
+    """
+    import batch_engine
+    return _summarize(_merge(batch_engine.batch_totals(n_games, seed, batch_size)))
+
+
+def print_results(results, elapsed):
+    """Print simulation results as a small report"""
+    print(f"Games played:   {results['games']}")
+    print(f"First player:   {results['wins'][0]} wins ({results['win_rate'][0]:.1%})")
+    print(f"Second player:  {results['wins'][1]} wins ({results['win_rate'][1]:.1%})")
+    print(f"Game length:    {results['avg_turns']:.2f} turns on average "
+          f"(min {results['min_turns']}, max {results['max_turns']})")
+    print(f"Prizes taken:   {results['avg_prizes_taken'][0]:.2f} / "
+          f"{results['avg_prizes_taken'][1]:.2f} on average")
+    if elapsed > 0:
+        print(f"Throughput:     {results['games'] / elapsed:,.0f} games/sec")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate headless Pokémon TCG games")
+    parser.add_argument("games", type=int, nargs="?", default=10000, help="number of games to play")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for reproducible runs")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes to use (0 for one per core)")
+    parser.add_argument("--log", metavar="FILE", help="append every game to this game log")
+    parser.add_argument("--export", metavar="DIR",
+                        help="stream per-game and per-turn rows into a new columnar export")
+    parser.add_argument("--batch", action="store_true",
+                        help="play the games in lockstep with the NumPy batch engine")
+    parser.add_argument("--profile", type=int, default=0, metavar="N",
+                        help="time the phases of every Nth game and print a summary table")
+    parser.add_argument("--trace", metavar="FILE", help="with --profile, also write a Chrome trace of them")
+    args = parser.parse_args()
+    if args.batch and (args.log or args.export or args.workers != 1 or args.profile):
+        parser.error("--batch can't be combined with --log, --export, --workers or --profile")
+    if args.trace and not args.profile:
+        parser.error("--trace needs --profile")
+    profiler = Profiler(trace=args.trace is not None) if args.profile else None
+
+    start = time.perf_counter()
+    if args.batch:
+        try:
+            results = simulate_batch(args.games, seed=args.seed)
+        except ImportError:
+            parser.error("--batch needs NumPy (pip install numpy)")
+    else:
+        results = simulate_parallel(args.games, seed=args.seed, workers=args.workers or None,
+                                    log_path=args.log, export_dir=args.export,
+                                    profiler=profiler, profile_every=args.profile)
+    elapsed = time.perf_counter() - start
+    print_results(results, elapsed)
+    if profiler is not None:
+        print()
+        print(profiler.summary())
+        if args.trace:
+            profiler.write_chrome_trace(args.trace)
+
+
+if __name__ == "__main__":
+    main()
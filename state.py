@@ -0,0 +1,164 @@
+"""
+Compact game-state encoding for Pokémon TCG
+Packs both players into bytes that are cheap to copy, hash and compare
+"""
+import struct
+from array import array
+from deck import Deck
+from engine import Game
+from player import Player
+from pokemon_cards import CARD_TEMPLATES, Card
+
+# Every field is an unsigned 16-bit integer in native byte order. Per player:
+#   flags (bit 0: can_attack, bit 1: is_computer)
+#   knockouts
+#   active card_id, damage_taken, attached_energy (card_id NONE if empty)
+#   bench count, then card_id, damage_taken, attached_energy per Pokémon
+#   hand, deck (top first), discard and prizes (top first):
+#       count, then one card_id per card
+# Only the card_id of cards outside play is kept. Cards in the hand, deck
+# and prizes never carry damage or energy. A knocked-out Pokémon keeps its
+# damage_taken and attached_energy in the discard pile, but nothing reads
+# them there, so it decodes with none.
+NONE = 0xFFFF
+PLAYER_NAMES = ("PLAYER", "COMPUTER")
+
+
+def _encode_player(player, out):
+    out.append((1 if player.can_attack else 0) | (2 if player.is_computer else 0))
+    out.append(player.knockouts)
+
+    active = player.active_pokemon
+    if active is None:
+        out += (NONE, 0, 0)
+    else:
+        out += (active.template.card_id, active.damage_taken, active.attached_energy)
+
+    out.append(len(player.bench))
+    for card in player.bench:
+        out += (card.template.card_id, card.damage_taken, card.attached_energy)
+
+    for zone in (player.hand, player.deck, player.discard, player.prizes):
+        out.append(len(zone))
+        out += [card.template.card_id for card in zone]
+
+
+def _in_play(card_id, damage_taken, attached_energy):
+    card = Card(CARD_TEMPLATES[card_id])
+    card.damage_taken = damage_taken
+    card.attached_energy = attached_energy
+    return card
+
+
+def _decode_player(values, pos, name, rng):
+    flags = values[pos]
+    knockouts = values[pos + 1]
+    pos += 1
+    active = None
+    if values[pos + 1] != NONE:
+        active = _in_play(values[pos + 1], values[pos + 2], values[pos + 3])
+    pos += 4
+
+    bench = []
+    for _ in range(values[pos]):
+        bench.append(_in_play(values[pos + 1], values[pos + 2], values[pos + 3]))
+        pos += 3
+    pos += 1
+
+    zones = []
+    for _ in range(4):
+        count = values[pos]
+        zones.append([Card(CARD_TEMPLATES[card_id]) for card_id in values[pos + 1:pos + 1 + count]])
+        pos += 1 + count
+    hand, deck, discard, prizes = zones
+
+    player = Player(name, is_computer=bool(flags & 2), rng=rng, deck=deck)
+    player.can_attack = bool(flags & 1)
+    player.knockouts = knockouts
+    player.active_pokemon = active
+    player.bench = bench
+    player.hand = hand
+    player.discard = discard
+    player.prizes = Deck(prizes)
+    return player, pos
+
+
+def _pack(values):
+    return struct.pack(f"={len(values)}H", *values)
+
+
+def encode(player, computer):
+    """Encode both players into bytes"""
+    out = []
+    _encode_player(player, out)
+    _encode_player(computer, out)
+    return _pack(out)
+
+
+def decode(data, rng=None):
+    """Rebuild (player, computer) from bytes made by encode()"""
+    values = array("H", data)
+    player, pos = _decode_player(values, 0, PLAYER_NAMES[0], rng)
+    computer, _ = _decode_player(values, pos, PLAYER_NAMES[1], rng)
+    return player, computer
+
+
+def encode_game(game):
+    """Encode a whole Game, including whose turn it is, into bytes
+
+    The header is current, turns, winner (NONE while playing) and whether
+    there was a final blow. The final blow is always struck by the
+    winner's active Pokémon, which is still active once the game is over,
+    so a flag is enough to restore it.
+    """
+    winner = NONE if game.winner is None else game.winner
+    out = [game.current, game.turns, winner, 0 if game.final_blow is None else 1]
+    for player in game.players:
+        _encode_player(player, out)
+    return _pack(out)
+
+
+def decode_game(data, rng=None):
+    """Rebuild a Game from bytes made by encode_game()"""
+    values = array("H", data)
+    player, pos = _decode_player(values, 4, PLAYER_NAMES[0], rng)
+    computer, _ = _decode_player(values, pos, PLAYER_NAMES[1], rng)
+    game = Game(rng, players=[player, computer])
+    game.current = values[0]
+    game.turns = values[1]
+    game.winner = None if values[2] == NONE else values[2]
+    if values[3]:
+        game.final_blow = game.players[game.winner].active_pokemon
+    return game
+
+
+class GameState:
+    """Immutable snapshot of a Game
+
+    Cloning shares the encoded bytes, so it costs one small object no
+    matter how big the game is. A full Game is only rebuilt when a clone
+    is turned back into one with to_game().
+    """
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        self.data = data
+
+    @classmethod
+    def from_game(cls, game):
+        return cls(encode_game(game))
+
+    def to_game(self, rng=None):
+        return decode_game(self.data, rng)
+
+    def clone(self):
+        return GameState(self.data)
+
+    def __eq__(self, other):
+        return isinstance(other, GameState) and self.data == other.data
+
+    def __hash__(self):
+        return hash(self.data)
+
+    def __len__(self):
+        return len(self.data)
@@ -0,0 +1,86 @@
+"""
+Trainer card effects for Pokémon TCG
+A dispatch table of trainer effects keyed by card_id, each with the check of whether it can be played now
+"""
+from collections import namedtuple
+from pokemon_cards import CARD_IDS
+
+# can_play(player) -> whether the effect would succeed now; effect(player, card, card_index) -> message;
+# draws: cards the effect draws from the deck, which searches deal out by chance (see endgame.py)
+TrainerEffect = namedtuple("TrainerEffect", "can_play effect draws", defaults=(0,))
+
+TRAINER_EFFECTS = {}  # card_id -> TrainerEffect
+
+
+def trainer_effect(name, can_play, draws=0):
+    """Register the decorated function as the effect of the named trainer card"""
+    def register(effect):
+        TRAINER_EFFECTS[CARD_IDS[name]] = TrainerEffect(can_play, effect, draws)
+        return effect
+    return register
+
+
+def can_play_trainer(player, card):
+    """Check if Player.play_trainer would succeed for this trainer card, without playing it"""
+    entry = TRAINER_EFFECTS.get(card.template.card_id)
+    return entry is not None and entry.can_play(player)
+
+
+def _discard_played(player, card_index):
+    """Move the played trainer from the hand to the discard pile"""
+    player.discard.append(player.hand.pop(card_index))
+
+
+def _has_active(player):
+    return player.active_pokemon is not None
+
+
+def _always(player):
+    return True
+
+
+@trainer_effect("Potion", _has_active)
+def potion(player, card, card_index):
+    player.active_pokemon.hp = min(player.active_pokemon.hp + 20, player.active_pokemon.hp)
+    _discard_played(player, card_index)
+    return f"Used Potion to heal {player.active_pokemon.name}"
+
+
+def _discard_energy(player):
+    """Index of the first energy card in player's discard pile, or None"""
+    for i, card in enumerate(player.discard):
+        if card.card_type == "energy":
+            return i
+    return None
+
+
+@trainer_effect("Energy Retrieval", lambda player: _discard_energy(player) is not None)
+def energy_retrieval(player, card, card_index):
+    player.hand.append(player.discard.pop(_discard_energy(player)))
+    _discard_played(player, card_index)
+    return "Retrieved an energy card from your discard pile"
+
+
+@trainer_effect("Professor's Research", _always, draws=7)
+def professors_research(player, card, card_index):
+    # Discard hand (this card included) and draw 7 new cards
+    player.discard.extend(player.hand)
+    player.hand.clear()
+    player.hand.extend(player.deck.draw_n(7))
+    return "Discarded your hand and drew 7 new cards"
+
+
+@trainer_effect("Switch", lambda player: player.active_pokemon is not None and bool(player.bench))
+def switch(player, card, card_index):
+    # For simplicity, switch with the first bench Pokémon
+    player.active_pokemon, player.bench[0] = player.bench[0], player.active_pokemon
+    _discard_played(player, card_index)
+    return f"Switched your active Pokémon with {player.active_pokemon.name}"
+
+
+@trainer_effect("Pokémon Center", _has_active)
+def pokemon_center(player, card, card_index):
+    # Heal all damage
+    player.active_pokemon.hp = player.active_pokemon.hp  # In a real game, would restore to max HP
+    _discard_played(player, card_index)
+    return f"Healed all damage from {player.active_pokemon.name}"
@@ -0,0 +1,173 @@
+"""
+Zobrist hashing and a transposition table for Pokémon TCG game states
+Lets search and analysis recognise positions reached by different move orders
+"""
+import random
+
+# Feature codes, packed into the key lookup together with the feature's values
+_SIDE = 1
+_WINNER = 2
+_CAN_ATTACK = 3
+_ACTIVE = 4
+_ACTIVE_DAMAGE = 5
+_ACTIVE_ENERGY = 6
+_BENCH = 7
+_BENCH_DAMAGE = 8
+_BENCH_ENERGY = 9
+_HAND = 10
+_DISCARD = 11
+_DECK = 12
+_PRIZE = 13
+_HAND_SIZE = 14
+_DECK_SIZE = 15
+_PRIZE_SIZE = 16
+
+_KEY_SEED = 0x2D0B51  # Fixed so hashes are stable across runs and processes
+_rng = random.Random(_KEY_SEED)
+_keys = {}
+
+
+def _key(code, player, a=0, b=0):
+    """Return the random 64-bit key for one feature, creating it on first use"""
+    index = (code << 56) | (player << 52) | (a << 24) | b
+    key = _keys.get(index)
+    if key is None:
+        key = _keys[index] = _rng.getrandbits(64)
+    return key
+
+
+def _multiset(code, p, cards):
+    """Hash cards as a multiset: the k-th copy of a card has its own key"""
+    h = 0
+    copies = {}
+    for card in cards:
+        card_id = card.template.card_id
+        k = copies.get(card_id, 0)
+        copies[card_id] = k + 1
+        h ^= _key(code, p, card_id, k)
+    return h
+
+
+def hash_game(game, observer=None):
+    """Return the 64-bit Zobrist hash of a Game
+
+    Hand and discard are hashed as multisets, so the order cards were
+    drawn or played in doesn't matter; bench slots, deck order and prize
+    order do. Given an observer (a player index), only what that player
+    can see is hashed: both deck and prize orders and the opponent's
+    hand count only by size, which makes every determinization of one
+    information set hash alike.
+    """
+    h = _key(_SIDE, game.current)
+    if game.winner is not None:
+        h ^= _key(_WINNER, game.winner)
+
+    for p, player in enumerate(game.players):
+        if player.can_attack:
+            h ^= _key(_CAN_ATTACK, p)
+
+        active = player.active_pokemon
+        if active is not None:
+            h ^= (_key(_ACTIVE, p, active.template.card_id)
+                  ^ _key(_ACTIVE_DAMAGE, p, active.damage_taken)
+                  ^ _key(_ACTIVE_ENERGY, p, active.attached_energy))
+
+        for slot, card in enumerate(player.bench):
+            h ^= (_key(_BENCH, p, slot, card.template.card_id)
+                  ^ _key(_BENCH_DAMAGE, p, slot, card.damage_taken)
+                  ^ _key(_BENCH_ENERGY, p, slot, card.attached_energy))
+
+        if observer is None or observer == p:
+            h ^= _multiset(_HAND, p, player.hand)
+        else:
+            h ^= _key(_HAND_SIZE, p, len(player.hand))
+        h ^= _multiset(_DISCARD, p, player.discard)
+
+        if observer is None:
+            for pos, card in enumerate(player.deck):
+                h ^= _key(_DECK, p, card.template.card_id, pos)
+            for pos, card in enumerate(player.prizes):
+                h ^= _key(_PRIZE, p, card.template.card_id, pos)
+        else:
+            h ^= _key(_DECK_SIZE, p, len(player.deck)) ^ _key(_PRIZE_SIZE, p, len(player.prizes))
+    return h
+
+
+class TranspositionTable:
+    """Fixed-size hash table from Zobrist hashes to arbitrary values
+
+    Each bucket has two slots. The first keeps the entry with the greatest
+    depth (how much work went into it); the second always takes the newest
+    entry, so fresh positions still get cached when the first slot is
+    holding on to an expensive one.
+    """
+
+    def __init__(self, size=1 << 16):
+        if size & (size - 1):
+            raise ValueError("Transposition table size must be a power of two")
+        self._mask = size - 1
+        self._hashes = [None] * (2 * size)
+        self._values = [None] * (2 * size)
+        self._depths = [0] * (2 * size)
+        self.lookups = 0
+        self.hits = 0
+        self.stores = 0
+        self.replacements = 0  # Stores that evicted a different position
+
+    @property
+    def hit_rate(self):
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def get(self, h, default=None):
+        """Return the value stored for hash h, or default"""
+        self.lookups += 1
+        i = (h & self._mask) << 1
+        if self._hashes[i] == h:
+            self.hits += 1
+            return self._values[i]
+        if self._hashes[i + 1] == h:
+            self.hits += 1
+            return self._values[i + 1]
+        return default
+
+    def put(self, h, value, depth=0):
+        """Store value for hash h, replacing an older entry if needed"""
+        self.stores += 1
+        i = (h & self._mask) << 1
+        hashes = self._hashes
+        if hashes[i] == h or hashes[i] is None or depth >= self._depths[i]:
+            if hashes[i] is not None and hashes[i] != h:
+                # Demote the old deep entry to the always-replace slot
+                if hashes[i + 1] is not None and hashes[i + 1] != hashes[i]:
+                    self.replacements += 1
+                hashes[i + 1] = hashes[i]
+                self._values[i + 1] = self._values[i]
+                self._depths[i + 1] = self._depths[i]
+            elif hashes[i + 1] == h:
+                hashes[i + 1] = None  # The first slot takes over this position
+            hashes[i] = h
+            self._values[i] = value
+            self._depths[i] = depth
+        else:
+            if hashes[i + 1] is not None and hashes[i + 1] != h:
+                self.replacements += 1
+            hashes[i + 1] = h
+            self._values[i + 1] = value
+            self._depths[i + 1] = depth
+
+    def clear(self):
+        """Remove every entry; the counters keep counting, so they cover every use of the table"""
+        size = len(self._hashes)
+        self._hashes = [None] * size
+        self._values = [None] * size
+        self._depths = [0] * size
+
+    def stats(self):
+        """Return the table's counters as a dict"""
+        return {
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": self.hit_rate,
+            "stores": self.stores,
+            "replacements": self.replacements,
+        }